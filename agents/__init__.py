@@ -1,5 +1,10 @@
 from .planner_agent import PlannerAgent
 from .executor_agent import ExecutorAgent
 from .verifier_agent import VerifierAgent
+from .intent_matcher import IntentMatcher
+from .plan_cache import PlanTemplateCache
+from .structural_verifier import StructuralVerifier
+from .context_packer import ContextPacker
+from .execution_history import ExecutionHistory
 
-__all__ = ['PlannerAgent', 'ExecutorAgent', 'VerifierAgent']
+__all__ = ['PlannerAgent', 'ExecutorAgent', 'VerifierAgent', 'IntentMatcher', 'PlanTemplateCache', 'StructuralVerifier', 'ContextPacker', 'ExecutionHistory']
@@ -0,0 +1,227 @@
+"""
+Context Packer
+Fits step results into prompt token budgets
+"""
+
+import math
+import re
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# Fields dropped first when a step is over budget, least useful first
+LOW_VALUE_FIELDS = ("url", "html_url", "author", "owner", "published_at", "forks", "full_name", "source")
+
+# Longest string value kept once low-value fields are gone (characters)
+VALUE_LIMITS = (160, 80)
+
+# Word and punctuation pieces for the approximate token count
+TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count prompt tokens locally
+    
+    Uses tiktoken when it is installed; otherwise approximates one token
+    per four characters of each word and one per punctuation mark.
+    
+    Args:
+        text: Prompt text
+        
+    Returns:
+        Token count
+    """
+    global _encoding
+    if tiktoken is not None and _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        except Exception:
+            _encoding = False
+    
+    if _encoding:
+        return len(_encoding.encode(text))
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in TOKEN_PIECES.findall(text))
+
+
+class ContextPacker:
+    """
+    Serializes step results field by field within token budgets
+    
+    Each step gets at most step_budget tokens and the whole prompt at most
+    prompt_budget. A step over budget is shrunk in stages until it fits:
+    low-value fields (URLs, authors, ...) are dropped, long strings are
+    shortened, trailing records are cut, and finally the text is truncated.
+    """
+    
+    def __init__(self, step_budget: int = 400, prompt_budget: int = 2000):
+        """
+        Args:
+            step_budget: Default token budget per step
+            prompt_budget: Default token budget for all steps of one prompt
+        """
+        self.step_budget = step_budget
+        self.prompt_budget = prompt_budget
+        
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+            "last": None
+        }
+    
+    def pack(
+        self,
+        sections: List[Tuple[str, Any]],
+        step_budget: Optional[int] = None,
+        prompt_budget: Optional[int] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Pack step results for a prompt
+        
+        Args:
+            sections: (header, data) per step, e.g. ("Step 1: Fetch weather", {...})
+            step_budget: Token budget per step (defaults to the packer's)
+            prompt_budget: Token budget for all steps (defaults to the packer's)
+            
+        Returns:
+            Tuple of (packed text, report with tokens before/after/saved and dropped fields)
+        """
+        step_budget = step_budget or self.step_budget
+        prompt_budget = prompt_budget or self.prompt_budget
+        budget = max(1, min(step_budget, prompt_budget // max(1, len(sections))))
+        
+        blocks = []
+        dropped = set()
+        truncated = 0
+        tokens_before = 0
+        
+        for header, data in sections:
+            tokens_before += count_tokens(f"{header}\n{data}")
+            text, step_dropped, shrunk = self.pack_data(data, budget)
+            blocks.append(f"{header}\n{text}")
+            dropped.update(step_dropped)
+            truncated += int(shrunk)
+        
+        packed = "\n\n".join(blocks)
+        tokens_after = count_tokens(packed)
+        report = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": max(0, tokens_before - tokens_after),
+            "dropped_fields": sorted(dropped),
+            "truncated_steps": truncated
+        }
+        self._record(report)
+        return packed, report
+    
+    def pack_data(self, data: Any, budget: int) -> Tuple[str, List[str], bool]:
+        """
+        Serialize one step's data within a token budget
+        
+        Args:
+            data: Step result data
+            budget: Token budget
+            
+        Returns:
+            Tuple of (text, dropped field names, whether records or text were cut)
+        """
+        dropped: List[str] = []
+        text = self._render(data, set(), None, None)
+        if count_tokens(text) <= budget:
+            return text, dropped, False
+        
+        for field in LOW_VALUE_FIELDS:
+            if not self._has_field(data, field):
+                continue
+            dropped.append(field)
+            text = self._render(data, set(dropped), None, None)
+            if count_tokens(text) <= budget:
+                return text, dropped, False
+        
+        for limit in VALUE_LIMITS:
+            text = self._render(data, set(dropped), limit, None)
+            if count_tokens(text) <= budget:
+                return text, dropped, True
+        
+        records = self._record_count(data)
+        for keep in range(records - 1, 0, -1):
+            text = self._render(data, set(dropped), VALUE_LIMITS[-1], keep)
+            if count_tokens(text) <= budget:
+                return text, dropped, True
+        
+        # Still too long: cut the text itself (about four characters per token)
+        return text[:budget * 4].rstrip() + " …", dropped, True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get token totals across packed prompts and the last call's report"""
+        with self._lock:
+            stats = dict(self.stats)
+        
+        stats["tokens_saved"] = max(0, stats["tokens_before"] - stats["tokens_after"])
+        return stats
+    
+    def _render(self, value: Any, dropped: set, limit: Optional[int], max_records: Optional[int], indent: str = "  ") -> str:
+        """Compact text form of a value, one line per record"""
+        if isinstance(value, Mapping):
+            fields = []
+            lists = []
+            for key, item in value.items():
+                if key in dropped or item is None:
+                    continue
+                if isinstance(item, list) and item and all(isinstance(record, Mapping) for record in item):
+                    lists.append((key, item))
+                else:
+                    fields.append(f"{key}: {self._render(item, dropped, limit, max_records, '')}")
+            
+            lines = [indent + "; ".join(fields)] if fields else []
+            for key, records in lists:
+                shown = records[:max_records] if max_records else records
+                lines.append(f"{indent}{key} ({len(records)}):")
+                for record in shown:
+                    lines.append(f"{indent}- " + self._render(record, dropped, limit, max_records, "").strip())
+                if len(shown) < len(records):
+                    lines.append(f"{indent}- … {len(records) - len(shown)} more")
+            return "\n".join(lines) if indent else "; ".join(line.strip() for line in lines)
+        
+        if isinstance(value, list):
+            return ", ".join(self._render(item, dropped, limit, max_records, "") for item in value)
+        
+        text = str(value)
+        if limit is not None and len(text) > limit:
+            text = text[:limit].rstrip() + "…"
+        return text
+    
+    @staticmethod
+    def _has_field(value: Any, field: str) -> bool:
+        """Whether a field occurs in the data or its records"""
+        if isinstance(value, Mapping):
+            return field in value or any(ContextPacker._has_field(item, field) for item in value.values())
+        if isinstance(value, list):
+            return any(ContextPacker._has_field(item, field) for item in value)
+        return False
+    
+    @staticmethod
+    def _record_count(value: Any) -> int:
+        """Length of the longest record list in the data"""
+        if not isinstance(value, Mapping):
+            return 0
+        lengths = [len(item) for item in value.values() if isinstance(item, list)]
+        return max(lengths, default=0)
+    
+    def _record(self, report: Dict[str, Any]):
+        """Add one call's report to the totals"""
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["tokens_before"] += report["tokens_before"]
+            self.stats["tokens_after"] += report["tokens_after"]
+            self.stats["last"] = report
@@ -0,0 +1,201 @@
+"""
+Execution History
+Bounded log of executed steps, kept as compact records
+"""
+
+import json
+import threading
+from collections import deque
+from typing import Dict, Any, IO, Iterator, List, Optional
+from tools.records import Record, json_default, record_type
+
+
+StepRecord = record_type("StepRecord", (
+    "task_id",
+    "step",
+    "tool",
+    "description",
+    "status",
+    "retries",
+    "started_at",
+    "duration_ms",
+    "error"
+))
+
+# Longest description or error text kept per record
+MAX_TEXT = 200
+
+
+class ExecutionHistory:
+    """
+    Ring buffer of the most recent step records
+    
+    Holds at most max_entries records; the oldest are dropped as new steps
+    arrive, so a long-running process uses constant memory. Each record
+    notes the task it belongs to, so summaries can be scoped to one task.
+    When log_path is set, every record is also appended to that file as
+    a JSON line, giving a complete audit trail outside the buffer.
+    """
+    
+    def __init__(self, max_entries: int = 1000, log_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Records kept in memory
+            log_path: Append-only JSON lines file receiving every record (optional)
+        """
+        self.max_entries = max_entries
+        self.log_path = log_path
+        
+        self._records: deque = deque(maxlen=max_entries)
+        self._log: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "recorded": 0,
+            "evicted": 0,
+            "logged": 0
+        }
+    
+    def record(
+        self,
+        task_id: Optional[str],
+        step: Dict[str, Any],
+        step_result: Dict[str, Any],
+        started_at: float,
+        duration: float,
+        retries: int = 0
+    ) -> Record:
+        """
+        Add a finished step
+        
+        Args:
+            task_id: Task the step belongs to (None outside a task scope)
+            step: Step definition from plan
+            step_result: Step execution result
+            started_at: Wall-clock start time (epoch seconds)
+            duration: Step duration in seconds, retries included
+            retries: Attempts made after the first one
+            
+        Returns:
+            The stored record
+        """
+        if not step_result.get("success"):
+            status = "failed"
+        elif isinstance(step_result.get("result"), dict) and step_result["result"].get("type") == "processing":
+            status = "processing"
+        else:
+            status = "success"
+        
+        error = step_result.get("error")
+        entry = StepRecord(
+            task_id,
+            step.get("step_number", "unknown"),
+            step.get("tool"),
+            str(step.get("description", "No description"))[:MAX_TEXT],
+            status,
+            retries,
+            round(started_at, 3),
+            round(duration * 1000, 1),
+            str(error)[:MAX_TEXT] if error else None
+        )
+        
+        with self._lock:
+            if len(self._records) == self.max_entries:
+                self.stats["evicted"] += 1
+            self._records.append(entry)
+            self.stats["recorded"] += 1
+            
+            if self.log_path:
+                self._spill(entry)
+        
+        return entry
+    
+    def for_task(self, task_id: str) -> List[Record]:
+        """
+        Records of one task still in the buffer, oldest first
+        
+        Args:
+            task_id: Task id
+            
+        Returns:
+            Step records
+        """
+        with self._lock:
+            return [entry for entry in self._records if entry["task_id"] == task_id]
+    
+    def recent(self, limit: Optional[int] = None) -> List[Record]:
+        """
+        Most recent records, oldest first
+        
+        Args:
+            limit: Number of records (all buffered records if None)
+            
+        Returns:
+            Step records
+        """
+        with self._lock:
+            records = list(self._records)
+        return records if limit is None else records[-limit:]
+    
+    def summary(self, task_id: Optional[str] = None) -> str:
+        """
+        Human-readable summary of executed steps
+        
+        Args:
+            task_id: Task to summarize (every buffered record if None)
+            
+        Returns:
+            One line per step
+        """
+        records = self.recent() if task_id is None else self.for_task(task_id)
+        if not records:
+            return "No steps executed"
+        
+        lines = ["Execution Summary:"]
+        for entry in records:
+            line = f"- Step {entry['step']}: {entry['description']}"
+            if entry["tool"]:
+                line += f" (using {entry['tool']})"
+            line += f" [{entry['status']}, {entry['duration_ms']}ms"
+            if entry["retries"]:
+                line += f", {entry['retries']} {'retry' if entry['retries'] == 1 else 'retries'}"
+            lines.append(line + "]")
+        
+        return "\n".join(lines) + "\n"
+    
+    def clear(self):
+        """Drop all buffered records (the log file is left untouched)"""
+        with self._lock:
+            self._records.clear()
+    
+    def close(self):
+        """Close the log file"""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get recorded, evicted and logged counts and the buffer fill"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["buffered"] = len(self._records)
+        stats["max_entries"] = self.max_entries
+        return stats
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self.recent())
+    
+    def _spill(self, entry: Record):
+        """Append a record to the log file (caller holds the lock)"""
+        try:
+            if self._log is None:
+                self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+            self._log.write(json.dumps(entry, default=json_default) + "\n")
+            self.stats["logged"] += 1
+        except OSError as e:
+            # Auditing must never break execution; stop spilling after the first failure
+            print(f"Warning: could not write execution log {self.log_path}: {e}")
+            self.log_path = None
@@ -3,21 +3,63 @@ Executor Agent
 Executes steps from the plan and calls appropriate tools
 """
 
-from typing import Dict, Any, List
+import asyncio
+import re
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+from core.deadline import short_of_time
+from core.loop import run_sync
+from core.task import current_task_id
+from core.tracing import span
 from tools import BaseTool
+from tools.base_tool import MIN_CALL_SECONDS
+from tools.circuit_breaker import OPEN
+from tools.retry import RetryBudget, classify, error_type, get_retry_budget
+from .execution_history import ExecutionHistory
+
+
+# Matches references to earlier results such as "step_1" or "{step_2}"
+STEP_REFERENCE = re.compile(r"\bstep_(\d+)\b")
 
 
 class ExecutorAgent:
     """Agent responsible for executing plan steps"""
     
-    def __init__(self, tools: Dict[str, BaseTool]):
+    def __init__(
+        self,
+        tools: Dict[str, BaseTool],
+        parallel: bool = True,
+        max_workers: int = 4,
+        retry_budget: Optional[RetryBudget] = None,
+        history: Optional[ExecutionHistory] = None
+    ):
         self.tools = tools
-        self.execution_history = []
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.retry_budget = retry_budget or get_retry_budget()
+        self.execution_history = history if history is not None else ExecutionHistory()
     
     def execute_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Blocking version of aexecute_plan
+        
+        Args:
+            plan: Execution plan from planner
+            
+        Returns:
+            Dict with execution results
+        """
+        return run_sync(self.aexecute_plan(plan))
+    
+    async def aexecute_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute all steps in the plan
         
+        In parallel mode each step starts as soon as the steps it depends on
+        have finished, with at most max_workers running at once; steps after
+        a critical step wait for it, so when it fails no later step has run.
+        Results are always reported in plan order.
+        
         Args:
             plan: Execution plan from planner
             
@@ -32,36 +74,159 @@ class ExecutorAgent:
                 "results": []
             }
         
-        results = []
-        context = {}  # Store results for later steps
+        if self.parallel and self.max_workers > 1:
+            dependencies = self.resolve_dependencies(steps)
+        else:
+            # Every step waits for all earlier ones, i.e. sequential execution
+            dependencies = [set(range(index)) for index in range(len(steps))]
+        
+        semaphore = asyncio.Semaphore(max(1, self.max_workers))
+        
+        async def run_step(index: int, step_context: Dict[str, Any]):
+            async with semaphore:
+                return index, await self.aexecute_step(steps[index], step_context)
         
-        for step in steps:
-            step_result = self.execute_step(step, context)
-            results.append(step_result)
+        results: List[Any] = [None] * len(steps)
+        finished: Set[int] = set()
+        pending = set(range(len(steps)))
+        running = set()
+        stop_index = len(steps)  # Index of the earliest failed critical step
+        
+        while True:
+            for index in self._ready_steps(pending, dependencies, finished, stop_index):
+                pending.discard(index)
+                step_context = self._context_before(steps, results, index)
+                running.add(asyncio.create_task(run_step(index, step_context)))
             
-            # Store successful results in context
-            if step_result["success"]:
-                step_key = f"step_{step.get('step_number', len(results))}"
-                context[step_key] = step_result["result"]
+            if not running:
+                break
             
-            # If critical step fails, stop execution
-            if not step_result["success"] and step.get("critical", False):
-                return {
-                    "success": False,
-                    "error": f"Critical step {step.get('step_number')} failed",
-                    "results": results,
-                    "partial_context": context
-                }
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, step_result = task.result()
+                results[index] = step_result
+                finished.add(index)
+                
+                # If critical step fails, stop scheduling anything after it
+                if not step_result["success"] and steps[index].get("critical", False):
+                    stop_index = min(stop_index, index)
+        
+        return self._plan_outcome(steps, results, stop_index)
+    
+    @staticmethod
+    def _ready_steps(pending: Set[int], dependencies: List[Set[int]], finished: Set[int], stop_index: int) -> List[int]:
+        """Pending steps before stop_index whose dependencies have all finished"""
+        return [
+            index for index in sorted(pending)
+            if index < stop_index and dependencies[index] <= finished
+        ]
+    
+    def _plan_outcome(self, steps: List[Dict[str, Any]], results: List[Any], stop_index: int) -> Dict[str, Any]:
+        """
+        Assemble the plan result from per-step results in plan order
+        
+        Args:
+            steps: Plan steps
+            results: Step results indexed by plan position
+            stop_index: Index of the earliest failed critical step, or len(steps)
+            
+        Returns:
+            Dict with execution results
+        """
+        if stop_index < len(steps):
+            return {
+                "success": False,
+                "error": f"Critical step {steps[stop_index].get('step_number')} failed",
+                "results": results[:stop_index + 1],
+                "partial_context": self._context_before(steps, results, stop_index)
+            }
         
         return {
             "success": True,
             "results": results,
-            "context": context
+            "context": self._context_before(steps, results, len(steps))
         }
     
+    def resolve_dependencies(self, steps: List[Dict[str, Any]]) -> List[Set[int]]:
+        """
+        Work out which earlier steps each step depends on
+        
+        Explicit "depends_on" lists (step numbers or "step_N" keys) win. Otherwise
+        tool steps depend on any "step_N" they reference in their parameters, and
+        processing steps (no tool) depend on every step before them. Every step
+        after a critical step also depends on it, so nothing later runs until
+        the critical step has succeeded.
+        
+        Args:
+            steps: Plan steps
+            
+        Returns:
+            List of dependency index sets, one per step
+        """
+        positions = {}
+        for index, step in enumerate(steps):
+            positions[str(step.get("step_number", index + 1))] = index
+        
+        dependencies = []
+        barrier = None  # Index of the latest critical step
+        for index, step in enumerate(steps):
+            declared = step.get("depends_on")
+            
+            if isinstance(declared, list):
+                references = [STEP_REFERENCE.sub(r"\1", str(ref)) for ref in declared]
+            elif self._is_processing_step(step):
+                references = None
+            else:
+                references = STEP_REFERENCE.findall(str(step.get("parameters", {})))
+            
+            if references is None:
+                depends = set(range(index))
+            else:
+                depends = {positions[ref] for ref in references if ref in positions}
+                depends = {dep for dep in depends if dep < index}
+            
+            if barrier is not None:
+                depends.add(barrier)
+            if step.get("critical", False):
+                barrier = index
+            
+            dependencies.append(depends)
+        
+        return dependencies
+    
+    def _context_before(self, steps: List[Dict[str, Any]], results: List[Any], index: int) -> Dict[str, Any]:
+        """Build the context of successful results from steps before index"""
+        context = {}
+        for position in range(index):
+            step_result = results[position]
+            if step_result and step_result["success"]:
+                step_key = f"step_{steps[position].get('step_number', position + 1)}"
+                context[step_key] = step_result["result"]
+        
+        return context
+    
+    @staticmethod
+    def _is_processing_step(step: Dict[str, Any]) -> bool:
+        """Check whether a step runs without a tool"""
+        tool_name = step.get("tool")
+        return not tool_name or tool_name == "null" or tool_name == "none"
+    
     def execute_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Execute a single step
+        Blocking version of aexecute_step
+        
+        Args:
+            step: Step definition from plan
+            context: Results from previous steps
+            
+        Returns:
+            Dict with step execution result
+        """
+        return run_sync(self.aexecute_step(step, context))
+    
+    async def aexecute_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a single step and add it to the execution history
         
         Args:
             step: Step definition from plan
@@ -70,20 +235,81 @@ class ExecutorAgent:
         Returns:
             Dict with step execution result
         """
+        started_at, started = time.time(), time.perf_counter()
+        with span("step", target=step.get("tool"), step=step.get("step_number")) as trace:
+            step_result, retries = await self._arun_step(step, context)
+            trace.set(success=step_result["success"], retries=retries)
+        self._record_step(step, step_result, started_at, started, retries)
+        return step_result
+    
+    def _record_step(self, step: Dict[str, Any], step_result: Dict[str, Any], started_at: float, started: float, retries: int):
+        """Add a finished step to the execution history under the current task"""
+        self.execution_history.record(
+            current_task_id(),
+            step,
+            step_result,
+            started_at,
+            time.perf_counter() - started,
+            retries
+        )
+    
+    async def _arun_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """
+        Run a step, retrying transient tool failures
+        
+        Args:
+            step: Step definition from plan
+            context: Results from previous steps
+            
+        Returns:
+            Step result and the number of retries made
+        """
+        early_result = self._prepare_step(step, context)
+        if early_result is not None:
+            return early_result, 0
+        
+        tool = self.tools[step.get("tool")]
+        parameters = step.get("parameters", {})
+        
+        # Execute tool, retrying transient failures per the tool's policy
+        self.retry_budget.record_request()
+        attempt = 0
+        
+        while True:
+            with span("tool_call", target=tool.name, attempt=attempt + 1) as trace:
+                try:
+                    tool_result = await tool.arun(fields=step.get("fields"), **parameters)
+                except Exception as e:
+                    tool_result = {"success": False, "error": str(e), "error_type": error_type(e)}
+                trace.set(**self._call_details(tool_result))
+            
+            if tool_result.get("success"):
+                return self._step_success(step, tool_result), attempt
+            
+            attempt += 1
+            delay = self._retry_delay(tool, tool_result, attempt)
+            if delay is None:
+                return self._step_failure(step, tool_result.get("error", "Unknown error"), tool_result.get("circuit_open", False)), attempt - 1
+            with span("retry_backoff", target=tool.name, delay=round(delay, 3)):
+                await asyncio.sleep(delay)
+    
+    def _prepare_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a step without a tool call where possible
+        
+        Args:
+            step: Step definition from plan
+            context: Results from previous steps
+            
+        Returns:
+            Step result for processing steps and unknown tools, otherwise None
+        """
         step_number = step.get("step_number", "unknown")
         description = step.get("description", "No description")
         tool_name = step.get("tool")
-        parameters = step.get("parameters", {})
-        
-        # Log step execution
-        self.execution_history.append({
-            "step": step_number,
-            "description": description,
-            "tool": tool_name
-        })
         
         # If no tool needed, it's a processing step
-        if not tool_name or tool_name == "null" or tool_name == "none":
+        if self._is_processing_step(step):
             return {
                 "success": True,
                 "step_number": step_number,
@@ -105,52 +331,76 @@ class ExecutorAgent:
                 "result": None
             }
         
-        # Execute tool with retry logic
-        max_retries = 2
-        last_error = None
+        return None
+    
+    def _retry_delay(self, tool: BaseTool, tool_result: Dict[str, Any], attempt: int) -> Optional[float]:
+        """
+        Decide whether to retry a failed tool call
+        
+        Args:
+            tool: Tool that was called
+            tool_result: Failed result (exceptions are converted to one)
+            attempt: Number of attempts made so far
+            
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        delay = tool.retry_policy.delay(classify(tool_result), attempt, tool_result.get("retry_after"))
+        if delay is None:
+            return None
         
-        for attempt in range(max_retries):
-            try:
-                tool = self.tools[tool_name]
-                tool_result = tool.execute(**parameters)
-                
-                if tool_result.get("success"):
-                    return {
-                        "success": True,
-                        "step_number": step_number,
-                        "description": description,
-                        "tool": tool_name,
-                        "result": tool_result.get("data")
-                    }
-                else:
-                    last_error = tool_result.get("error", "Unknown error")
-                    
-                    # Don't retry on certain errors
-                    if "not configured" in last_error.lower() or "not found" in last_error.lower():
-                        break
-            
-            except Exception as e:
-                last_error = str(e)
+        # The failures so far may have opened the circuit; the next attempt would fail fast anyway
+        if tool.breaker.state == OPEN:
+            return None
         
+        if short_of_time(delay + MIN_CALL_SECONDS, "execution", f"skipped retry of {tool.name}"):
+            return None
+        
+        if not self.retry_budget.try_spend():
+            return None
+        return delay
+    
+    @staticmethod
+    def _call_details(tool_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Span attributes describing one tool call's outcome"""
+        details = {"success": bool(tool_result.get("success"))}
+        for key in ("status_code", "error_type", "cached", "coalesced", "circuit_open", "deadline_exceeded"):
+            if tool_result.get(key) is not None:
+                details[key] = tool_result[key]
+        return details
+    
+    @staticmethod
+    def _step_success(step: Dict[str, Any], tool_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result of a successful tool step"""
+        return {
+            "success": True,
+            "step_number": step.get("step_number", "unknown"),
+            "description": step.get("description", "No description"),
+            "tool": step.get("tool"),
+            "result": tool_result.get("data")
+        }
+    
+    @staticmethod
+    def _step_failure(step: Dict[str, Any], error: Optional[str], circuit_open: bool = False) -> Dict[str, Any]:
+        """Build the result of a failed tool step (circuit_open: failed fast without calling the upstream)"""
         return {
             "success": False,
-            "step_number": step_number,
-            "description": description,
-            "tool": tool_name,
-            "error": last_error,
-            "result": None
+            "step_number": step.get("step_number", "unknown"),
+            "description": step.get("description", "No description"),
+            "tool": step.get("tool"),
+            "error": error,
+            "result": None,
+            "circuit_open": circuit_open
         }
     
-    def get_execution_summary(self) -> str:
-        """Get summary of execution history"""
-        if not self.execution_history:
-            return "No steps executed"
-        
-        summary = "Execution Summary:\n"
-        for entry in self.execution_history:
-            summary += f"- Step {entry['step']}: {entry['description']}"
-            if entry['tool']:
-                summary += f" (using {entry['tool']})"
-            summary += "\n"
+    def get_execution_summary(self, task_id: Optional[str] = None) -> str:
+        """
+        Get summary of execution history
         
-        return summary
+        Args:
+            task_id: Task to summarize (every step still in the history if None)
+            
+        Returns:
+            One line per executed step with its status and timing
+        """
+        return self.execution_history.summary(task_id)
@@ -0,0 +1,199 @@
+"""
+Intent Matcher
+Builds plans for recognizable tasks locally, without an LLM call
+"""
+
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+
+# Words that never stand on their own as a city, query, or other entity
+STOPWORDS = {
+    "the", "a", "an", "me", "my", "some", "any", "current", "latest", "top",
+    "today", "today's", "recent", "now", "best", "popular", "news", "weather",
+    "headlines", "and", "of", "in", "on", "for", "about", "what", "is"
+}
+
+# Question words, auxiliaries and common verbs; a value containing one is part
+# of a sentence ("write a poem about the weather"), not an entity
+NON_ENTITY_WORDS = {
+    "how", "what", "why", "when", "where", "which", "who", "whom", "whose",
+    "is", "are", "was", "were", "be", "do", "does", "did", "dont", "don't",
+    "not", "no", "never", "can", "could", "should", "would", "will", "write",
+    "tell", "summarize", "summarise", "explain", "describe", "compare", "show",
+    "find", "get", "give", "make", "create", "send", "email", "translate",
+    "list", "search", "fetch", "check", "read", "think", "know", "say"
+}
+
+# Longer free-text values are more likely a whole sentence than an entity
+MAX_ENTITY_WORDS = 5
+
+# Polite or filler openings removed before matching; imperative verbs (find,
+# show, ...) are kept so tool patterns can anchor on them
+LEADING_PHRASES = (
+    "please ", "can you ", "could you ", "would you ", "tell me ", "give me ",
+    "what's ", "whats ", "what is ", "how's ", "how is ", "i want ", "i need ",
+    "also "
+)
+
+# Separators between independent requests in one task
+CLAUSE_SEPARATOR = re.compile(r"\s*(?:,|;|&|\band then\b|\band also\b|\bthen\b|\band\b|\bplus\b)\s*", re.IGNORECASE)
+
+
+class IntentMatcher:
+    """
+    Rule-based planner front end
+    
+    Patterns come from each tool's get_tool_info() "intent_patterns", with
+    named groups validated against the tool's declared "parameters". A task
+    is split into clauses and a plan is only produced when every clause fully
+    matches exactly one tool pattern; anything else is left to the LLM.
+    """
+    
+    def __init__(self, available_tools: List[Dict[str, Any]]):
+        """
+        Args:
+            available_tools: Tool info dicts from BaseTool.get_tool_info()
+        """
+        self._rules = []
+        for tool in available_tools:
+            declared = tool.get("parameters") or {}
+            for pattern in tool.get("intent_patterns") or []:
+                compiled = re.compile(pattern, re.IGNORECASE)
+                # Ignore patterns that would produce undeclared parameters
+                if set(compiled.groupindex) <= set(declared):
+                    self._rules.append((tool["name"], compiled, declared))
+        
+        self._lock = threading.Lock()
+        self.stats = {
+            "matched": 0,
+            "unmatched": 0
+        }
+    
+    def match(self, user_task: str) -> Optional[Dict[str, Any]]:
+        """
+        Build a plan for the task if every part of it is recognized
+        
+        Args:
+            user_task: Natural language task description
+            
+        Returns:
+            Plan in the planner's JSON shape, or None to fall back to the LLM
+        """
+        steps = []
+        clauses = [c for c in CLAUSE_SEPARATOR.split(user_task.strip()) if c and c.strip()]
+        
+        for clause in clauses:
+            step = self._match_clause(self._normalize(clause))
+            if step is None:
+                self._record(False)
+                return None
+            if step not in steps:
+                steps.append(step)
+        
+        if not steps:
+            self._record(False)
+            return None
+        
+        for number, step in enumerate(steps, start=1):
+            step["step_number"] = number
+        
+        self._record(True)
+        return {
+            "task_understanding": user_task.strip(),
+            "steps": steps,
+            "expected_output": "Results from " + ", ".join(step["tool"] for step in steps)
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get match counters and the fast-path hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+        
+        total = stats["matched"] + stats["unmatched"]
+        stats["hit_rate"] = round(stats["matched"] / total, 3) if total else 0.0
+        return stats
+    
+    def _match_clause(self, clause: str) -> Optional[Dict[str, Any]]:
+        """Match one clause against the tool patterns"""
+        candidates = []
+        for tool_name, pattern, declared in self._rules:
+            match = pattern.fullmatch(clause)
+            if match is None:
+                continue
+            
+            parameters = self._extract_parameters(match, declared)
+            if parameters is not None:
+                candidates.append((tool_name, parameters))
+        
+        # Ambiguous clauses (several tools match) are not confident enough
+        tools = {tool_name for tool_name, _ in candidates}
+        if len(tools) != 1:
+            return None
+        
+        tool_name, parameters = candidates[0]
+        summary = ", ".join(f"{key}={value}" for key, value in parameters.items())
+        return {
+            "step_number": 0,
+            "description": f"Call {tool_name} ({summary})",
+            "tool": tool_name,
+            "parameters": parameters,
+            "depends_on": []
+        }
+    
+    def _extract_parameters(self, match: "re.Match", declared: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Convert matched groups into typed tool parameters"""
+        parameters = {}
+        for name, value in match.groupdict().items():
+            if value is None:
+                continue
+            
+            value = value.strip()
+            spec = declared.get(name, {})
+            
+            if spec.get("type") == "integer":
+                try:
+                    parameters[name] = int(value)
+                except ValueError:
+                    return None
+                continue
+            
+            words = value.lower().split()
+            if not words or all(word in STOPWORDS for word in words):
+                return None
+            if len(words) > MAX_ENTITY_WORDS:
+                return None
+            # Entities neither contain verbs or question words nor start or end with filler ("about the")
+            if any(word in NON_ENTITY_WORDS for word in words):
+                return None
+            if words[0] in STOPWORDS or words[-1] in STOPWORDS:
+                return None
+            parameters[name] = value
+        
+        # Every declared parameter without a default must have been extracted
+        for name, spec in declared.items():
+            if "default" not in spec and name not in parameters:
+                return None
+        
+        return parameters
+    
+    @staticmethod
+    def _normalize(clause: str) -> str:
+        """Strip filler words and punctuation around a clause"""
+        clause = " ".join(clause.split()).strip(" ?.!")
+        changed = True
+        while changed:
+            changed = False
+            for phrase in LEADING_PHRASES:
+                if clause.lower().startswith(phrase):
+                    clause = clause[len(phrase):].strip()
+                    changed = True
+        if clause.lower().endswith(" please"):
+            clause = clause[:-len(" please")]
+        return clause
+    
+    def _record(self, matched: bool):
+        """Count a fast-path hit or miss"""
+        with self._lock:
+            self.stats["matched" if matched else "unmatched"] += 1
@@ -0,0 +1,317 @@
+"""
+Plan Template Cache
+Reuses successful plans for tasks that differ only in their entities
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from .intent_matcher import STOPWORDS
+
+
+# Marker used inside cached plan text where an entity was lifted out
+SLOT = "⟦{}⟧"
+SLOT_PATTERN = re.compile("⟦(\\d+)⟧")
+
+# Shorter values are too likely to be ordinary words ("us", "go", "it")
+MIN_ENTITY_LENGTH = 3
+
+# Words that are never an entity even when a plan uses them as one
+PRONOUNS = {
+    "i", "me", "my", "we", "us", "our", "you", "your", "it", "its", "they",
+    "them", "their", "he", "him", "his", "she", "her", "this", "that", "there", "here"
+}
+
+# Words an entity may follow in the task ("weather in Tokyo", "news about AI")
+ENTITY_LEADERS = {
+    "in", "for", "about", "on", "to", "at", "near", "of", "from", "and", "or",
+    "vs", "versus", "like", "with", "between"
+}
+
+
+class PlanTemplateCache:
+    """
+    Bounded LRU cache of parameterized plans
+    
+    When a plan succeeds, values of entity parameters (declared with
+    "entity": True, such as cities and queries) that appear verbatim in the
+    task are lifted out into numbered slots, both in the task text and in the
+    plan. The task text with slots becomes a pattern; a new task matching that
+    pattern gets the plan back with its own entities filled in. A plan whose
+    entity shows up more than once in the task, or away from where an entity
+    would stand, is not templated. All templates are dropped when the tool set
+    changes.
+    """
+    
+    def __init__(self, max_templates: int = 128):
+        """
+        Args:
+            max_templates: Maximum number of cached templates
+        """
+        self.max_templates = max_templates
+        self.tool_fingerprint: Optional[str] = None
+        self.entity_parameters: Dict[str, set] = {}
+        
+        self._templates: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "skipped": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+    
+    @staticmethod
+    def fingerprint(available_tools: List[Dict[str, Any]]) -> str:
+        """
+        Identify a tool set by tool names and declared parameters
+        
+        Args:
+            available_tools: Tool info dicts from BaseTool.get_tool_info()
+            
+        Returns:
+            Hex digest of the tool set
+        """
+        summary = sorted(
+            (
+                tool["name"],
+                sorted(
+                    (name, bool(spec.get("entity")))
+                    for name, spec in (tool.get("parameters") or {}).items()
+                )
+            )
+            for tool in available_tools
+        )
+        return hashlib.sha256(json.dumps(summary).encode("utf-8")).hexdigest()
+    
+    def bind_tools(self, available_tools: List[Dict[str, Any]]):
+        """
+        Attach the cache to a tool set, dropping templates built for another one
+        
+        Args:
+            available_tools: Tool info dicts from BaseTool.get_tool_info()
+        """
+        fingerprint = self.fingerprint(available_tools)
+        with self._lock:
+            if self.tool_fingerprint is not None and fingerprint != self.tool_fingerprint:
+                self._templates.clear()
+                self.stats["invalidations"] += 1
+            self.tool_fingerprint = fingerprint
+            self.entity_parameters = {
+                tool["name"]: {
+                    name for name, spec in (tool.get("parameters") or {}).items()
+                    if spec.get("entity")
+                }
+                for tool in available_tools
+            }
+    
+    def lookup(self, user_task: str) -> Optional[Dict[str, Any]]:
+        """
+        Instantiate a cached plan for a task with a known shape
+        
+        Args:
+            user_task: Natural language task description
+            
+        Returns:
+            Plan with the task's entities filled in, or None on a miss
+        """
+        task = self._normalize(user_task)
+        
+        with self._lock:
+            for shape, template in reversed(self._templates.items()):
+                match = template["pattern"].fullmatch(task)
+                if match is None:
+                    continue
+                
+                entities = self._convert_entities(match, template["slot_types"])
+                if entities is None:
+                    continue
+                
+                self._templates.move_to_end(shape)
+                self.stats["hits"] += 1
+                return self._instantiate(template["plan"], entities)
+            
+            self.stats["misses"] += 1
+            return None
+    
+    def store(self, user_task: str, plan: Dict[str, Any]):
+        """
+        Remember a successful plan as a template
+        
+        Args:
+            user_task: Task the plan was created for
+            plan: Plan that executed and verified successfully
+        """
+        task = self._normalize(user_task)
+        entities = self._entities(plan, task, self.entity_parameters)
+        if entities is None:
+            with self._lock:
+                self.stats["skipped"] += 1
+            return
+        
+        # Entities are sorted longest first so they win over their own substrings
+        shape = task
+        for index, (value, _) in enumerate(entities):
+            shape = self._needle(value).sub(SLOT.format(index), shape)
+        
+        slot_types = [kind for _, kind in entities]
+        template_plan = self._lift(plan, entities)
+        pattern = self._shape_pattern(shape, slot_types)
+        
+        with self._lock:
+            self._templates[shape] = {
+                "pattern": pattern,
+                "slot_types": slot_types,
+                "plan": template_plan
+            }
+            self._templates.move_to_end(shape)
+            self.stats["stored"] += 1
+            
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+                self.stats["evictions"] += 1
+    
+    def clear(self):
+        """Drop all templates"""
+        with self._lock:
+            self._templates.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters and the current hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._templates)
+        
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+    
+    @staticmethod
+    def _normalize(user_task: str) -> str:
+        """Collapse whitespace and trailing punctuation"""
+        return " ".join(user_task.split()).strip(" ?.!")
+    
+    @staticmethod
+    def _entities(plan: Dict[str, Any], task: str, entity_parameters: Dict[str, set]) -> Optional[List[tuple]]:
+        """
+        Entity parameter values of the plan that occur in the task text
+        
+        Args:
+            plan: Plan to take parameter values from
+            task: Normalized task text
+            entity_parameters: Tool name -> names of its entity parameters
+            
+        Returns:
+            (value, kind) pairs longest first, or None if the plan should not be templated
+        """
+        found = {}
+        for step in plan.get("steps", []):
+            declared = entity_parameters.get(step.get("tool"), set())
+            for name, value in (step.get("parameters") or {}).items():
+                if name not in declared or not isinstance(value, str):
+                    continue
+                
+                text = " ".join(value.split())
+                if len(text) < MIN_ENTITY_LENGTH or text.lower() in STOPWORDS | PRONOUNS:
+                    continue
+                
+                occurrences = list(PlanTemplateCache._needle(text).finditer(task))
+                if not occurrences:
+                    continue
+                
+                # An ambiguous or misplaced value would make the pattern match the wrong words
+                if len(occurrences) > 1 or not PlanTemplateCache._entity_position(task, occurrences[0]):
+                    return None
+                
+                found[text.lower()] = (text, "str")
+        
+        return sorted(found.values(), key=lambda entity: len(entity[0]), reverse=True)
+    
+    @staticmethod
+    def _entity_position(task: str, occurrence: "re.Match") -> bool:
+        """Whether a value stands where an entity would: after a clause break or a leading word"""
+        before = task[:occurrence.start()].rstrip()
+        if not before or before[-1] in ",;:&(\"'":
+            return True
+        
+        previous = re.split(r"\W+", before)[-1].lower()
+        return previous in ENTITY_LEADERS
+    
+    @staticmethod
+    def _needle(value: str) -> "re.Pattern":
+        """Whole-word, case-insensitive pattern for an entity"""
+        return re.compile(r"(?<![\w⟦])" + re.escape(value) + r"(?![\w⟧])", re.IGNORECASE)
+    
+    @staticmethod
+    def _lift(plan: Dict[str, Any], entities: List[tuple]) -> Dict[str, Any]:
+        """Replace entities in a plan with slot markers"""
+        needles = [
+            (PlanTemplateCache._needle(value), SLOT.format(index))
+            for index, (value, _) in enumerate(entities)
+        ]
+        def lift(value: Any, key: Optional[str] = None) -> Any:
+            if isinstance(value, dict):
+                return {k: lift(v, k) for k, v in value.items()}
+            if isinstance(value, list):
+                return [lift(item, key) for item in value]
+            if key in ("tool", "step_number", "depends_on"):
+                return value
+            if isinstance(value, str):
+                for needle, slot in needles:
+                    value = needle.sub(slot, value)
+            return value
+        
+        return lift(plan)
+    
+    @staticmethod
+    def _shape_pattern(shape: str, slot_types: List[str]) -> "re.Pattern":
+        """Compile a task shape into a regex with one group per slot"""
+        parts = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(shape):
+            parts.append(re.escape(shape[position:match.start()]))
+            index = int(match.group(1))
+            capture = r"\d+" if slot_types[index] == "int" else r"[^,;&]+?"
+            parts.append(f"(?P<slot{index}_{len(parts)}>{capture})")
+            position = match.end()
+        parts.append(re.escape(shape[position:]))
+        return re.compile("".join(parts), re.IGNORECASE)
+    
+    @staticmethod
+    def _convert_entities(match: "re.Match", slot_types: List[str]) -> Optional[Dict[int, Any]]:
+        """Map captured groups back to typed slot values"""
+        entities: Dict[int, Any] = {}
+        for name, value in match.groupdict().items():
+            index = int(name[len("slot"):].split("_")[0])
+            value = value.strip()
+            converted = int(value) if slot_types[index] == "int" else value
+            
+            # The same slot captured twice must hold the same entity
+            if index in entities and str(entities[index]).lower() != str(converted).lower():
+                return None
+            entities[index] = converted
+        
+        return entities
+    
+    @staticmethod
+    def _instantiate(template_plan: Dict[str, Any], entities: Dict[int, Any]) -> Dict[str, Any]:
+        """Fill slots of a template plan with concrete entities"""
+        def fill(value: Any) -> Any:
+            if isinstance(value, str):
+                whole = SLOT_PATTERN.fullmatch(value)
+                if whole is not None:
+                    return entities[int(whole.group(1))]
+                return SLOT_PATTERN.sub(lambda m: str(entities[int(m.group(1))]), value)
+            if isinstance(value, list):
+                return [fill(item) for item in value]
+            if isinstance(value, dict):
+                return {key: fill(item) for key, item in value.items()}
+            return value
+        
+        return fill(template_plan)
@@ -3,18 +3,53 @@ Planner Agent
 Converts user input into structured execution plan with steps and tools
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from core.loop import run_sync
 from llm import LLMProvider
+from .intent_matcher import IntentMatcher
+from .plan_cache import PlanTemplateCache
+from .schemas import plan_schema
 
 
 class PlannerAgent:
     """Agent responsible for planning task execution"""
     
-    def __init__(self, llm_provider: LLMProvider, available_tools: List[Dict[str, str]]):
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        available_tools: List[Dict[str, Any]],
+        fast_path: bool = True,
+        plan_cache: Optional[PlanTemplateCache] = None,
+        use_plan_cache: bool = True
+    ):
         self.llm = llm_provider
         self.available_tools = available_tools
+        
+        # Schema for structured (function-calling / JSON mode) plan output
+        self.plan_schema = plan_schema([tool["name"] for tool in available_tools])
+        
+        # Local matcher that plans recognizable tasks without an LLM call
+        self.intent_matcher: Optional[IntentMatcher] = IntentMatcher(available_tools) if fast_path else None
+        
+        # Templates of earlier successful LLM plans, reused for same-shaped tasks
+        self.plan_cache: Optional[PlanTemplateCache] = None
+        if use_plan_cache:
+            self.plan_cache = plan_cache if plan_cache is not None else PlanTemplateCache()
+            self.plan_cache.bind_tools(available_tools)
     
     def create_plan(self, user_task: str) -> Dict[str, Any]:
+        """
+        Blocking version of acreate_plan
+        
+        Args:
+            user_task: Natural language task description
+            
+        Returns:
+            Dict with plan containing steps and required tools
+        """
+        return run_sync(self.acreate_plan(user_task))
+    
+    async def acreate_plan(self, user_task: str) -> Dict[str, Any]:
         """
         Create execution plan from user task
         
@@ -24,9 +59,109 @@ class PlannerAgent:
         Returns:
             Dict with plan containing steps and required tools
         """
+        local_plan = self._fast_path_plan(user_task) or self._template_plan(user_task)
+        if local_plan is not None:
+            return local_plan
+        
+        system_prompt, user_prompt = self._build_plan_prompts(user_task)
+        
+        try:
+            plan = await self.llm.agenerate_json_completion(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=0.3,
+                schema=self.plan_schema,
+                schema_name="create_plan"
+            )
+            
+            return self._validate_plan(plan)
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Planning failed: {str(e)}",
+                "plan": None
+            }
+    
+    def _fast_path_plan(self, user_task: str) -> Optional[Dict[str, Any]]:
+        """
+        Plan the task locally when the intent matcher recognizes it
+        
+        Args:
+            user_task: Natural language task description
+            
+        Returns:
+            Plan result, or None if the LLM planner is needed
+        """
+        if self.intent_matcher is None:
+            return None
+        
+        plan = self.intent_matcher.match(user_task)
+        if plan is None:
+            return None
+        
+        return {
+            "success": True,
+            "plan": plan,
+            "source": "fast_path"
+        }
+    
+    def _template_plan(self, user_task: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-instantiate a cached plan when the task has a known shape
+        
+        Args:
+            user_task: Natural language task description
+            
+        Returns:
+            Plan result, or None if the LLM planner is needed
+        """
+        if self.plan_cache is None:
+            return None
         
+        plan = self.plan_cache.lookup(user_task)
+        if plan is None:
+            return None
+        
+        return {
+            "success": True,
+            "plan": plan,
+            "source": "template"
+        }
+    
+    def remember_plan(self, user_task: str, plan_result: Dict[str, Any]):
+        """
+        Keep a plan that executed and verified successfully as a template
+        
+        Args:
+            user_task: Task the plan was created for
+            plan_result: Result of create_plan/acreate_plan
+        """
+        # Only LLM plans are worth templating; local plans are already free
+        if self.plan_cache is None or plan_result.get("source") != "llm":
+            return
+        
+        self.plan_cache.store(user_task, plan_result["plan"])
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get planning counters, including fast-path and template hit rates"""
+        return {
+            "fast_path": self.intent_matcher.get_stats() if self.intent_matcher else None,
+            "templates": self.plan_cache.get_stats() if self.plan_cache else None
+        }
+    
+    def _build_plan_prompts(self, user_task: str) -> Tuple[str, str]:
+        """
+        Build system and user prompts for planning
+        
+        Args:
+            user_task: Natural language task description
+            
+        Returns:
+            Tuple of (system_prompt, user_prompt)
+        """
         tools_description = "\n".join([
-            f"- {tool['name']}: {tool['description']}" 
+            f"- {tool['name']}: {tool['description']}" + self._describe_parameters(tool)
             for tool in self.available_tools
         ])
         
@@ -46,11 +181,19 @@ Respond ONLY with a valid JSON object following this exact schema:
             "step_number": 1,
             "description": "What this step does",
             "tool": "tool_name or null",
-            "parameters": {}
+            "parameters": {},
+            "depends_on": [],
+            "fields": []
         }
     ],
     "expected_output": "What the final result should contain"
-}"""
+}
+
+List in "depends_on" the step_numbers whose results a step needs. Steps that
+do not depend on each other are executed at the same time.
+
+List in "fields" the output fields a tool step's results need for the task
+(e.g. ["name", "stars"]); leave it empty to keep every field."""
 
         user_prompt = f"""User Task: {user_task}
 
@@ -64,31 +207,54 @@ Create a detailed execution plan with numbered steps. Each step should either:
 
 Remember to respond with ONLY valid JSON."""
 
-        try:
-            plan = self.llm.generate_json_completion(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
-                temperature=0.3
-            )
-            
-            # Validate plan structure
-            if not isinstance(plan, dict) or "steps" not in plan:
-                raise ValueError("Invalid plan structure")
+        return system_prompt, user_prompt
+    
+    @staticmethod
+    def _describe_parameters(tool: Dict[str, Any]) -> str:
+        """Describe a tool's declared parameters for the planning prompt"""
+        parameters = tool.get("parameters") or {}
+        if not parameters:
+            return ""
+        
+        described = []
+        for name, spec in parameters.items():
+            detail = spec.get("type", "any")
+            if "default" in spec:
+                detail += f", default {spec['default']}"
+            else:
+                detail += ", required"
+            described.append(f"{name} ({detail})")
+        
+        text = "\n  Parameters: " + "; ".join(described)
+        record_fields = (tool.get("output_schema") or {}).get("record_fields")
+        if record_fields:
+            text += "\n  Output fields: " + ", ".join(record_fields)
+        return text
+    
+    def _validate_plan(self, plan: Any) -> Dict[str, Any]:
+        """
+        Validate plan structure returned by the LLM
+        
+        Args:
+            plan: Parsed LLM response
             
-            if not isinstance(plan["steps"], list) or len(plan["steps"]) == 0:
-                raise ValueError("Plan must contain at least one step")
+        Returns:
+            Dict with plan on success
             
-            return {
-                "success": True,
-                "plan": plan
-            }
+        Raises:
+            ValueError: If the plan structure is invalid
+        """
+        if not isinstance(plan, dict) or "steps" not in plan:
+            raise ValueError("Invalid plan structure")
         
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Planning failed: {str(e)}",
-                "plan": None
-            }
+        if not isinstance(plan["steps"], list) or len(plan["steps"]) == 0:
+            raise ValueError("Plan must contain at least one step")
+        
+        return {
+            "success": True,
+            "plan": plan,
+            "source": "llm"
+        }
     
     def refine_plan(self, original_plan: Dict[str, Any], feedback: str) -> Dict[str, Any]:
         """
@@ -117,7 +283,9 @@ Create an improved plan that addresses the feedback."""
             refined_plan = self.llm.generate_json_completion(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
-                temperature=0.3
+                temperature=0.3,
+                schema=self.plan_schema,
+                schema_name="create_plan"
             )
             
             return {
@@ -0,0 +1,61 @@
+"""
+Agent Schemas
+JSON schemas for structured planner and verifier output
+"""
+
+from typing import Dict, Any, List
+
+
+def plan_schema(tool_names: List[str]) -> Dict[str, Any]:
+    """
+    Schema of an execution plan
+    
+    Args:
+        tool_names: Names of the available tools (null means a processing step)
+        
+    Returns:
+        JSON schema for the planner's response
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "task_understanding": {
+                "type": "string",
+                "description": "Brief summary of what the user wants"
+            },
+            "steps": {
+                "type": "array",
+                "minItems": 1,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "step_number": {"type": "integer"},
+                        "description": {"type": "string"},
+                        "tool": {"type": ["string", "null"], "enum": list(tool_names) + [None]},
+                        "parameters": {"type": "object"},
+                        "depends_on": {"type": "array", "items": {"type": "integer"}},
+                        "fields": {"type": "array", "items": {"type": "string"}}
+                    },
+                    "required": ["step_number", "description", "tool", "parameters"]
+                }
+            },
+            "expected_output": {
+                "type": "string",
+                "description": "What the final result should contain"
+            }
+        },
+        "required": ["task_understanding", "steps", "expected_output"]
+    }
+
+
+VERDICT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "verified": {"type": "boolean"},
+        "completeness_score": {"type": "integer", "minimum": 0, "maximum": 100},
+        "issues": {"type": "array", "items": {"type": "string"}},
+        "missing_data": {"type": "array", "items": {"type": "string"}},
+        "needs_retry": {"type": "boolean"}
+    },
+    "required": ["verified", "completeness_score", "issues", "missing_data", "needs_retry"]
+}
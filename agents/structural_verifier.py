@@ -0,0 +1,152 @@
+"""
+Structural Verifier
+Checks tool results against each tool's declared output schema
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Outcomes of checking a single step
+PASSED = "passed"
+FAILED = "failed"
+INCONCLUSIVE = "inconclusive"
+
+
+class StructuralVerifier:
+    """
+    Deterministic verifier front end
+    
+    Schemas come from each tool's get_tool_info() "output_schema". A verdict
+    is only produced when every tool step is conclusively checked: all steps
+    passing verifies the results, any malformed result rejects them. Empty or
+    short result lists and tools without a schema are inconclusive and left
+    to the LLM verifier.
+    """
+    
+    def __init__(self, available_tools: List[Dict[str, Any]]):
+        """
+        Args:
+            available_tools: Tool info dicts from BaseTool.get_tool_info()
+        """
+        self._schemas = {
+            tool["name"]: (tool.get("output_schema") or {}, tool.get("parameters") or {})
+            for tool in available_tools
+        }
+    
+    def check(self, plan: Dict[str, Any], results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Verify successful step results without an LLM call
+        
+        Args:
+            plan: Original execution plan
+            results: Execution results (all successful)
+            
+        Returns:
+            Verification verdict, or None if the LLM verifier is needed
+        """
+        steps = {step.get("step_number"): step for step in plan.get("steps", [])}
+        
+        passed = 0
+        checked = 0
+        issues = []
+        missing_data = []
+        inconclusive = False
+        
+        for result in results:
+            tool_name = result.get("tool")
+            if not tool_name:
+                # Processing steps only gather earlier results
+                continue
+            
+            step = steps.get(result.get("step_number"), {})
+            outcome, problems = self._check_step(tool_name, step.get("parameters") or {}, result.get("result"))
+            checked += 1
+            
+            if outcome == PASSED:
+                passed += 1
+            elif outcome == FAILED:
+                issues.extend(f"Step {result.get('step_number')}: {problem}" for problem in problems)
+                missing_data.extend(problems)
+            else:
+                inconclusive = True
+        
+        if checked == 0:
+            return None
+        
+        if issues:
+            return {
+                "verified": False,
+                "completeness_score": round(100 * passed / checked),
+                "issues": issues,
+                "missing_data": missing_data,
+                "needs_retry": True,
+                "verified_by": "rules"
+            }
+        
+        if inconclusive:
+            return None
+        
+        return {
+            "verified": True,
+            "completeness_score": 100,
+            "issues": [],
+            "missing_data": [],
+            "needs_retry": False,
+            "verified_by": "rules"
+        }
+    
+    def _check_step(self, tool_name: str, parameters: Dict[str, Any], data: Any) -> Tuple[str, List[str]]:
+        """Check one step's data against its tool's schema"""
+        schema, declared = self._schemas.get(tool_name, ({}, {}))
+        if not schema:
+            return INCONCLUSIVE, []
+        
+        if not isinstance(data, Mapping):
+            return FAILED, [f"{tool_name} returned no data"]
+        
+        missing = [field for field in schema.get("fields", []) if data.get(field) is None]
+        if missing:
+            return FAILED, [f"{tool_name} result is missing {', '.join(missing)}"]
+        
+        items_key = schema.get("items")
+        if not items_key:
+            return PASSED, []
+        
+        items = data.get(items_key)
+        if not isinstance(items, list):
+            return FAILED, [f"{tool_name} returned malformed {items_key}"]
+        
+        if any(not isinstance(item, Mapping) for item in items):
+            return FAILED, [f"{tool_name} returned malformed {items_key}"]
+        
+        # An empty list may be the correct answer (nothing matched), and a few
+        # sparse records may still be usable; let the LLM judge both
+        if not items:
+            return INCONCLUSIVE, []
+        
+        item_fields = schema.get("item_fields", [])
+        if any(item.get(field) is None for item in items for field in item_fields):
+            return INCONCLUSIVE, []
+        
+        requested = self._requested_count(schema, parameters, declared)
+        available = data.get(schema.get("total"))
+        if requested is not None and len(items) < requested:
+            # Fewer records than asked for is fine when that is all there is
+            if not isinstance(available, int) or available > len(items):
+                return INCONCLUSIVE, []
+        
+        return PASSED, []
+    
+    @staticmethod
+    def _requested_count(schema: Dict[str, Any], parameters: Dict[str, Any], declared: Dict[str, Dict[str, Any]]) -> Optional[int]:
+        """Number of records the step asked for, falling back to the declared default"""
+        name = schema.get("count_parameter")
+        if not name:
+            return None
+        
+        value = parameters.get(name, declared.get(name, {}).get("default"))
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
@@ -3,20 +3,87 @@ Verifier Agent
 Validates execution results and ensures output quality
 """
 
-from typing import Dict, Any, List
-from llm import LLMProvider
+import re
+import threading
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
+from core.deadline import short_of_time
+from core.loop import iterate_sync, run_sync
+from llm import LLMProvider, IncrementalJSONParser
+from .context_packer import ContextPacker
+from .schemas import VERDICT_SCHEMA
+from .structural_verifier import StructuralVerifier
+
+
+# Closing code fence and "---" line between the verdict and the response in fused mode
+FUSED_LEAD = re.compile(r"\s*(?:```[ \t]*)?\s*(?P<separator>-{3,}[ \t]*\n)?")
+
+# Characters of fused output read while looking for the verdict header
+MAX_FUSED_HEADER = 2000
+
+# Token budgets (per step, per prompt) for results in verification prompts;
+# a verdict needs far less detail than the response written from the data
+VERIFY_BUDGET = (120, 600)
+
+# Seconds of the task deadline needed for the LLM verdict and for the LLM-written
+# response; with less left, results are accepted or formatted locally
+VERIFY_SECONDS = 4.0
+RESPONSE_SECONDS = 4.0
 
 
 class VerifierAgent:
     """Agent responsible for verifying execution results"""
     
-    def __init__(self, llm_provider: LLMProvider):
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        available_tools: Optional[List[Dict[str, Any]]] = None,
+        structural: bool = True,
+        fused: bool = False,
+        context_packer: Optional[ContextPacker] = None
+    ):
         self.llm = llm_provider
+        
+        # Fits result data into prompt token budgets
+        self.context_packer = context_packer or ContextPacker()
+        
+        # Produce the verdict and the final response in a single LLM call
+        self.fused = fused
+        
+        # Local schema checks that settle most verdicts without an LLM call
+        self.structural_verifier: Optional[StructuralVerifier] = None
+        if structural and available_tools:
+            self.structural_verifier = StructuralVerifier(available_tools)
+        
+        # How often each verification path is taken
+        self._lock = threading.Lock()
+        self.stats = {
+            "precheck": 0,
+            "rules": 0,
+            "llm": 0,
+            "deadline": 0
+        }
     
     def verify_results(
         self, 
         plan: Dict[str, Any], 
         execution_results: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Blocking version of averify_results
+        
+        Args:
+            plan: Original execution plan
+            execution_results: Results from executor
+            
+        Returns:
+            Dict with verification status and formatted output
+        """
+        return run_sync(self.averify_results(plan, execution_results))
+    
+    async def averify_results(
+        self, 
+        plan: Dict[str, Any], 
+        execution_results: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         Verify if execution results meet the plan's expectations
@@ -28,7 +95,133 @@ class VerifierAgent:
         Returns:
             Dict with verification status and formatted output
         """
+        local = self._local_verify(plan, execution_results)
+        if local is not None:
+            return local
+        
+        results = execution_results.get("results", [])
+        expected_output = plan.get("expected_output", "")
+        
+        # Check completeness with LLM
+        return await self._allm_verify(plan, results, expected_output)
+    
+    def verify_and_stream(
+        self, 
+        plan: Dict[str, Any], 
+        execution_results: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """
+        Blocking version of averify_and_stream
+        
+        Args:
+            plan: Original execution plan
+            execution_results: Results from executor
+            
+        Returns:
+            Tuple of (verification, iterator of response text deltas)
+        """
+        verification, stream = run_sync(self.averify_and_stream(plan, execution_results))
+        return verification, iterate_sync(stream)
+    
+    async def averify_and_stream(
+        self, 
+        plan: Dict[str, Any], 
+        execution_results: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], AsyncIterator[str]]:
+        """
+        Verify results and stream the final response from one LLM call
+        
+        The fused call answers with a JSON verdict line, a "---" line, and the
+        response for the user. The stream is read up to the separator so the
+        verdict is known before any response text is handed out. Verdicts
+        settled without the LLM (precheck, rules) use the regular response
+        stream instead.
+        
+        Args:
+            plan: Original execution plan
+            execution_results: Results from executor
+            
+        Returns:
+            Tuple of (verification, async iterator of response text deltas)
+        """
+        verification = self._local_verify(plan, execution_results)
+        if verification is not None:
+            return verification, self.astream_final_response(verification)
+        
+        results = execution_results.get("results", [])
+        output = self._format_output(plan, results)
+        
+        self._record("llm")
+        system_prompt, user_prompt = self._build_fused_prompts(plan, output)
+        parser = IncrementalJSONParser()
+        
+        try:
+            stream = self.llm.astream_completion(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=0.3,
+                max_tokens=1200,
+                validate=self._fused_header_valid
+            )
+            async for delta in stream:
+                parser.feed(delta)
+                if self._fused_body_start(parser) is not None:
+                    break
+        
+        except Exception as e:
+            verification = self._fallback_verification(e, plan, results)
+            return verification, self._aiter_text(self._simple_format(output))
+        
+        verification, body = self._fused_verdict(parser, plan, results)
+        
+        if not verification.get("verified"):
+            await stream.aclose()
+            return verification, self._aiter_text(await self.agenerate_final_response(verification))
+        
+        return verification, self._afused_response(body, stream, output, verification)
+    
+    def _local_verify(self, plan: Dict[str, Any], execution_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Verdict reachable without an LLM call (precheck, rules, or no time left), if any"""
+        precheck = self._precheck_results(plan, execution_results)
+        if precheck is not None:
+            return precheck
+        
+        results = execution_results.get("results", [])
+        verdict = self._structural_verify(plan, results)
+        if verdict is not None:
+            return verdict
+        
+        if short_of_time(VERIFY_SECONDS + RESPONSE_SECONDS, "verification", "accepted results without the LLM check"):
+            self._record("deadline")
+            return {
+                "verified": True,
+                "completeness_score": 80,
+                "issues": ["Not checked by the LLM: task deadline nearly reached"],
+                "missing_data": [],
+                "needs_retry": False,
+                "verified_by": "deadline",
+                "output": self._format_output(plan, results)
+            }
+        
+        return None
+    
+    def _precheck_results(self, plan: Dict[str, Any], execution_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Fail verification early for failed executions or failed steps
+        
+        Steps that failed only because their tool's circuit is open do not
+        fail the task: retrying now would fail the same way, so the
+        remaining results are passed on as a partial answer.
+        
+        Args:
+            plan: Original plan
+            execution_results: Results from executor
+            
+        Returns:
+            Verification result if the results cannot be verified, otherwise None
+        """
         if not execution_results.get("success"):
+            self._record("precheck")
             return {
                 "verified": False,
                 "issues": ["Execution failed"],
@@ -37,12 +230,16 @@ class VerifierAgent:
             }
         
         results = execution_results.get("results", [])
-        expected_output = plan.get("expected_output", "")
         
         # Check for failed steps
         failed_steps = [r for r in results if not r.get("success")]
         if failed_steps:
+            self._record("precheck")
             issues = [f"Step {s.get('step_number')} failed: {s.get('error')}" for s in failed_steps]
+            succeeded = [r for r in results if r.get("success")]
+            if succeeded and all(s.get("circuit_open") for s in failed_steps):
+                return self._partial_verification(plan, results, succeeded, failed_steps, issues)
+            
             return {
                 "verified": False,
                 "issues": issues,
@@ -51,12 +248,89 @@ class VerifierAgent:
                 "partial_results": [r for r in results if r.get("success")]
             }
         
-        # Check completeness with LLM
-        verification_result = self._llm_verify(plan, results, expected_output)
+        return None
+    
+    def _partial_verification(
+        self,
+        plan: Dict[str, Any],
+        results: List[Dict[str, Any]],
+        succeeded: List[Dict[str, Any]],
+        unavailable: List[Dict[str, Any]],
+        issues: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Verdict for results missing steps whose tools are unavailable
+        
+        Args:
+            plan: Original plan
+            results: All step results
+            succeeded: Successful step results
+            unavailable: Steps that failed fast on an open circuit
+            issues: Failure messages of the unavailable steps
+            
+        Returns:
+            Verified partial verdict, or the structural rejection of the remaining results
+        """
+        if self.structural_verifier is not None:
+            verdict = self.structural_verifier.check(plan, succeeded)
+            if verdict is not None and not verdict["verified"]:
+                verdict["issues"] = issues + verdict["issues"]
+                verdict["output"] = None
+                return verdict
+        
+        output = self._format_output(plan, succeeded)
+        output["status"] = "partial"
+        output["unavailable"] = [s.get("description") for s in unavailable]
+        
+        return {
+            "verified": True,
+            "partial": True,
+            "completeness_score": round(100 * len(succeeded) / len(results)),
+            "issues": issues,
+            "missing_data": output["unavailable"],
+            "needs_retry": False,
+            "verified_by": "precheck",
+            "output": output
+        }
+    
+    def _structural_verify(self, plan: Dict[str, Any], results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Verify results against the tools' output schemas
+        
+        Args:
+            plan: Original plan
+            results: Execution results
+            
+        Returns:
+            Verification result, or None if the checks are inconclusive
+        """
+        if self.structural_verifier is None:
+            return None
+        
+        verdict = self.structural_verifier.check(plan, results)
+        if verdict is None:
+            return None
         
-        return verification_result
+        self._record("rules")
+        verdict["output"] = self._format_output(plan, results) if verdict["verified"] else None
+        return verdict
     
-    def _llm_verify(
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counts of verdicts by path (precheck, rules, llm, deadline), the LLM share, and prompt token savings"""
+        with self._lock:
+            stats = dict(self.stats)
+        
+        total = sum(stats.values())
+        stats["llm_rate"] = round(stats["llm"] / total, 3) if total else 0.0
+        stats["context"] = self.context_packer.get_stats()
+        return stats
+    
+    def _record(self, path: str):
+        """Count a verdict reached through the given path"""
+        with self._lock:
+            self.stats[path] += 1
+    
+    async def _allm_verify(
         self, 
         plan: Dict[str, Any], 
         results: List[Dict[str, Any]], 
@@ -73,6 +347,40 @@ class VerifierAgent:
         Returns:
             Verification result
         """
+        self._record("llm")
+        system_prompt, user_prompt = self._build_verify_prompts(plan, results, expected_output)
+        
+        try:
+            verification = await self.llm.agenerate_json_completion(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=0.2,
+                schema=VERDICT_SCHEMA,
+                schema_name="submit_verdict"
+            )
+            
+            return self._attach_output(verification, plan, results)
+        
+        except Exception as e:
+            return self._fallback_verification(e, plan, results)
+    
+    def _build_verify_prompts(
+        self, 
+        plan: Dict[str, Any], 
+        results: List[Dict[str, Any]], 
+        expected_output: str
+    ) -> Tuple[str, str]:
+        """
+        Build system and user prompts for LLM verification
+        
+        Args:
+            plan: Original plan
+            results: Execution results
+            expected_output: Expected output description
+            
+        Returns:
+            Tuple of (system_prompt, user_prompt)
+        """
         system_prompt = """You are a verification agent. Your job is to:
 1. Check if execution results are complete and match expectations
 2. Identify any missing or incorrect information
@@ -80,12 +388,13 @@ class VerifierAgent:
 
 Respond with valid JSON only."""
 
-        results_summary = "\n".join([
-            f"Step {r.get('step_number')}: {r.get('description')}\n"
-            f"  Success: {r.get('success')}\n"
-            f"  Result: {str(r.get('result', 'None'))[:200]}\n"
-            for r in results
-        ])
+        results_summary, _ = self.context_packer.pack(
+            [
+                (f"Step {r.get('step_number')}: {r.get('description')}\n  Success: {r.get('success')}", r.get('result'))
+                for r in results
+            ],
+            *VERIFY_BUDGET
+        )
         
         user_prompt = f"""Task Understanding: {plan.get('task_understanding', 'Unknown')}
 
@@ -103,32 +412,42 @@ Verify the results and respond with JSON:
     "needs_retry": true/false
 }}"""
 
-        try:
-            verification = self.llm.generate_json_completion(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
-                temperature=0.2
-            )
-            
-            # If verified, format the output
-            if verification.get("verified", False):
-                formatted_output = self._format_output(plan, results)
-                verification["output"] = formatted_output
-            else:
-                verification["output"] = None
-            
-            return verification
+        return system_prompt, user_prompt
+    
+    def _attach_output(
+        self, 
+        verification: Dict[str, Any], 
+        plan: Dict[str, Any], 
+        results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Attach formatted output to an LLM verdict"""
+        verification.setdefault("verified_by", "llm")
         
-        except Exception as e:
-            # Fallback verification
-            return {
-                "verified": True,  # Assume success if LLM fails
-                "completeness_score": 80,
-                "issues": [f"LLM verification failed: {str(e)}"],
-                "missing_data": [],
-                "needs_retry": False,
-                "output": self._format_output(plan, results)
-            }
+        # If verified, format the output
+        if verification.get("verified", False):
+            formatted_output = self._format_output(plan, results)
+            verification["output"] = formatted_output
+        else:
+            verification["output"] = None
+        
+        return verification
+    
+    def _fallback_verification(
+        self, 
+        error: Exception, 
+        plan: Dict[str, Any], 
+        results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Fallback verification used when the LLM call fails"""
+        return {
+            "verified": True,  # Assume success if LLM fails
+            "completeness_score": 80,
+            "issues": [f"LLM verification failed: {str(error)}"],
+            "missing_data": [],
+            "needs_retry": False,
+            "verified_by": "fallback",
+            "output": self._format_output(plan, results)
+        }
     
     def _format_output(self, plan: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -159,6 +478,18 @@ Verify the results and respond with JSON:
         return output
     
     def generate_final_response(self, verification: Dict[str, Any]) -> str:
+        """
+        Blocking version of agenerate_final_response
+        
+        Args:
+            verification: Verification results
+            
+        Returns:
+            Formatted response string
+        """
+        return run_sync(self.agenerate_final_response(verification))
+    
+    async def agenerate_final_response(self, verification: Dict[str, Any]) -> str:
         """
         Generate human-readable final response
         
@@ -173,32 +504,255 @@ Verify the results and respond with JSON:
             return f"Task could not be completed:\n" + "\n".join(f"- {issue}" for issue in issues)
         
         output = verification.get("output", {})
+        if short_of_time(RESPONSE_SECONDS, "response", "formatted results without the LLM"):
+            return self._simple_format(output)
+        
+        system_prompt, user_prompt = self._build_response_prompts(output)
         
-        system_prompt = """You are formatting execution results for the user.
-Create a clear, concise, and helpful response based on the data.
-Be natural and conversational, not robotic."""
-
-        user_prompt = f"""Task: {output.get('task', 'Unknown')}
-
-Results Data:
-{output}
-
-Generate a helpful response for the user that presents this information clearly.
-DO NOT use JSON in your response - write naturally for humans."""
-
         try:
-            response = self.llm.generate_completion(
+            return await self.llm.agenerate_completion(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
                 temperature=0.7,
                 max_tokens=1000
             )
-            return response
         
         except Exception as e:
             # Fallback formatting
             return self._simple_format(output)
     
+    def stream_final_response(self, verification: Dict[str, Any]) -> Iterator[str]:
+        """
+        Blocking version of astream_final_response
+        
+        Args:
+            verification: Verification results
+            
+        Returns:
+            Iterator of response text as it is generated
+        """
+        return iterate_sync(self.astream_final_response(verification))
+    
+    async def astream_final_response(self, verification: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Generate the final response as a stream of text deltas
+        
+        Args:
+            verification: Verification results
+            
+        Yields:
+            Response text as it is generated
+        """
+        if not verification.get("verified"):
+            yield await self.agenerate_final_response(verification)
+            return
+        
+        output = verification.get("output", {})
+        if short_of_time(RESPONSE_SECONDS, "response", "formatted results without the LLM"):
+            yield self._simple_format(output)
+            return
+        
+        system_prompt, user_prompt = self._build_response_prompts(output)
+        emitted = False
+        
+        try:
+            async for delta in self.llm.astream_completion(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=0.7,
+                max_tokens=1000
+            ):
+                emitted = True
+                yield delta
+        
+        except Exception as e:
+            # Fallback formatting if nothing was streamed yet
+            if not emitted:
+                yield self._simple_format(output)
+            else:
+                yield self._truncation_note(verification, e)
+    
+    def _build_fused_prompts(self, plan: Dict[str, Any], output: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Build system and user prompts for the fused verify-and-respond call
+        
+        Args:
+            plan: Original plan
+            output: Formatted execution results
+            
+        Returns:
+            Tuple of (system_prompt, user_prompt)
+        """
+        system_prompt = """You are a verification agent and response writer. Your job is to:
+1. Check if execution results are complete and match expectations
+2. If they are, present them to the user in a clear, concise, and helpful response
+
+Answer in exactly this layout:
+- First line: a single-line JSON verdict
+- Second line: ---
+- After that: the response for the user (leave empty if not verified)
+
+In the response, be natural and conversational, not robotic, and DO NOT use JSON."""
+
+        user_prompt = f"""Task Understanding: {plan.get('task_understanding', 'Unknown')}
+
+Expected Output: {plan.get('expected_output', '')}
+
+Results Data:
+{self._pack_output(output)}
+
+First line, the verdict:
+{{"verified": true/false, "completeness_score": 0-100, "issues": ["list of issues if any"], "missing_data": ["what data is missing if any"], "needs_retry": true/false}}
+---
+Then the response for the user."""
+
+        return system_prompt, user_prompt
+    
+    @staticmethod
+    def _fused_body_start(parser: IncrementalJSONParser) -> Optional[int]:
+        """Offset of the response in the parser's remainder once the header has been read"""
+        if parser.failed or len(parser.buffer) > MAX_FUSED_HEADER:
+            return 0
+        if not parser.complete:
+            return None
+        
+        # Wait until the separator line, or the response itself, has started
+        remainder = parser.remainder
+        lead = FUSED_LEAD.match(remainder)
+        rest = remainder[lead.end():]
+        if lead.group("separator") or (rest and rest[0] not in "-`"):
+            return lead.end()
+        return None
+    
+    @staticmethod
+    def _fused_header_valid(text: str) -> bool:
+        """Whether complete fused output starts with a JSON object verdict"""
+        parser = IncrementalJSONParser()
+        parser.feed(text)
+        return parser.complete and isinstance(parser.value(), dict)
+    
+    def _fused_verdict(
+        self, 
+        parser: IncrementalJSONParser, 
+        plan: Dict[str, Any], 
+        results: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Read the verdict header of fused output
+        
+        Args:
+            parser: Parser fed with the fused output received so far
+            plan: Original plan
+            results: Execution results
+            
+        Returns:
+            Tuple of (verification, response text received after the header)
+        """
+        if not parser.complete:
+            # No usable header; treat everything as the response
+            error = ValueError("no verdict header in fused response")
+            return self._fallback_verification(error, plan, results), parser.buffer
+        
+        remainder = parser.remainder
+        lead = FUSED_LEAD.match(remainder)
+        body = remainder[lead.end():]
+        if lead.group("separator") is None and not body.strip("-` \t\n"):
+            # Only a fence or separator arrived before the stream ended
+            body = ""
+        
+        verification = parser.value()
+        if not isinstance(verification, dict):
+            error = ValueError("fused verdict is not a JSON object")
+            return self._fallback_verification(error, plan, results), body
+        
+        return self._attach_output(verification, plan, results), body
+    
+    async def _afused_response(
+        self, 
+        body: str, 
+        stream: AsyncIterator[str], 
+        output: Dict[str, Any], 
+        verification: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Yield the response part of a fused stream"""
+        emitted = False
+        body = body.lstrip()
+        if body:
+            emitted = True
+            yield body
+        
+        try:
+            async for delta in stream:
+                if not emitted:
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                emitted = True
+                yield delta
+        
+        except Exception as e:
+            if emitted:
+                yield self._truncation_note(verification, e)
+        
+        # Fallback formatting if the model wrote no response (or failed before writing any)
+        if not emitted:
+            yield self._simple_format(output)
+    
+    @staticmethod
+    def _truncation_note(verification: Dict[str, Any], error: Exception) -> str:
+        """Log a response stream that failed part-way, flag it on the verdict, and return the note ending the text"""
+        print(f"Warning: final response stream failed part-way: {error}")
+        verification["response_truncated"] = True
+        return "\n\n[Response incomplete: generation was interrupted]"
+    
+    @staticmethod
+    async def _aiter_text(text: str) -> AsyncIterator[str]:
+        """Async iterator over a single piece of text"""
+        yield text
+    
+    def _build_response_prompts(self, output: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Build system and user prompts for the final response
+        
+        Args:
+            output: Formatted verification output
+            
+        Returns:
+            Tuple of (system_prompt, user_prompt)
+        """
+        system_prompt = """You are formatting execution results for the user.
+Create a clear, concise, and helpful response based on the data.
+Be natural and conversational, not robotic."""
+
+        user_prompt = f"""Task: {output.get('task', 'Unknown')}
+
+Results Data:
+{self._pack_output(output)}
+{self._unavailable_note(output)}
+Generate a helpful response for the user that presents this information clearly.
+DO NOT use JSON in your response - write naturally for humans."""
+
+        return system_prompt, user_prompt
+    
+    def _pack_output(self, output: Dict[str, Any]) -> str:
+        """Formatted output packed into the response prompt's token budget"""
+        packed, _ = self.context_packer.pack([
+            (f"Step {result.get('step')}: {result.get('description')}", result.get("data"))
+            for result in output.get("results", [])
+        ])
+        return packed
+    
+    @staticmethod
+    def _unavailable_note(output: Dict[str, Any]) -> str:
+        """Prompt lines naming steps left out because their service is down"""
+        unavailable = output.get("unavailable")
+        if not unavailable:
+            return ""
+        return (
+            "These parts could not be fetched because the service is temporarily unavailable; "
+            f"mention this briefly: {'; '.join(map(str, unavailable))}\n"
+        )
+    
     def _simple_format(self, output: Dict[str, Any]) -> str:
         """Simple fallback formatting"""
         response = f"Task: {output.get('task', 'Completed')}\n\n"
@@ -209,4 +763,7 @@ DO NOT use JSON in your response - write naturally for humans."""
             if data:
                 response += f"{str(data)[:500]}\n\n"
         
+        for description in output.get("unavailable", []):
+            response += f"Not available right now: {description}\n"
+        
         return response
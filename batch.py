@@ -0,0 +1,329 @@
+"""
+Batch Runner
+Processes a JSONL file of tasks with bounded concurrency
+"""
+
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Any, IO, List, Optional, Set, Tuple
+from core.loop import run_sync
+from tools.records import json_default
+
+
+class BatchRunner:
+    """
+    Runs many tasks through one shared assistant
+    
+    Tasks are read one JSON object per line ({"id": ..., "task": ...}; a
+    bare JSON string is also accepted and gets a line-number id) and run
+    on a single event loop with at most concurrency tasks in flight.
+    Each result is written as one JSON line as soon as its task finishes,
+    so output arrives in completion order and carries the task id.
+    
+    With a checkpoint file, the id of every finished task is appended to
+    it after its result is written; a rerun with the same checkpoint skips
+    those tasks (failed ones too, unless retry_failed is set). A crash
+    between the two writes can repeat a task's result line, never lose it.
+    """
+    
+    def __init__(
+        self,
+        assistant,
+        concurrency: int = 8,
+        checkpoint_path: Optional[str] = None,
+        retry_failed: bool = False,
+        deadline: Optional[float] = None
+    ):
+        """
+        Args:
+            assistant: AIOperationsAssistant shared by every task
+            concurrency: Most tasks in flight at once
+            checkpoint_path: JSONL file recording finished task ids (optional)
+            retry_failed: Rerun tasks the checkpoint records as failed
+            deadline: Time budget per task in seconds (assistant default if None)
+        """
+        self.assistant = assistant
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_path = checkpoint_path
+        self.retry_failed = retry_failed
+        self.deadline = deadline
+        
+        self._latencies: List[float] = []
+        self.stats = {
+            "read": 0,
+            "skipped": 0,
+            "invalid": 0,
+            "succeeded": 0,
+            "failed": 0
+        }
+    
+    async def run(self, source: IO[str], sink: IO[str]) -> Dict[str, Any]:
+        """
+        Process every task in source and write the results to sink
+        
+        Args:
+            source: Text stream of JSONL tasks
+            sink: Text stream receiving JSONL results
+            
+        Returns:
+            Throughput and latency report
+        """
+        done = self.load_checkpoint()
+        checkpoint = self._open_checkpoint()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        started = time.perf_counter()
+        
+        async def produce():
+            line_number = 0
+            while True:
+                # Read in a thread so a slow stdin producer does not stall running tasks
+                line = await asyncio.to_thread(source.readline)
+                if not line:
+                    break
+                line_number += 1
+                if not line.strip():
+                    continue
+                
+                self.stats["read"] += 1
+                task_id, task, error = self.parse_line(line, line_number)
+                if error is not None:
+                    self.stats["invalid"] += 1
+                    self._write(sink, None, {"id": task_id, "success": False, "error": error})
+                    continue
+                if task_id in done:
+                    self.stats["skipped"] += 1
+                    continue
+                
+                await queue.put((task_id, task))
+            
+            for _ in range(self.concurrency):
+                await queue.put(None)
+        
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                task_id, task = item
+                record = await self.run_task(task_id, task)
+                self.stats["succeeded" if record["success"] else "failed"] += 1
+                self._write(sink, checkpoint, record)
+        
+        try:
+            await asyncio.gather(produce(), *[work() for _ in range(self.concurrency)])
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+            # The loop may end with this run (asyncio.run); its connection pools would otherwise leak
+            await self.assistant.aclose()
+        
+        return self.get_report(time.perf_counter() - started)
+    
+    async def run_task(self, task_id: str, task: str) -> Dict[str, Any]:
+        """
+        Run one task and build its output line
+        
+        Args:
+            task_id: Task id from the input
+            task: Natural language task
+            
+        Returns:
+            Result record: id, success, response or error/issues, elapsed seconds
+        """
+        started = time.perf_counter()
+        try:
+            result = await self.assistant.process_task_async(task, verbose=False, deadline=self.deadline, task_id=task_id)
+        except Exception as e:
+            result = {"success": False, "error": f"Unexpected error: {str(e)}"}
+        elapsed = time.perf_counter() - started
+        self._latencies.append(elapsed)
+        
+        record = {"id": task_id, "task": task, "success": bool(result.get("success"))}
+        if record["success"]:
+            record["response"] = result.get("response")
+        else:
+            record["error"] = result.get("error")
+            record["issues"] = result.get("issues", [])
+            record["needs_retry"] = result.get("needs_retry", False)
+        record["elapsed"] = round(elapsed, 3)
+        return record
+    
+    @staticmethod
+    def parse_line(line: str, line_number: int) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Parse one input line
+        
+        Args:
+            line: JSON object with "task" and optional "id", or a JSON string
+            line_number: 1-based line number (used as the id when none is given)
+            
+        Returns:
+            Task id, task text, and an error message if the line is unusable
+        """
+        fallback_id = f"line-{line_number}"
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            return fallback_id, None, f"Invalid JSON on line {line_number}: {e.msg}"
+        
+        if isinstance(entry, str):
+            entry = {"task": entry}
+        if not isinstance(entry, dict):
+            return fallback_id, None, f"Line {line_number} is not a task object"
+        
+        task_id = str(entry.get("id") or fallback_id)
+        task = entry.get("task")
+        if not isinstance(task, str) or not task.strip():
+            return task_id, None, f"Line {line_number} has no task text"
+        
+        return task_id, task.strip(), None
+    
+    def load_checkpoint(self) -> Set[str]:
+        """Ids of the tasks a previous run finished (failed ones excluded with retry_failed)"""
+        done: Set[str] = set()
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves a partial last line
+                    continue
+                if entry.get("success") or not self.retry_failed:
+                    done.add(entry.get("id"))
+                else:
+                    done.discard(entry.get("id"))
+        
+        return done
+    
+    def _open_checkpoint(self) -> Optional[IO[str]]:
+        """Open the checkpoint for appending, finishing a partial last line first"""
+        if not self.checkpoint_path:
+            return None
+        
+        partial = False
+        if os.path.exists(self.checkpoint_path) and os.path.getsize(self.checkpoint_path) > 0:
+            with open(self.checkpoint_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                partial = f.read(1) != b"\n"
+        
+        checkpoint = open(self.checkpoint_path, "a", encoding="utf-8", buffering=1)
+        if partial:
+            checkpoint.write("\n")
+        return checkpoint
+    
+    def get_report(self, wall_seconds: float) -> Dict[str, Any]:
+        """
+        Build the end-of-run report
+        
+        Args:
+            wall_seconds: Duration of the whole run
+            
+        Returns:
+            Task counts, throughput in tasks per second, and latency percentiles
+        """
+        latencies = sorted(self._latencies)
+        report = dict(self.stats)
+        report["completed"] = len(latencies)
+        report["wall_seconds"] = round(wall_seconds, 3)
+        report["throughput"] = round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else 0.0
+        report["concurrency"] = self.concurrency
+        report["latency"] = {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": round(latencies[-1], 3) if latencies else None
+        }
+        return report
+    
+    def _write(self, sink: IO[str], checkpoint: Optional[IO[str]], record: Dict[str, Any]):
+        """Emit a result line, then checkpoint its task (invalid lines are not checkpointed)"""
+        sink.write(json.dumps(record, default=json_default, ensure_ascii=False) + "\n")
+        sink.flush()
+        
+        if checkpoint is not None:
+            checkpoint.write(json.dumps({"id": record["id"], "success": record["success"]}) + "\n")
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile
+    
+    Args:
+        sorted_values: Values in ascending order
+        q: Quantile between 0 and 1
+        
+    Returns:
+        The value, rounded to milliseconds, or None without values
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return round(sorted_values[rank - 1], 3)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a batch report for the terminal"""
+    latency = {key: "n/a" if value is None else f"{value}s" for key, value in report["latency"].items()}
+    lines = [
+        f"{'='*60}",
+        "BATCH REPORT",
+        f"{'='*60}",
+        f"Tasks: {report['completed']} run ({report['succeeded']} succeeded, {report['failed']} failed), "
+        f"{report['skipped']} skipped from checkpoint, {report['invalid']} invalid",
+        f"Wall time: {report['wall_seconds']}s at concurrency {report['concurrency']}",
+        f"Throughput: {report['throughput']} tasks/s",
+        f"Latency: p50 {latency['p50']}, p95 {latency['p95']}, p99 {latency['p99']}, max {latency['max']}"
+    ]
+    return "\n".join(lines)
+
+
+def run_batch(
+    assistant,
+    input_path: str = "-",
+    output_path: str = "-",
+    concurrency: int = 8,
+    checkpoint_path: Optional[str] = None,
+    retry_failed: bool = False,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run a batch from files or stdin/stdout and print the report
+    
+    While the batch runs, everything the pipeline prints goes to stderr so
+    stdout carries nothing but result lines.
+    
+    Args:
+        assistant: AIOperationsAssistant shared by every task
+        input_path: JSONL task file ("-" for stdin)
+        output_path: JSONL result file ("-" for stdout), appended to
+        concurrency: Most tasks in flight at once
+        checkpoint_path: JSONL file recording finished task ids (optional)
+        retry_failed: Rerun tasks the checkpoint records as failed
+        deadline: Time budget per task in seconds (assistant default if None)
+        
+    Returns:
+        Throughput and latency report
+    """
+    runner = BatchRunner(assistant, concurrency, checkpoint_path, retry_failed, deadline)
+    source = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    sink = sys.stdout if output_path == "-" else open(output_path, "a", encoding="utf-8")
+    
+    try:
+        with redirect_stdout(sys.stderr):
+            report = run_sync(runner.run(source, sink))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    
+    print(format_report(report), file=sys.stderr)
+    return report
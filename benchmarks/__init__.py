@@ -0,0 +1,18 @@
+from .backends import LatencyModel, FakeChatBackend, FakeHTTPBackend
+from .corpus import CORPUS, load_corpus
+from .runner import Benchmark, MODES, compare_results, save_results, latest_results, load_results, format_results
+
+__all__ = [
+    'LatencyModel',
+    'FakeChatBackend',
+    'FakeHTTPBackend',
+    'CORPUS',
+    'load_corpus',
+    'Benchmark',
+    'MODES',
+    'compare_results',
+    'save_results',
+    'latest_results',
+    'load_results',
+    'format_results'
+]
@@ -0,0 +1,77 @@
+"""
+Benchmark CLI
+python -m benchmarks [options]; exits with status 1 when a regression is found
+"""
+
+import argparse
+import sys
+from .backends import LatencyModel
+from .corpus import load_corpus
+from .runner import Benchmark, MODES, RESULTS_DIR, compare_results, format_results, latest_results, load_results, save_results
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline benchmark of the assistant pipeline")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes (default: {','.join(MODES)})")
+    parser.add_argument("--corpus", help="JSONL file of {\"id\", \"task\", optional \"plan\"} (default: built-in corpus)")
+    parser.add_argument("--repeat", type=int, default=1, help="Times the corpus is run per mode (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Tasks in flight in concurrent mode (default: 8)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Median LLM latency in seconds (default: 0.3)")
+    parser.add_argument("--llm-sigma", type=float, default=0.4, help="Spread of LLM latency, 0 for constant (default: 0.4)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of failed LLM calls (default: 0)")
+    parser.add_argument("--tool-latency", type=float, default=0.15, help="Median tool API latency in seconds (default: 0.15)")
+    parser.add_argument("--tool-sigma", type=float, default=0.5, help="Spread of tool API latency, 0 for constant (default: 0.5)")
+    parser.add_argument("--tool-error-rate", type=float, default=0.0, help="Fraction of tool API calls answering 503 (default: 0)")
+    parser.add_argument("--items", type=int, default=10, help="Most entries in a tool list response (default: 10)")
+    parser.add_argument("--text-chars", type=int, default=200, help="Length of free text in tool responses (default: 200)")
+    parser.add_argument("--response-chars", type=int, default=600, help="Length of generated responses (default: 600)")
+    parser.add_argument("--fused", action="store_true", help="Use the fused verify-and-respond call")
+    parser.add_argument("--hedge", action="store_true", help="Enable request hedging for tool calls")
+    parser.add_argument("--deadline", type=float, help="Time budget per task in seconds (default: TASK_DEADLINE_SECONDS)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the simulated backends (default: 0)")
+    parser.add_argument("--cassette", help="Replay this recorded traffic instead of the simulated backends (corpus: its tasks)")
+    parser.add_argument("--replay-latency", type=float, default=1.0, help="Multiple of the recorded latencies when replaying (default: 1)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR, help="Where results are saved and looked up")
+    parser.add_argument("--no-save", action="store_true", help="Do not save this run's results")
+    parser.add_argument("--baseline", help="Results file to compare with (default: the latest saved run)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change reported as a regression (default: 0.10)")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark, save the results and compare them with a baseline"""
+    args = parse_args()
+    benchmark = Benchmark(
+        corpus=load_corpus(args.corpus) if args.corpus or not args.cassette else None,
+        llm_latency=LatencyModel(args.llm_latency, args.llm_sigma, args.llm_error_rate),
+        tool_latency=LatencyModel(args.tool_latency, args.tool_sigma, args.tool_error_rate),
+        items=args.items,
+        text_chars=args.text_chars,
+        response_chars=args.response_chars,
+        repeat=args.repeat,
+        concurrency=args.concurrency,
+        fused=args.fused,
+        hedge=args.hedge,
+        deadline=args.deadline,
+        seed=args.seed,
+        cassette_path=args.cassette,
+        replay_latency=args.replay_latency
+    )
+    
+    # Pick the baseline before this run is saved, so it is never compared with itself
+    baseline_path = args.baseline or latest_results(args.results_dir)
+    results = benchmark.run(tuple(mode.strip() for mode in args.modes.split(",") if mode.strip()))
+    
+    baseline = load_results(baseline_path) if baseline_path else None
+    regressions = compare_results(results, baseline, args.threshold) if baseline else []
+    print(format_results(results, regressions, baseline))
+    
+    if not args.no_save:
+        print(f"\nSaved to {save_results(results, args.results_dir)}")
+    
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
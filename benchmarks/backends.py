@@ -0,0 +1,372 @@
+"""
+Simulated Backends
+Stand-ins for the OpenAI API and the tools' HTTP APIs with configurable latency, errors and payload sizes
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from core.tracing import span
+
+
+# Planner prompts carry the task on this line
+TASK_LINE = re.compile(r"^User Task: (.*)$", re.MULTILINE)
+
+VERDICT = {
+    "verified": True,
+    "completeness_score": 90,
+    "issues": [],
+    "missing_data": [],
+    "needs_retry": False
+}
+
+FILLER = "Here is what I found for your request based on the latest data from the tools. "
+
+
+class LatencyModel:
+    """
+    Latency and failure distribution of one simulated backend
+    
+    Latencies are lognormal around the median: sigma 0 gives a constant
+    latency, 0.5 a realistic tail where p99 is about 3x the median.
+    """
+    
+    def __init__(self, median: float = 0.1, sigma: float = 0.5, error_rate: float = 0.0):
+        """
+        Args:
+            median: Median latency in seconds
+            sigma: Spread of the log latency (0 for a constant latency)
+            error_rate: Fraction of calls that fail
+        """
+        self.median = max(0.0, median)
+        self.sigma = max(0.0, sigma)
+        self.error_rate = min(1.0, max(0.0, error_rate))
+    
+    def sample(self, rng: random.Random) -> Tuple[float, bool]:
+        """
+        Draw one call
+        
+        Args:
+            rng: Random source
+            
+        Returns:
+            Tuple of (latency in seconds, whether the call fails)
+        """
+        latency = self.median * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.median
+        return latency, rng.random() < self.error_rate
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready view of the model, saved with benchmark results"""
+        return {"median": self.median, "sigma": self.sigma, "error_rate": self.error_rate}
+
+
+class FakeChatBackend:
+    """
+    Simulated OpenAI chat completions API
+    
+    Installed as an LLMProvider's async_client, so the real
+    provider code (completion cache, JSON modes, streaming, tracing) runs
+    against it. Planner requests are answered with the corpus plan of the
+    task in the prompt, verification requests with a passing verdict, and
+    response requests with text of response_chars characters, streamed in
+    chunks of chunk_chars. Failed calls raise like an API error.
+    """
+    
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        plans: Optional[Dict[str, Dict[str, Any]]] = None,
+        response_chars: int = 600,
+        chunk_chars: int = 20,
+        chunk_delay: float = 0.005,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency: Time to the full answer, or to the first chunk when streaming
+            plans: Task text -> plan returned by the planner
+            response_chars: Length of generated responses
+            chunk_chars: Characters per streamed chunk
+            chunk_delay: Seconds between streamed chunks
+            seed: Random seed
+        """
+        self.latency = latency or LatencyModel(median=0.5)
+        self.plans = plans or {}
+        self.response_chars = response_chars
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_delay = chunk_delay
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "streams": 0,
+            "errors": 0
+        }
+        
+        self.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.acreate)))
+    
+    def install(self, llm):
+        """Route an LLMProvider's API calls to this backend"""
+        llm.async_client = self.async_client
+    
+    async def acreate(self, messages: List[Dict[str, str]], stream: bool = False, **request) -> Any:
+        """Answer a chat completion request without blocking the event loop"""
+        latency, failed = self._draw(stream)
+        await asyncio.sleep(latency)
+        if failed:
+            raise RuntimeError("Simulated API error (503)")
+        
+        content, function_call = self._answer(messages, request)
+        if stream:
+            return self._astream(content)
+        return self._completion(messages, content, function_call)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, stream and error counts"""
+        with self._lock:
+            return dict(self.stats)
+    
+    def _draw(self, stream: bool) -> Tuple[float, bool]:
+        """Sample one call and count it"""
+        with self._lock:
+            latency, failed = self.latency.sample(self._rng)
+            self.stats["requests"] += 1
+            self.stats["streams"] += int(stream)
+            self.stats["errors"] += int(failed)
+        return latency, failed
+    
+    def _answer(self, messages: List[Dict[str, str]], request: Dict[str, Any]) -> Tuple[str, bool]:
+        """Text of the answer, and whether it is sent as a forced function call"""
+        system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        prompt = messages[-1]["content"]
+        function_call = "tools" in request
+        
+        if "planning agent" in system:
+            match = TASK_LINE.search(prompt)
+            task = match.group(1).strip() if match else ""
+            return json.dumps(self.plans.get(task) or default_plan(task)), function_call
+        
+        if "response writer" in system:
+            # Fused verify-and-respond: verdict line, separator, then the response
+            return json.dumps(VERDICT) + "\n---\n" + self._text(), False
+        
+        if function_call or "response_format" in request or "valid JSON" in prompt:
+            return json.dumps(VERDICT), function_call
+        
+        return self._text(), False
+    
+    def _text(self) -> str:
+        """Response text of response_chars characters"""
+        return (FILLER * (self.response_chars // len(FILLER) + 1))[:self.response_chars].strip()
+    
+    @staticmethod
+    def _completion(messages: List[Dict[str, str]], content: str, function_call: bool) -> Any:
+        """Response object shaped like the OpenAI client's"""
+        if function_call:
+            message = SimpleNamespace(
+                content=None,
+                tool_calls=[SimpleNamespace(function=SimpleNamespace(arguments=content))]
+            )
+        else:
+            message = SimpleNamespace(content=content, tool_calls=None)
+        
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=SimpleNamespace(
+                prompt_tokens=sum(len(m["content"]) for m in messages) // 4,
+                completion_tokens=len(content) // 4
+            )
+        )
+    
+    def _chunks(self, content: str) -> List[Any]:
+        """Stream chunk objects for a response"""
+        return [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + self.chunk_chars]))])
+            for i in range(0, len(content), self.chunk_chars)
+        ]
+    
+    async def _astream(self, content: str) -> AsyncIterator[Any]:
+        for index, chunk in enumerate(self._chunks(content)):
+            if index:
+                await asyncio.sleep(self.chunk_delay)
+            yield chunk
+
+
+class FakeResponse:
+    """Minimal stand-in for a requests/httpx response"""
+    
+    def __init__(self, status_code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload
+    
+    @property
+    def text(self) -> str:
+        return json.dumps(self._payload)
+    
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+
+class FakeHTTPBackend:
+    """
+    Simulated GitHub, OpenWeatherMap and NewsAPI endpoints
+    
+    Set as a tool's http_client, in place of the shared HTTPClient. Each
+    host has its own latency model (the default one otherwise); failed
+    calls answer 503. List responses hold up to items entries, cut to the
+    page size the tool asked for, with text fields of text_chars characters.
+    """
+    
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        host_latency: Optional[Dict[str, LatencyModel]] = None,
+        items: int = 10,
+        text_chars: int = 200,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency: Default latency model
+            host_latency: Host -> latency model overrides
+            items: Most entries in a list response
+            text_chars: Length of descriptions and other free text
+            seed: Random seed
+        """
+        self.latency = latency or LatencyModel(median=0.2)
+        self.host_latency = host_latency or {}
+        self.items = items
+        self.text_chars = text_chars
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "errors": 0
+        }
+    
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> FakeResponse:
+        """Answer a GET request, blocking for the simulated latency"""
+        host = urlsplit(url).hostname or ""
+        latency, failed = self._draw(host)
+        with span("http", target=host) as trace:
+            time.sleep(latency)
+            response = self._respond(host, params or {}, failed)
+            trace.set(status_code=response.status_code)
+        return response
+    
+    async def aget(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> FakeResponse:
+        """Answer a GET request without blocking the event loop"""
+        host = urlsplit(url).hostname or ""
+        latency, failed = self._draw(host)
+        with span("http", target=host) as trace:
+            await asyncio.sleep(latency)
+            response = self._respond(host, params or {}, failed)
+            trace.set(status_code=response.status_code)
+        return response
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and error counts"""
+        with self._lock:
+            return dict(self.stats)
+    
+    def _draw(self, host: str) -> Tuple[float, bool]:
+        """Sample one call to a host and count it"""
+        with self._lock:
+            latency, failed = self.host_latency.get(host, self.latency).sample(self._rng)
+            self.stats["requests"] += 1
+            self.stats["errors"] += int(failed)
+        return latency, failed
+    
+    def _respond(self, host: str, params: Dict[str, Any], failed: bool) -> FakeResponse:
+        """Build the response for a host"""
+        if failed:
+            return FakeResponse(503, {"message": "Service Unavailable"})
+        
+        if host == "api.github.com":
+            count = min(self.items, int(params.get("per_page", self.items)))
+            return FakeResponse(200, {
+                "total_count": 1000,
+                "items": [self._repository(params.get("q", ""), i) for i in range(count)]
+            }, {"X-RateLimit-Remaining": "5000", "X-RateLimit-Limit": "5000"})
+        
+        if host == "newsapi.org":
+            count = min(self.items, int(params.get("pageSize", self.items)))
+            return FakeResponse(200, {
+                "status": "ok",
+                "totalResults": 1000,
+                "articles": [self._article(params.get("q") or params.get("country", ""), i) for i in range(count)]
+            })
+        
+        if host == "api.openweathermap.org":
+            return FakeResponse(200, {
+                "name": str(params.get("q", "")).title(),
+                "sys": {"country": "XX"},
+                "main": {"temp": 24.5, "feels_like": 25.1, "humidity": 60},
+                "weather": [{"description": self._words("clear sky with light breeze")}],
+                "wind": {"speed": 3.2}
+            })
+        
+        return FakeResponse(404, {"message": "Not Found"})
+    
+    def _words(self, seed_text: str) -> str:
+        """Free text of text_chars characters"""
+        return ((seed_text + " ") * (self.text_chars // (len(seed_text) + 1) + 1))[:self.text_chars].strip()
+    
+    def _repository(self, query: str, index: int) -> Dict[str, Any]:
+        name = f"{query.replace(' ', '-') or 'project'}-{index}"
+        return {
+            "name": name,
+            "full_name": f"owner{index}/{name}",
+            "description": self._words(f"A popular {query} project"),
+            "stargazers_count": 10000 - index * 100,
+            "forks_count": 1000 - index * 10,
+            "language": "Python",
+            "html_url": f"https://github.com/owner{index}/{name}",
+            "owner": {"login": f"owner{index}"}
+        }
+    
+    def _article(self, topic: str, index: int) -> Dict[str, Any]:
+        return {
+            "title": f"Headline {index} about {topic}",
+            "description": self._words(f"Story about {topic}"),
+            "source": {"name": "Simulated Wire"},
+            "author": "Staff",
+            "url": f"https://news.example.com/{index}",
+            "publishedAt": "2024-01-01T00:00:00Z"
+        }
+
+
+def default_plan(task: str) -> Dict[str, Any]:
+    """Plan for a task the corpus gives none for: one search and a summary"""
+    return {
+        "task_understanding": task,
+        "steps": [
+            {"step_number": 1, "description": "Search GitHub", "tool": "github_search",
+             "parameters": {"query": task[:40] or "python", "max_results": 5}, "depends_on": []},
+            {"step_number": 2, "description": "Summarize the results", "tool": None,
+             "parameters": {}, "depends_on": [1]}
+        ],
+        "expected_output": "A summary of matching repositories"
+    }
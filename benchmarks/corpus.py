@@ -0,0 +1,133 @@
+"""
+Benchmark Corpus
+Representative tasks, with the plans the simulated planner returns for them
+"""
+
+import json
+from typing import Dict, Any, List, Optional
+
+
+def _step(number: int, description: str, tool: Optional[str], parameters: Dict[str, Any], depends_on: List[int]) -> Dict[str, Any]:
+    return {
+        "step_number": number,
+        "description": description,
+        "tool": tool,
+        "parameters": parameters,
+        "depends_on": depends_on
+    }
+
+
+# Tasks without a plan are expected to be planned locally (intent matcher or plan
+# template); the rest go through the LLM planner, which answers with their plan.
+CORPUS: List[Dict[str, Any]] = [
+    {"id": "weather-single", "task": "What's the weather in Mumbai?"},
+    {"id": "news-topic", "task": "Get me the latest 5 news about artificial intelligence"},
+    {"id": "github-top", "task": "Show me the top 5 python machine learning repositories"},
+    {"id": "weather-and-news", "task": "Weather in London and the latest news about climate"},
+    {
+        "id": "trip-briefing",
+        "task": "I am travelling to Tokyo next week, brief me on the weather there and any relevant travel news",
+        "plan": {
+            "task_understanding": "Travel briefing for Tokyo: weather and travel news",
+            "steps": [
+                _step(1, "Fetch current weather in Tokyo", "weather_fetch", {"city": "Tokyo"}, []),
+                _step(2, "Fetch travel news about Tokyo", "news_fetch", {"query": "Tokyo travel", "max_results": 5}, []),
+                _step(3, "Combine weather and news into a briefing", None, {}, [1, 2])
+            ],
+            "expected_output": "Tokyo weather and recent travel news"
+        }
+    },
+    {
+        "id": "trip-briefing-template",
+        "task": "I am travelling to Berlin next week, brief me on the weather there and any relevant travel news",
+        "plan": {
+            "task_understanding": "Travel briefing for Berlin: weather and travel news",
+            "steps": [
+                _step(1, "Fetch current weather in Berlin", "weather_fetch", {"city": "Berlin"}, []),
+                _step(2, "Fetch travel news about Berlin", "news_fetch", {"query": "Berlin travel", "max_results": 5}, []),
+                _step(3, "Combine weather and news into a briefing", None, {}, [1, 2])
+            ],
+            "expected_output": "Berlin weather and recent travel news"
+        }
+    },
+    {
+        "id": "framework-comparison",
+        "task": "Compare the most popular Rust and Go web frameworks on GitHub and tell me which is trending in the news",
+        "plan": {
+            "task_understanding": "Compare Rust and Go web frameworks by popularity and news coverage",
+            "steps": [
+                _step(1, "Search Rust web frameworks", "github_search", {"query": "rust web framework", "max_results": 5}, []),
+                _step(2, "Search Go web frameworks", "github_search", {"query": "go web framework", "max_results": 5}, []),
+                _step(3, "Fetch news about web frameworks", "news_fetch", {"query": "web frameworks", "max_results": 5}, []),
+                _step(4, "Compare stars and news mentions", None, {}, [1, 2, 3])
+            ],
+            "expected_output": "Top frameworks of each language with stars, and related news"
+        }
+    },
+    {
+        "id": "multi-city",
+        "task": "Which is warmer right now, Delhi, Sydney or New York?",
+        "plan": {
+            "task_understanding": "Compare current temperatures of three cities",
+            "steps": [
+                _step(1, "Fetch weather in Delhi", "weather_fetch", {"city": "Delhi"}, []),
+                _step(2, "Fetch weather in Sydney", "weather_fetch", {"city": "Sydney"}, []),
+                _step(3, "Fetch weather in New York", "weather_fetch", {"city": "New York"}, []),
+                _step(4, "Rank the cities by temperature", None, {}, [1, 2, 3])
+            ],
+            "expected_output": "The warmest city with all three temperatures"
+        }
+    },
+    {
+        "id": "research-digest",
+        "task": "Put together a digest on LLM agents: the leading open-source projects and this week's coverage",
+        "plan": {
+            "task_understanding": "Digest of open-source LLM agent projects and recent news",
+            "steps": [
+                _step(1, "Search LLM agent repositories", "github_search", {"query": "llm agents", "max_results": 10}, []),
+                _step(2, "Fetch news about LLM agents", "news_fetch", {"query": "LLM agents", "max_results": 10}, []),
+                _step(3, "Write the digest", None, {}, [1, 2])
+            ],
+            "expected_output": "Top projects with stars and descriptions, plus headlines"
+        }
+    },
+    {
+        "id": "sequential-dependency",
+        "task": "Find the most starred weather app on GitHub and then check the weather in the city it was built for",
+        "plan": {
+            "task_understanding": "Look up a weather app, then the weather in its home city",
+            "steps": [
+                _step(1, "Search weather apps", "github_search", {"query": "weather app", "max_results": 3}, []),
+                _step(2, "Fetch weather in San Francisco", "weather_fetch", {"city": "San Francisco"}, [1]),
+                _step(3, "Summarize the app and the weather", None, {}, [1, 2])
+            ],
+            "expected_output": "The app and current weather in its city"
+        }
+    }
+]
+
+
+def load_corpus(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load benchmark tasks
+    
+    Args:
+        path: JSONL file of {"id", "task", optional "plan"} objects (built-in corpus if None)
+        
+    Returns:
+        Task entries
+    """
+    if path is None:
+        return [dict(entry) for entry in CORPUS]
+    
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {"task": entry}
+            entry.setdefault("id", f"line-{line_number}")
+            entries.append(entry)
+    return entries
@@ -0,0 +1,461 @@
+"""
+Benchmark Runner
+Runs the corpus through the full pipeline against simulated backends and compares runs
+"""
+
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Any, List, Optional, Tuple
+
+from batch import BatchRunner, percentile
+from core import Cassette, configure_tracer, run_sync
+from main import AIOperationsAssistant
+from tools import configure_tool_cache, configure_retry_budget, configure_circuit_breaker, configure_hedger, configure_single_flight
+from .backends import FakeChatBackend, FakeHTTPBackend, LatencyModel
+from .corpus import load_corpus
+
+
+# sequential: one task at a time, steps one after another
+# parallel: one task at a time, independent steps at the same time
+# concurrent: many tasks in flight on one event loop (batch mode)
+MODES = ("sequential", "parallel", "concurrent")
+
+# Span names reported per stage
+STAGES = ("task", "planning", "execution", "verification", "response", "step", "tool_call", "http", "llm_call")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Settings from .env that would make runs depend on the machine or on earlier runs
+ISOLATED_ENV = (
+    "LLM_CACHE_PATH", "TOOL_CACHE_PATH", "TRACING", "TRACE_EXPORT_PATH", "EXECUTION_LOG_PATH", "HEDGE_REQUESTS",
+    "CASSETTE_RECORD", "CASSETTE_REPLAY"
+)
+
+
+class Benchmark:
+    """
+    Offline pipeline benchmark
+    
+    Each mode gets a freshly built assistant whose LLM client and tool HTTP
+    clients are simulated, and fresh shared caches, breakers and retry
+    budget, so modes do not warm up each other. Everything between the
+    backends (planner, executor, verifier, caches, retries, tracing) is the
+    real code. Stage latencies come from the tracer's spans.
+    
+    With a cassette, recorded production traffic is replayed instead of
+    the simulated backends (at replay_latency times the recorded
+    latencies), and the corpus defaults to the tasks it was recorded from.
+    
+    With repeat > 1 the corpus is run again on the same assistant, so later
+    passes measure the warm path (plan templates, LLM and tool caches).
+    """
+    
+    def __init__(
+        self,
+        corpus: Optional[List[Dict[str, Any]]] = None,
+        llm_latency: Optional[LatencyModel] = None,
+        tool_latency: Optional[LatencyModel] = None,
+        host_latency: Optional[Dict[str, LatencyModel]] = None,
+        items: int = 10,
+        text_chars: int = 200,
+        response_chars: int = 600,
+        repeat: int = 1,
+        concurrency: int = 8,
+        fused: bool = False,
+        hedge: bool = False,
+        deadline: Optional[float] = None,
+        seed: int = 0,
+        cassette_path: Optional[str] = None,
+        replay_latency: float = 1.0
+    ):
+        """
+        Args:
+            corpus: Task entries (built-in corpus if None)
+            llm_latency: Simulated OpenAI latency and error rate
+            tool_latency: Simulated tool API latency and error rate
+            host_latency: Host -> latency model overrides for tool APIs
+            items: Most entries in a tool list response
+            text_chars: Length of free text in tool responses
+            response_chars: Length of generated responses
+            repeat: Times the corpus is run per mode
+            concurrency: Tasks in flight at once in concurrent mode
+            fused: Use the fused verify-and-respond call
+            hedge: Enable request hedging for tool calls
+            deadline: Time budget per task in seconds (assistant default if None)
+            seed: Random seed of the simulated backends
+            cassette_path: Cassette replayed instead of the simulated backends (optional)
+            replay_latency: Multiple of the recorded latencies waited when replaying
+        """
+        if corpus is None and cassette_path:
+            corpus = Cassette(cassette_path, mode="replay").tasks()
+            if not corpus:
+                raise ValueError(f"Cassette {cassette_path} records no tasks; pass a corpus")
+        self.corpus = corpus if corpus is not None else load_corpus()
+        self.llm_latency = llm_latency or LatencyModel(median=0.3, sigma=0.4)
+        self.tool_latency = tool_latency or LatencyModel(median=0.15, sigma=0.5)
+        self.host_latency = host_latency or {}
+        self.items = items
+        self.text_chars = text_chars
+        self.response_chars = response_chars
+        self.repeat = max(1, repeat)
+        self.concurrency = max(1, concurrency)
+        self.fused = fused
+        self.hedge = hedge
+        self.deadline = deadline
+        self.seed = seed
+        self.cassette_path = cassette_path
+        self.replay_latency = replay_latency
+    
+    def run(self, modes: Tuple[str, ...] = MODES) -> Dict[str, Any]:
+        """
+        Benchmark each mode
+        
+        Args:
+            modes: Modes to run, in order
+            
+        Returns:
+            Results: run metadata, configuration, and a report per mode
+        """
+        commit, dirty = git_revision()
+        results = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": commit,
+            "dirty": dirty,
+            "python": platform.python_version(),
+            "config": self.get_config(),
+            "modes": {}
+        }
+        
+        for mode in modes:
+            if mode not in MODES:
+                raise ValueError(f"mode must be one of {', '.join(MODES)}")
+            results["modes"][mode] = self.run_mode(mode)
+        
+        return results
+    
+    def run_mode(self, mode: str) -> Dict[str, Any]:
+        """
+        Run the corpus in one mode
+        
+        Args:
+            mode: "sequential", "parallel" or "concurrent"
+            
+        Returns:
+            Task counts, throughput in tasks per second, per-stage latency
+            percentiles in milliseconds, and backend call counts
+        """
+        tasks = self._tasks()
+        assistant, backends, tracer = self.build_assistant(max_spans=len(tasks) * 100)
+        assistant.executor.parallel = mode != "sequential"
+        succeeded = 0
+        
+        # Keep the pipeline's own prints out of the report
+        with redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            if mode == "concurrent":
+                runner = BatchRunner(assistant, self.concurrency, deadline=self.deadline)
+                source = io.StringIO("".join(json.dumps({"id": task_id, "task": task}) + "\n" for task_id, task in tasks))
+                report = run_sync(runner.run(source, io.StringIO()))
+                succeeded = report["succeeded"]
+            else:
+                for task_id, task in tasks:
+                    result = assistant.process_task(task, verbose=False, deadline=self.deadline, task_id=task_id)
+                    succeeded += int(bool(result.get("success")))
+            wall_seconds = time.perf_counter() - started
+        
+        spans = tracer.recent_spans()
+        tracer.enabled = False
+        
+        return {
+            "tasks": len(tasks),
+            "succeeded": succeeded,
+            "failed": len(tasks) - succeeded,
+            "wall_seconds": round(wall_seconds, 3),
+            "throughput": round(len(tasks) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+            "stages": stage_latencies(spans),
+            "planning_sources": _count(span["attributes"].get("source") for span in spans if span["name"] == "planning"),
+            "backends": {name: backend.get_stats() for name, backend in backends.items()}
+        }
+    
+    def build_assistant(self, max_spans: int = 10000) -> Tuple[AIOperationsAssistant, Dict[str, Any], Any]:
+        """
+        Build an assistant wired to simulated backends (or a cassette), with fresh shared state
+        
+        Args:
+            max_spans: Spans the tracer keeps in memory
+            
+        Returns:
+            Tuple of (assistant, backend name -> backend with get_stats(), tracer)
+        """
+        for name in ISOLATED_ENV:
+            os.environ[name] = ""
+        os.environ["FUSED_VERIFIER"] = "1" if self.fused else ""
+        for name in ("OPENAI_API_KEY", "OPENWEATHER_API_KEY", "NEWS_API_KEY"):
+            os.environ.setdefault(name, "benchmark")
+        
+        with redirect_stdout(io.StringIO()):
+            assistant = AIOperationsAssistant()
+        
+        configure_tool_cache()
+        configure_retry_budget()
+        configure_single_flight()
+        configure_hedger(enabled=self.hedge)
+        for name in assistant.tools:
+            configure_circuit_breaker(name)
+        tracer = configure_tracer(enabled=True, max_spans=max_spans)
+        
+        if self.cassette_path:
+            cassette = Cassette(self.cassette_path, mode="replay", latency=self.replay_latency)
+            cassette.install(assistant.llm, assistant.tools.values())
+            return assistant, {"cassette": cassette}, tracer
+        
+        llm = FakeChatBackend(
+            self.llm_latency,
+            plans={entry["task"]: entry["plan"] for entry in self.corpus if entry.get("plan")},
+            response_chars=self.response_chars,
+            seed=self.seed
+        )
+        llm.install(assistant.llm)
+        
+        http = FakeHTTPBackend(self.tool_latency, self.host_latency, self.items, self.text_chars, seed=self.seed)
+        for tool in assistant.tools.values():
+            tool.http_client = http
+        
+        return assistant, {"llm": llm, "http": http}, tracer
+    
+    def get_config(self) -> Dict[str, Any]:
+        """Settings that shape the results, saved with them"""
+        return {
+            "tasks": len(self.corpus),
+            "repeat": self.repeat,
+            "concurrency": self.concurrency,
+            "llm_latency": self.llm_latency.to_dict(),
+            "tool_latency": self.tool_latency.to_dict(),
+            "host_latency": {host: model.to_dict() for host, model in sorted(self.host_latency.items())},
+            "items": self.items,
+            "text_chars": self.text_chars,
+            "response_chars": self.response_chars,
+            "fused": self.fused,
+            "hedge": self.hedge,
+            "deadline": self.deadline,
+            "seed": self.seed,
+            "cassette": self.cassette_path,
+            "replay_latency": self.replay_latency if self.cassette_path else None
+        }
+    
+    def _tasks(self) -> List[Tuple[str, str]]:
+        """(task id, task) for every run of every corpus entry"""
+        tasks = []
+        for run in range(self.repeat):
+            for index, entry in enumerate(self.corpus):
+                task_id = str(entry.get("id") or f"task-{index + 1}")
+                tasks.append((task_id if self.repeat == 1 else f"{task_id}#{run + 1}", entry["task"]))
+        return tasks
+
+
+def stage_latencies(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Latency percentiles per stage
+    
+    Args:
+        spans: Finished span dicts
+        
+    Returns:
+        Stage -> count, errors, mean, p50, p95, p99 and max in milliseconds
+    """
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for span in spans:
+        if span["name"] not in STAGES:
+            continue
+        durations.setdefault(span["name"], []).append(span["duration_ms"])
+        errors[span["name"]] = errors.get(span["name"], 0) + int(span["status"] == "error")
+    
+    stages = {}
+    for name in STAGES:
+        values = sorted(durations.get(name, []))
+        if not values:
+            continue
+        stages[name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "mean_ms": round(sum(values) / len(values), 3),
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+            "max_ms": round(values[-1], 3)
+        }
+    return stages
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.10,
+    min_delta_ms: float = 1.0
+) -> List[Dict[str, Any]]:
+    """
+    Find regressions against an earlier run
+    
+    Args:
+        current: Results of this run
+        baseline: Results to compare with
+        threshold: Relative change that counts (0.10 = 10%)
+        min_delta_ms: Smallest p95 increase that counts, to ignore noise on sub-millisecond stages
+        
+    Returns:
+        One entry per regression: mode, metric, baseline and current value, relative change
+    """
+    regressions = []
+    for mode, report in current["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if previous is None:
+            continue
+        
+        if previous["throughput"] > 0:
+            change = report["throughput"] / previous["throughput"] - 1
+            if change < -threshold:
+                regressions.append(_regression(mode, "throughput", previous["throughput"], report["throughput"], change))
+        
+        for stage, latency in report["stages"].items():
+            before = previous["stages"].get(stage)
+            if before is None or not before["p95_ms"]:
+                continue
+            change = latency["p95_ms"] / before["p95_ms"] - 1
+            if change > threshold and latency["p95_ms"] - before["p95_ms"] >= min_delta_ms:
+                regressions.append(_regression(mode, f"{stage} p95_ms", before["p95_ms"], latency["p95_ms"], change))
+    
+    return regressions
+
+
+def save_results(results: Dict[str, Any], directory: str = RESULTS_DIR) -> str:
+    """
+    Write results to <directory>/<timestamp>_<commit>.json
+    
+    Args:
+        results: Benchmark results
+        directory: Results directory (created if missing)
+        
+    Returns:
+        Path of the written file
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    suffix = results["commit"] + ("-dirty" if results["dirty"] else "")
+    path = os.path.join(directory, f"{stamp}_{suffix}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def latest_results(directory: str = RESULTS_DIR, exclude: Optional[str] = None) -> Optional[str]:
+    """
+    Most recent saved results
+    
+    Args:
+        directory: Results directory
+        exclude: Path to skip (usually the file just written)
+        
+    Returns:
+        Path, or None if there are no earlier results
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "*.json")))
+    if exclude is not None:
+        paths = [path for path in paths if os.path.abspath(path) != os.path.abspath(exclude)]
+    return paths[-1] if paths else None
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Read saved results"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_results(
+    results: Dict[str, Any],
+    regressions: Optional[List[Dict[str, Any]]] = None,
+    baseline: Optional[Dict[str, Any]] = None
+) -> str:
+    """Render results, and the comparison with a baseline when given, for the terminal"""
+    config = results["config"]
+    lines = [
+        f"{'='*60}",
+        f"BENCHMARK RESULTS ({results['commit']}{' +changes' if results['dirty'] else ''})",
+        f"{'='*60}"
+    ]
+    if config.get("cassette"):
+        lines.append(
+            f"Corpus: {config['tasks']} tasks x {config['repeat']}; "
+            f"replaying {config['cassette']} at {config['replay_latency']}x recorded latency"
+        )
+    else:
+        lines.append(
+            f"Corpus: {config['tasks']} tasks x {config['repeat']}; "
+            f"LLM median {config['llm_latency']['median']}s, tools median {config['tool_latency']['median']}s"
+        )
+    
+    for mode, report in results["modes"].items():
+        lines.append("")
+        lines.append(
+            f"{mode}: {report['succeeded']}/{report['tasks']} succeeded in {report['wall_seconds']}s, "
+            f"{report['throughput']} tasks/s"
+        )
+        lines.append(f"  {'stage':<14}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'errors':>8}")
+        for stage, latency in report["stages"].items():
+            lines.append(
+                f"  {stage:<14}{latency['count']:>7}{latency['p50_ms']:>11.1f}"
+                f"{latency['p95_ms']:>11.1f}{latency['p99_ms']:>11.1f}{latency['errors']:>8}"
+            )
+        misses = report["backends"].get("cassette", {}).get("misses")
+        if misses:
+            lines.append(f"  {misses} requests were not in the cassette (this run's traffic differs from the recording)")
+    
+    if baseline is not None:
+        lines.append("")
+        lines.append(f"Compared with {baseline['commit']} ({baseline['created_at']}):")
+        if baseline.get("config") != config:
+            lines.append("  Note: the baseline was run with different settings")
+        if not regressions:
+            lines.append("  No regressions")
+        for entry in regressions or []:
+            lines.append(
+                f"  ✗ {entry['mode']} {entry['metric']}: {entry['baseline']} -> {entry['current']} "
+                f"({entry['change']:+.0%})"
+            )
+    
+    return "\n".join(lines)
+
+
+def git_revision() -> Tuple[str, bool]:
+    """Short commit hash of the working tree and whether it has uncommitted changes"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(status)
+
+
+def _regression(mode: str, metric: str, before: float, after: float, change: float) -> Dict[str, Any]:
+    return {"mode": mode, "metric": metric, "baseline": before, "current": after, "change": round(change, 4)}
+
+
+def _count(values) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[str(value)] = counts.get(str(value), 0) + 1
+    return counts
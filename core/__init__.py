@@ -0,0 +1,26 @@
+from .deadline import Deadline, current_deadline, deadline_scope, call_timeout, short_of_time
+from .task import current_task_id, new_task_id, task_scope
+from .loop import get_background_loop, submit, run_sync, iterate_sync
+from .tracing import Span, Tracer, get_tracer, configure_tracer, span
+from .cassette import Cassette
+
+__all__ = [
+    'Deadline',
+    'current_deadline',
+    'deadline_scope',
+    'call_timeout',
+    'short_of_time',
+    'current_task_id',
+    'new_task_id',
+    'task_scope',
+    'get_background_loop',
+    'submit',
+    'run_sync',
+    'iterate_sync',
+    'Span',
+    'Tracer',
+    'get_tracer',
+    'configure_tracer',
+    'span',
+    'Cassette'
+]
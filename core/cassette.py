@@ -0,0 +1,499 @@
+"""
+Cassettes
+Record every LLM and tool HTTP exchange with its timing, and serve them back offline
+"""
+
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .deadline import call_timeout
+from .tracing import span
+
+
+MODES = ("record", "replay")
+
+# Query parameters and headers holding credentials; never written to a cassette
+SECRET_PARAMS = {"appid", "apikey", "api_key", "key", "token", "access_token"}
+SECRET_HEADERS = {"authorization", "cookie", "set-cookie"}
+
+# Credentials inside error messages: query string values (requests puts the full
+# URL in its errors) and bearer tokens
+SECRET_TEXT = re.compile(
+    r"(?P<name>[?&;](?:" + "|".join(sorted(SECRET_PARAMS)) + r")=|\bBearer\s+)[^&;\s'\"]+",
+    re.IGNORECASE
+)
+
+# Request arguments that do not change the answer (a streamed and a plain completion
+# of the same prompt replay each other)
+VOLATILE_LLM_ARGS = {"timeout", "stream"}
+
+# Characters of the prompt kept in an entry, to make cassettes readable
+PREVIEW = 120
+
+
+class Cassette:
+    """
+    Recorded LLM and tool HTTP traffic
+    
+    In record mode the LLM provider's async client and each tool's HTTP client
+    are wrapped, and every exchange is appended to a JSON lines file (gzip
+    compressed when the path ends in .gz) with its start time, its duration
+    and, for streams, the offset of every chunk. Errors are recorded too.
+    Credentials are left out.
+    
+    In replay mode the same clients are replaced by ones that answer from
+    the file without touching the network. Requests are matched by a hash
+    of the normalized request (whitespace collapsed, credentials and
+    timeouts dropped); identical requests get their recordings in order,
+    the last one repeating once they run out. A request that was never
+    recorded raises LookupError. With latency > 0 every answer is delayed
+    by its recorded duration times latency, and a call whose delayed
+    answer would arrive after its timeout fails with TimeoutError, as the
+    live call would have.
+    """
+    
+    def __init__(self, path: str, mode: str = "record", latency: float = 0.0):
+        """
+        Args:
+            path: Cassette file (.gz for gzip)
+            mode: "record" or "replay"
+            latency: Replay only; multiple of the recorded latencies to wait
+                (0 answers at once, 1 reproduces the original timings)
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.latency = max(0.0, latency)
+        
+        self._file = None
+        self._recordings: Dict[str, deque] = {}
+        self._tasks: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.stats = {
+            "recorded": 0,
+            "replayed": 0,
+            "misses": 0
+        }
+        
+        if mode == "replay":
+            self._load()
+        else:
+            atexit.register(self.close)
+    
+    def install(self, llm, tools: Iterable[Any] = ()):
+        """
+        Record or replay the traffic of an LLM provider and tools
+        
+        Args:
+            llm: LLMProvider whose async_client is wrapped or replaced
+            tools: Tools whose HTTP client (per-instance, or the shared one at
+                the time of the call) is wrapped or replaced
+        """
+        if self.mode == "record":
+            llm.async_client = _chat_client(self._arecording_create(llm.async_client))
+        else:
+            llm.async_client = _chat_client(self._areplay_create)
+        
+        for tool in tools:
+            if self.mode == "record":
+                tool.http_client = _RecordingHTTP(self, tool.http)
+            else:
+                tool.http_client = _ReplayHTTP(self, tool.http)
+    
+    def record_task(self, task_id: str, task: str):
+        """Note a task, so a replay knows which tasks the traffic came from (record mode only)"""
+        if self.mode == "record":
+            self._write({"kind": "task", "at": round(time.time(), 3), "task_id": task_id, "task": task})
+    
+    def tasks(self) -> List[Dict[str, Any]]:
+        """Tasks noted in a replayed cassette, as {"id", "task"} entries in recording order"""
+        return [{"id": entry["task_id"], "task": entry["task"]} for entry in self._tasks]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get recorded, replayed and missed request counts"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["recordings"] = sum(len(entries) for entries in self._recordings.values())
+        stats["mode"] = self.mode
+        return stats
+    
+    def close(self):
+        """Flush and close the cassette file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def _arecording_create(self, client):
+        """Wrap an async client's chat.completions.create"""
+        async def create(**kwargs):
+            key, request = self._llm_request(kwargs)
+            at, started = time.time(), time.perf_counter()
+            try:
+                response = await client.chat.completions.create(**kwargs)
+            except Exception as e:
+                self._record_error("llm", key, request, at, time.perf_counter() - started, e)
+                raise
+            
+            duration = time.perf_counter() - started
+            if kwargs.get("stream"):
+                return self._arecord_stream(key, request, at, started, duration, response)
+            self._record("llm", key, request, at, duration, _completion_data(response))
+            return response
+        return create
+    
+    async def _arecord_stream(self, key: str, request: Dict[str, Any], at: float, started: float, duration: float, stream) -> AsyncIterator[Any]:
+        """Pass an async stream through, recording each chunk's offset from the request start"""
+        chunks = []
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks.append([round(time.perf_counter() - started, 4), delta])
+                yield chunk
+        finally:
+            # Also reached when the consumer stops early; the chunks read so far are kept
+            self._record("llm", key, request, at, duration, {"chunks": chunks})
+    
+    def _record(self, kind: str, key: str, request: Dict[str, Any], at: float, duration: float, response: Dict[str, Any]):
+        """Append one exchange"""
+        self._write({
+            "kind": kind,
+            "key": key,
+            "at": round(at, 3),
+            "duration": round(duration, 4),
+            "request": request,
+            "response": response
+        })
+        with self._lock:
+            self.stats["recorded"] += 1
+    
+    def _record_error(self, kind: str, key: str, request: Dict[str, Any], at: float, duration: float, error: Exception):
+        """Append one exchange that raised, with credentials removed from the message"""
+        message = SECRET_TEXT.sub(r"\g<name>REDACTED", str(error))
+        self._record(kind, key, request, at, duration, {"error": message[:500], "error_type": _error_type(error)})
+    
+    def _write(self, entry: Dict[str, Any]):
+        """Append an entry to the file"""
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self.path is None:
+                return
+            try:
+                if self._file is None:
+                    opener = gzip.open if self.path.endswith(".gz") else open
+                    self._file = opener(self.path, "at", encoding="utf-8")
+                self._file.write(line)
+            except OSError as e:
+                # Recording must never break a task; stop recording after the first failure
+                print(f"Warning: could not write cassette {self.path}: {e}")
+                self.path = None
+    
+    def _load(self):
+        """Read every recording, grouped by request key"""
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a partial last line
+                        continue
+                    if entry.get("kind") == "task":
+                        self._tasks.append(entry)
+                    elif entry.get("key"):
+                        self._recordings.setdefault(entry["key"], deque()).append(entry)
+            except EOFError:
+                # A gzip cassette of a killed run has no trailer; everything before it is usable
+                pass
+    
+    def _take(self, kind: str, key: str, description: str) -> Dict[str, Any]:
+        """Next recording for a request"""
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise LookupError(f"No recorded {kind} response for {description} in cassette {self.path}")
+            self.stats["replayed"] += 1
+            return entries.popleft() if len(entries) > 1 else entries[0]
+    
+    async def _areplay_create(self, **kwargs) -> Any:
+        """Answer a chat completion from the cassette without blocking the event loop"""
+        key, request = self._llm_request(kwargs)
+        entry = self._take("LLM", key, repr(request.get("prompt", "")))
+        wait, timed_out = self._delay(entry["duration"], kwargs.get("timeout"))
+        await asyncio.sleep(wait)
+        _raise_recorded(entry, timed_out)
+        
+        if kwargs.get("stream"):
+            return self._areplay_stream(entry)
+        return _completion(entry["response"])
+    
+    async def _areplay_stream(self, entry: Dict[str, Any]) -> AsyncIterator[Any]:
+        previous = entry["duration"]
+        for offset, delta in _chunks(entry):
+            await asyncio.sleep(max(0.0, offset - previous) * self.latency)
+            previous = offset
+            yield _chunk(delta)
+    
+    def _delay(self, duration: float, timeout: Optional[float]) -> Tuple[float, bool]:
+        """Seconds to wait before answering, and whether the call times out first"""
+        wait = duration * self.latency
+        if self.latency and timeout is not None and wait > timeout:
+            return timeout, True
+        return wait, False
+    
+    def _llm_request(self, kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Key of a chat completion request, and the short description stored with it"""
+        normalized = {name: value for name, value in kwargs.items() if name not in VOLATILE_LLM_ARGS}
+        normalized["messages"] = [
+            {"role": message["role"], "content": _squash(message.get("content") or "")}
+            for message in kwargs.get("messages", [])
+        ]
+        messages = normalized["messages"]
+        return _key(normalized), {
+            "model": kwargs.get("model"),
+            "stream": bool(kwargs.get("stream")),
+            "prompt": messages[-1]["content"][:PREVIEW] if messages else ""
+        }
+    
+    @staticmethod
+    def _http_request(url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> Tuple[str, Dict[str, Any]]:
+        """Key of a GET request and its normalized form (without credentials)"""
+        request = {
+            "method": "GET",
+            "url": url.split("?", 1)[0],
+            "params": {
+                name: _squash(str(value))
+                for name, value in sorted((params or {}).items())
+                if name.lower() not in SECRET_PARAMS
+            },
+            # A revalidation and a plain request get different answers (304 or 200)
+            "conditional": any(name.lower() == "if-none-match" for name in (headers or {}))
+        }
+        return _key(request), request
+
+
+class _RecordingHTTP:
+    """HTTP client wrapper that records every exchange"""
+    
+    def __init__(self, cassette: Cassette, client):
+        self.cassette = cassette
+        self.client = client
+    
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        key, request = self.cassette._http_request(url, params, headers)
+        at, started = time.time(), time.perf_counter()
+        try:
+            response = self.client.get(url, params=params, headers=headers, timeout=timeout)
+        except Exception as e:
+            self.cassette._record_error("http", key, request, at, time.perf_counter() - started, e)
+            raise
+        self.cassette._record("http", key, request, at, time.perf_counter() - started, _response_data(response))
+        return response
+    
+    async def aget(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        key, request = self.cassette._http_request(url, params, headers)
+        at, started = time.time(), time.perf_counter()
+        try:
+            response = await self.client.aget(url, params=params, headers=headers, timeout=timeout)
+        except Exception as e:
+            self.cassette._record_error("http", key, request, at, time.perf_counter() - started, e)
+            raise
+        self.cassette._record("http", key, request, at, time.perf_counter() - started, _response_data(response))
+        return response
+    
+    def __getattr__(self, name: str) -> Any:
+        # Stats, timeouts and close() come from the wrapped client
+        return getattr(self.client, name)
+
+
+class _ReplayHTTP:
+    """HTTP client answering from a cassette; timeouts follow the replaced client's settings"""
+    
+    def __init__(self, cassette: Cassette, client=None):
+        self.cassette = cassette
+        self.client = client
+    
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> "ReplayedResponse":
+        entry, host = self._entry(url, params, headers)
+        wait, timed_out = self.cassette._delay(entry["duration"], self._timeout(host, timeout))
+        with span("http", target=host, replayed=True) as trace:
+            time.sleep(wait)
+            _raise_recorded(entry, timed_out)
+            response = ReplayedResponse(entry["response"])
+            trace.set(status_code=response.status_code)
+        return response
+    
+    async def aget(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> "ReplayedResponse":
+        entry, host = self._entry(url, params, headers)
+        wait, timed_out = self.cassette._delay(entry["duration"], self._timeout(host, timeout))
+        with span("http", target=host, replayed=True) as trace:
+            await asyncio.sleep(wait)
+            _raise_recorded(entry, timed_out)
+            response = ReplayedResponse(entry["response"])
+            trace.set(status_code=response.status_code)
+        return response
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return self.cassette.get_stats()
+    
+    def _entry(self, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> Tuple[Dict[str, Any], str]:
+        key, request = self.cassette._http_request(url, params, headers)
+        entry = self.cassette._take("HTTP", key, f"GET {request['url']} {request['params']}")
+        return entry, urlsplit(url).hostname or ""
+    
+    def _timeout(self, host: str, timeout: Optional[float]) -> Optional[float]:
+        """Timeout the live call would have had, capped by the task deadline"""
+        if timeout is None and hasattr(self.client, "timeout_for"):
+            timeout = self.client.timeout_for(host)
+        return call_timeout(timeout) if timeout is not None else None
+
+
+class ReplayedResponse:
+    """Recorded HTTP response, with the parts of the requests/httpx interface the tools use"""
+    
+    def __init__(self, data: Dict[str, Any]):
+        self.status_code = data["status_code"]
+        self.headers = _Headers(data.get("headers") or {})
+        self.text = data.get("body", "")
+    
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class _Headers(dict):
+    """Case-insensitive header mapping"""
+    
+    def __init__(self, headers: Dict[str, str]):
+        super().__init__((name.lower(), value) for name, value in headers.items())
+    
+    def __getitem__(self, name: str) -> str:
+        return super().__getitem__(name.lower())
+    
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and super().__contains__(name.lower())
+    
+    def get(self, name: str, default: Any = None) -> Any:
+        return super().get(name.lower(), default)
+
+
+def _chat_client(create) -> Any:
+    """Object exposing chat.completions.create, like the OpenAI clients"""
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def _completion_data(response: Any) -> Dict[str, Any]:
+    """What a recorded chat completion keeps: text, function call arguments and token usage"""
+    message = response.choices[0].message
+    usage = getattr(response, "usage", None)
+    return {
+        "content": message.content,
+        "tool_calls": [call.function.arguments for call in (getattr(message, "tool_calls", None) or [])],
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
+        } if usage is not None else None
+    }
+
+
+def _completion(data: Dict[str, Any]) -> Any:
+    """Chat completion object rebuilt from a recording (a recorded stream is joined)"""
+    if "chunks" in data:
+        data = {"content": "".join(delta for _, delta in data["chunks"]), "usage": None}
+    tool_calls = [SimpleNamespace(function=SimpleNamespace(arguments=arguments)) for arguments in data.get("tool_calls") or []]
+    message = SimpleNamespace(content=data.get("content"), tool_calls=tool_calls or None)
+    usage = SimpleNamespace(**data["usage"]) if data.get("usage") else None
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _chunks(entry: Dict[str, Any]) -> List[List[Any]]:
+    """(offset, delta) pairs of a recording; a plain completion is one chunk"""
+    data = entry["response"]
+    if "chunks" in data:
+        return data["chunks"]
+    return [[entry["duration"], data.get("content") or ""]]
+
+
+def _chunk(delta: str) -> Any:
+    """Stream chunk object carrying one text delta"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+def _response_data(response: Any) -> Dict[str, Any]:
+    """What a recorded HTTP response keeps: status, headers (without cookies) and body"""
+    return {
+        "status_code": response.status_code,
+        "headers": {name: value for name, value in response.headers.items() if name.lower() not in SECRET_HEADERS},
+        "body": response.text
+    }
+
+
+def _raise_recorded(entry: Dict[str, Any], timed_out: bool):
+    """Raise what the live call raised, or a timeout when the replayed latency exceeds the call's timeout"""
+    if timed_out:
+        raise TimeoutError("Request timed out (replayed latency exceeds the timeout)")
+    
+    error = entry["response"].get("error") if isinstance(entry["response"], dict) else None
+    if error is None:
+        return
+    if entry["response"].get("error_type") == "timeout":
+        raise TimeoutError(error)
+    if entry["response"].get("error_type") == "connection":
+        raise ConnectionError(error)
+    raise Exception(error)
+
+
+def _error_type(error: BaseException) -> str:
+    """Structural type of a recorded exception (requests, httpx and openai timeouts included)"""
+    name = type(error).__name__.lower()
+    if isinstance(error, TimeoutError) or "timeout" in name:
+        return "timeout"
+    if isinstance(error, ConnectionError) or "connect" in name:
+        return "connection"
+    return "error"
+
+
+def _squash(text: str) -> str:
+    """Collapse runs of whitespace, so formatting changes do not break matching"""
+    return " ".join(text.split())
+
+
+def _key(request: Dict[str, Any]) -> str:
+    """Stable hash of a normalized request"""
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:20]
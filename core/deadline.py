@@ -0,0 +1,150 @@
+"""
+Deadline
+Per-task time budget shared by every stage through a context variable
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, List, Optional
+
+
+# Shortest timeout handed to a network call, so a nearly spent budget
+# still produces a clean timeout error instead of an invalid argument
+MIN_CALL_TIMEOUT = 0.1
+
+
+class Deadline:
+    """
+    Time budget for one task
+    
+    The deadline is installed with deadline_scope() and read with
+    current_deadline(); asyncio tasks and asyncio.to_thread inherit it
+    automatically, worker threads need contextvars.copy_context(). Stages
+    consult it to size their timeouts and to decide whether there is time
+    left for expensive work, and note() what they skipped or downgraded.
+    """
+    
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: Total budget
+        """
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+        
+        self._lock = threading.Lock()
+        self._pressure: List[Dict[str, Any]] = []
+    
+    def remaining(self) -> float:
+        """Seconds left (0 once expired)"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        """Whether the budget is spent"""
+        return self.remaining() <= 0
+    
+    def timeout(self, default: float) -> float:
+        """
+        Timeout for one call
+        
+        Args:
+            default: The call's usual timeout
+            
+        Returns:
+            The smaller of default and the remaining budget
+        """
+        return max(MIN_CALL_TIMEOUT, min(default, self.remaining()))
+    
+    def note(self, stage: str, action: str):
+        """
+        Record that a stage changed its behaviour to stay within the budget
+        
+        Args:
+            stage: Pipeline stage, e.g. "verification"
+            action: What was skipped or downgraded
+        """
+        with self._lock:
+            self._pressure.append({
+                "stage": stage,
+                "action": action,
+                "remaining": round(self.remaining(), 3)
+            })
+    
+    def report(self) -> Dict[str, Any]:
+        """Budget, time used, and the stages that ran under pressure"""
+        with self._lock:
+            pressure = list(self._pressure)
+        
+        return {
+            "budget": self.seconds,
+            "elapsed": round(time.monotonic() - self.started, 3),
+            "remaining": round(self.remaining(), 3),
+            "pressure": pressure
+        }
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the task running in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Run a block under a deadline
+    
+    Args:
+        seconds: Budget for the block (no deadline if None or <= 0)
+        
+    Yields:
+        The installed Deadline, or None
+    """
+    deadline = Deadline(seconds) if seconds and seconds > 0 else None
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def call_timeout(default: float) -> float:
+    """
+    Timeout for a network call made in the current context
+    
+    Args:
+        default: The call's usual timeout
+        
+    Returns:
+        default, capped by the remaining budget when a deadline is set
+    """
+    deadline = _current.get()
+    return default if deadline is None else deadline.timeout(default)
+
+
+def short_of_time(needed: float, stage: str, action: str) -> bool:
+    """
+    Check whether the current deadline leaves less than needed seconds
+    
+    Records the downgrade on the deadline when it does.
+    
+    Args:
+        needed: Seconds the full version of the stage usually takes
+        stage: Pipeline stage asking
+        action: What the stage does instead (recorded in the report)
+        
+    Returns:
+        True if the stage should skip or downgrade its work
+    """
+    deadline = _current.get()
+    if deadline is None or deadline.remaining() >= needed:
+        return False
+    
+    deadline.note(stage, action)
+    return True
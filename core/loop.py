@@ -0,0 +1,117 @@
+"""
+Background Loop
+Event loop the synchronous API runs the async pipeline on
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+# Marks the end of an iterate_sync() stream
+_END = object()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Shared event loop, running in a daemon thread started on first use
+    
+    Sync calls from any thread run here, so they share one set of async
+    LLM and HTTP connection pools (which belong to the loop they were
+    opened on) with each other and with batch runs.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="background-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "Future[T]":
+    """
+    Start a coroutine on the background loop
+    
+    The coroutine runs in a copy of the caller's context, so the task id
+    and deadline in effect carry over.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        Future of the coroutine's result; cancelling it cancels the coroutine
+        
+    Raises:
+        RuntimeError: If called on the background loop, where waiting for the result would deadlock
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("Blocking call made on the background event loop; await the async version instead")
+    
+    # The scheduling callback, and so the task it creates, runs in a copy of this context
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine on the background loop and wait for its result
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result (its exception is raised)
+    """
+    future = submit(coro)
+    try:
+        return future.result()
+    finally:
+        # Only has an effect when the caller was interrupted (e.g. KeyboardInterrupt)
+        future.cancel()
+
+
+def iterate_sync(stream: AsyncIterator[T]) -> Iterator[T]:
+    """
+    Iterate an async iterator from synchronous code
+    
+    The stream is read by a single task on the background loop, which hands
+    items over as they arrive. Closing the iterator early cancels the task.
+    
+    Args:
+        stream: Async iterator to read
+        
+    Yields:
+        The stream's items (its exception is raised at the end)
+    """
+    items: queue.SimpleQueue = queue.SimpleQueue()
+    
+    async def pump():
+        try:
+            async for item in stream:
+                items.put(item)
+        finally:
+            items.put(_END)
+    
+    future = submit(pump())
+    try:
+        while True:
+            item = items.get()
+            if item is _END:
+                break
+            yield item
+        future.result()
+    finally:
+        future.cancel()
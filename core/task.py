@@ -0,0 +1,44 @@
+"""
+Task Scope
+Identifies the task running in the current context
+"""
+
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+_current: ContextVar[Optional[str]] = ContextVar("task_id", default=None)
+
+
+def new_task_id() -> str:
+    """Generate a short random task id"""
+    return uuid.uuid4().hex[:12]
+
+
+def current_task_id() -> Optional[str]:
+    """Id of the task running in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def task_scope(task_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Run a block as one task
+    
+    Like the deadline, the id reaches asyncio tasks automatically and
+    worker threads through contextvars.copy_context().
+    
+    Args:
+        task_id: Task id (a new one is generated if None)
+        
+    Yields:
+        The task id in effect
+    """
+    task_id = task_id or new_task_id()
+    token = _current.set(task_id)
+    try:
+        yield task_id
+    finally:
+        _current.reset(token)
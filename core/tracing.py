@@ -0,0 +1,349 @@
+"""
+Tracing
+Nested timing spans across the pipeline, with per-stage latency histograms
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, IO, List, Optional, Tuple
+from .task import current_task_id, new_task_id
+
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Span:
+    """
+    One timed operation
+    
+    A span started inside another one (in the same context, including
+    worker threads started with contextvars.copy_context() and asyncio
+    tasks) becomes its child. Spans of a task share the task id as their
+    trace id. Use as a context manager to make the span current for the
+    block, or call finish() for work that cannot sit in one block, such
+    as a generator.
+    """
+    
+    __slots__ = ("tracer", "name", "target", "attributes", "trace_id", "span_id", "parent_id",
+                 "started_at", "_started", "duration", "error", "_token")
+    
+    def __init__(self, tracer: "Tracer", name: str, target: Optional[str], attributes: Dict[str, Any]):
+        """
+        Args:
+            tracer: Tracer receiving the finished span
+            name: Stage or operation, e.g. "planning" or "tool_call"
+            target: What the operation acts on, e.g. a tool name or host (optional)
+            attributes: Extra details
+        """
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.name = name
+        self.target = target
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent is not None else (current_task_id() or new_task_id())
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._token = None
+    
+    def set(self, **attributes):
+        """Attach details, e.g. token counts or an HTTP status"""
+        self.attributes.update(attributes)
+    
+    def finish(self, error: Optional[BaseException] = None):
+        """
+        End the span (later calls are ignored)
+        
+        Args:
+            error: Exception that ended the operation, if any
+        """
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"[:200]
+        self.tracer._finish(self)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready view of the span"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "target": self.target,
+            "started_at": round(self.started_at, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes
+        }
+    
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current_span.reset(self._token)
+        self.finish(exc)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled; every method does nothing"""
+    
+    __slots__ = ()
+    
+    def set(self, **attributes):
+        pass
+    
+    def finish(self, error: Optional[BaseException] = None):
+        pass
+    
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class LatencyBuckets:
+    """Cumulative latency histogram with fixed buckets"""
+    
+    __slots__ = ("counts", "total", "count", "errors")
+    
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+    
+    def add(self, seconds: float, failed: bool):
+        """Record one span"""
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+        self.errors += int(failed)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound below which a fraction q of spans finished (None if empty)"""
+        if not self.count:
+            return None
+        for index, cumulative in enumerate(self.counts):
+            if cumulative >= q * self.count:
+                return BUCKETS[index]
+        return float("inf")
+
+
+class Tracer:
+    """
+    Collects finished spans
+    
+    Each span's duration goes into a histogram keyed by (name, target),
+    LLM token counts are summed, the most recent spans are kept in memory,
+    and with export_path every span is appended to a JSON lines file.
+    While disabled, span() hands out a shared no-op span, so instrumented
+    code costs one attribute check per span.
+    """
+    
+    def __init__(self, enabled: bool = False, export_path: Optional[str] = None, max_spans: int = 1000):
+        """
+        Args:
+            enabled: Whether spans are recorded
+            export_path: JSON lines file receiving every finished span (optional)
+            max_spans: Finished spans kept in memory
+        """
+        self.enabled = enabled
+        self.export_path = export_path
+        
+        self._histograms: Dict[Tuple[str, str], LatencyBuckets] = {}
+        self._tokens: Dict[str, int] = {}
+        self._recent: deque = deque(maxlen=max_spans)
+        self._export: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+    
+    def span(self, name: str, target: Optional[str] = None, **attributes):
+        """
+        Start a span
+        
+        Args:
+            name: Stage or operation
+            target: What the operation acts on (optional)
+            **attributes: Extra details
+            
+        Returns:
+            Span (or the no-op span while disabled)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, target, attributes)
+    
+    def recent_spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Finished spans still in memory, oldest first
+        
+        Args:
+            trace_id: Only spans of this trace (task id)
+            
+        Returns:
+            Span dicts
+        """
+        with self._lock:
+            spans = list(self._recent)
+        return [span.to_dict() for span in spans if trace_id is None or span.trace_id == trace_id]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get span counts, average and approximate p95 latency per (name, target), and token totals"""
+        with self._lock:
+            stages = {}
+            for (name, target), histogram in sorted(self._histograms.items()):
+                key = f"{name}:{target}" if target else name
+                stages[key] = {
+                    "count": histogram.count,
+                    "errors": histogram.errors,
+                    "avg_seconds": round(histogram.total / histogram.count, 4),
+                    "p95_seconds": histogram.quantile(0.95)
+                }
+            tokens = dict(self._tokens)
+        
+        return {"enabled": self.enabled, "stages": stages, "tokens": tokens}
+    
+    def render_prometheus(self) -> str:
+        """
+        Render the histograms and counters in the Prometheus text format
+        
+        Returns:
+            Exposition text
+        """
+        lines = [
+            "# HELP ai_ops_span_duration_seconds Duration of pipeline spans by stage and target",
+            "# TYPE ai_ops_span_duration_seconds histogram"
+        ]
+        errors = [
+            "# HELP ai_ops_span_errors_total Spans that ended with an exception",
+            "# TYPE ai_ops_span_errors_total counter"
+        ]
+        
+        with self._lock:
+            for (name, target), histogram in sorted(self._histograms.items()):
+                labels = f'span="{_escape(name)}",target="{_escape(target)}"'
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    lines.append(f'ai_ops_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'ai_ops_span_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"ai_ops_span_duration_seconds_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"ai_ops_span_duration_seconds_count{{{labels}}} {histogram.count}")
+                errors.append(f"ai_ops_span_errors_total{{{labels}}} {histogram.errors}")
+            tokens = dict(self._tokens)
+        
+        lines.extend(errors)
+        lines.append("# HELP ai_ops_llm_tokens_total LLM tokens used, by kind")
+        lines.append("# TYPE ai_ops_llm_tokens_total counter")
+        for kind, count in sorted(tokens.items()):
+            lines.append(f'ai_ops_llm_tokens_total{{kind="{_escape(kind)}"}} {count}')
+        
+        return "\n".join(lines) + "\n"
+    
+    def close(self):
+        """Close the export file"""
+        with self._lock:
+            if self._export is not None:
+                self._export.close()
+                self._export = None
+    
+    def _finish(self, span: Span):
+        """Record a finished span"""
+        key = (span.name, span.target or "")
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyBuckets()
+            histogram.add(span.duration, span.error is not None)
+            
+            for kind in ("prompt_tokens", "completion_tokens"):
+                count = span.attributes.get(kind)
+                if count:
+                    self._tokens[kind[:-len("_tokens")]] = self._tokens.get(kind[:-len("_tokens")], 0) + count
+            
+            self._recent.append(span)
+            if self.export_path:
+                self._write(span)
+    
+    def _write(self, span: Span):
+        """Append a span to the export file (caller holds the lock)"""
+        try:
+            if self._export is None:
+                self._export = open(self.export_path, "a", encoding="utf-8", buffering=1)
+            self._export.write(json.dumps(span.to_dict(), default=str) + "\n")
+        except OSError as e:
+            # Tracing must never break a task; stop exporting after the first failure
+            print(f"Warning: could not write traces to {self.export_path}: {e}")
+            self.export_path = None
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+_shared_tracer: Optional[Tracer] = None
+_shared_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer (disabled until configured)"""
+    global _shared_tracer
+    with _shared_lock:
+        if _shared_tracer is None:
+            _shared_tracer = Tracer()
+        return _shared_tracer
+
+
+def configure_tracer(**kwargs) -> Tracer:
+    """
+    Replace the shared tracer with one built from kwargs
+    
+    Args:
+        **kwargs: Tracer constructor arguments
+        
+    Returns:
+        The new shared tracer
+    """
+    global _shared_tracer
+    with _shared_lock:
+        if _shared_tracer is not None:
+            _shared_tracer.close()
+        _shared_tracer = Tracer(**kwargs)
+        return _shared_tracer
+
+
+def span(name: str, target: Optional[str] = None, **attributes):
+    """
+    Start a span on the shared tracer
+    
+    Args:
+        name: Stage or operation
+        target: What the operation acts on (optional)
+        **attributes: Extra details
+        
+    Returns:
+        Span, or the no-op span while tracing is disabled
+    """
+    tracer = _shared_tracer
+    if tracer is None or not tracer.enabled:
+        return NOOP_SPAN
+    return Span(tracer, name, target, attributes)
@@ -1,3 +1,12 @@
 from .provider import LLMProvider
+from .cache import CompletionCache, InMemoryCompletionCache, SQLiteCompletionCache
+from .json_parser import IncrementalJSONParser, parse_json
 
-__all__ = ['LLMProvider']
+__all__ = [
+    'LLMProvider',
+    'CompletionCache',
+    'InMemoryCompletionCache',
+    'SQLiteCompletionCache',
+    'IncrementalJSONParser',
+    'parse_json'
+]
@@ -0,0 +1,216 @@
+"""
+Completion Cache
+Pluggable caches for deterministic LLM completions
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+
+class CompletionCache(ABC):
+    """
+    Base class for completion caches
+    
+    Entries are keyed on (model, messages, temperature, max_tokens). With
+    normalize enabled, message text is whitespace-normalized before hashing so
+    prompts that differ only in indentation or line breaks share an entry.
+    """
+    
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600, max_temperature: float = 0.3, normalize: bool = True):
+        """
+        Args:
+            max_entries: Maximum number of cached completions
+            ttl: Seconds a completion stays valid
+            max_temperature: Calls above this temperature are never cached
+            normalize: Collapse whitespace in messages before keying
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self.normalize = normalize
+        
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "skipped": 0
+        }
+    
+    def is_cacheable(self, temperature: float) -> bool:
+        """Only near-deterministic calls are worth caching"""
+        cacheable = temperature <= self.max_temperature
+        if not cacheable:
+            with self._lock:
+                self.stats["skipped"] += 1
+        return cacheable
+    
+    def make_key(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """
+        Build the cache key for a completion request
+        
+        Args:
+            model: Model name
+            messages: Chat messages
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        if self.normalize:
+            messages = [
+                {"role": m["role"], "content": " ".join(m["content"].split())}
+                for m in messages
+            ]
+        
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached completion
+        
+        Args:
+            key: Cache key from make_key
+            
+        Returns:
+            Cached completion text, or None on a miss
+        """
+        value = self._get(key, time.time())
+        with self._lock:
+            self.stats["hits" if value is not None else "misses"] += 1
+        return value
+    
+    def set(self, key: str, value: str):
+        """
+        Store a completion
+        
+        Args:
+            key: Cache key from make_key
+            value: Completion text
+        """
+        evicted = self._set(key, value, time.time() + self.ttl)
+        if evicted:
+            with self._lock:
+                self.stats["evictions"] += evicted
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters and the current hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+        
+        stats["size"] = self.size()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+    
+    @abstractmethod
+    def _get(self, key: str, now: float) -> Optional[str]:
+        """Backend lookup of a non-expired entry"""
+        pass
+    
+    @abstractmethod
+    def _set(self, key: str, value: str, expires_at: float) -> int:
+        """Backend store; returns the number of entries evicted"""
+        pass
+    
+    @abstractmethod
+    def size(self) -> int:
+        """Number of stored entries"""
+        pass
+
+
+class InMemoryCompletionCache(CompletionCache):
+    """LRU completion cache kept in process memory"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def _get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def _set(self, key: str, value: str, expires_at: float) -> int:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+    
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCompletionCache(CompletionCache):
+    """Completion cache persisted in a SQLite file, shared across restarts"""
+    
+    def __init__(self, path: str, **kwargs):
+        """
+        Args:
+            path: SQLite database file
+            **kwargs: CompletionCache options
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, used_at REAL)"
+        )
+        self._db.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+    
+    def _get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            
+            self._db.execute("UPDATE completions SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0]
+    
+    def _set(self, key: str, value: str, expires_at: float) -> int:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time())
+            )
+            cursor = self._db.execute(
+                "DELETE FROM completions WHERE key NOT IN "
+                "(SELECT key FROM completions ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+            return max(0, cursor.rowcount)
+    
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
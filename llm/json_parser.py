@@ -0,0 +1,183 @@
+"""
+JSON Parser
+Tolerant, incremental parsing of JSON produced by an LLM
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+
+# Commas directly before a closing bracket, a common LLM slip
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object or array as it is streamed in
+    
+    Text before the opening bracket (code fences, a short preamble) is
+    skipped, and the parser tracks string/bracket nesting so it knows when
+    the value is complete. Until then, value() returns a best-effort parse
+    of the partial text with open strings and brackets closed. Anything
+    after the closing bracket is kept as remainder.
+    """
+    
+    def __init__(self, max_preamble: int = 200):
+        """
+        Args:
+            max_preamble: Characters of leading text allowed before the JSON starts
+        """
+        self.max_preamble = max_preamble
+        self.buffer = ""
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        
+        self._position = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._last_comma: Optional[int] = None
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level value has been closed"""
+        return self.end is not None
+    
+    @property
+    def failed(self) -> bool:
+        """Whether the text is clearly not JSON (no opening bracket in the preamble)"""
+        return self.start is None and len(self.buffer) > self.max_preamble
+    
+    @property
+    def remainder(self) -> str:
+        """Text after the complete value"""
+        return self.buffer[self.end:] if self.end is not None else ""
+    
+    def feed(self, text: str) -> bool:
+        """
+        Add streamed text
+        
+        Args:
+            text: Next chunk of output
+            
+        Returns:
+            True once the top-level value is complete
+        """
+        self.buffer += text
+        if self.end is None:
+            self._scan()
+        return self.complete
+    
+    def value(self) -> Optional[Any]:
+        """
+        Parse what has been received so far
+        
+        Returns:
+            Complete value, a best-effort partial value, or None if nothing parses
+        """
+        if self.start is None:
+            return None
+        
+        if self.end is not None:
+            return _loads(self.buffer[self.start:self.end])
+        
+        # Close open strings and brackets, dropping a trailing incomplete member if needed
+        text = self.buffer[self.start:]
+        if self._in_string:
+            text += '"'
+        closers = "".join(reversed(self._stack))
+        
+        value = _loads(text.rstrip().rstrip(",:") + closers)
+        if value is None and self._last_comma is not None:
+            stack = self._stack_at(self._last_comma)
+            value = _loads(self.buffer[self.start:self._last_comma] + "".join(reversed(stack)))
+        return value
+    
+    def _scan(self):
+        """Advance the nesting state over newly received text"""
+        buffer = self.buffer
+        while self._position < len(buffer) and self.end is None:
+            char = buffer[self._position]
+            
+            if self.start is None:
+                if char in "{[" and self._position <= self.max_preamble:
+                    self.start = self._position
+                    self._stack.append("}" if char == "{" else "]")
+                self._position += 1
+                continue
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append("}" if char == "{" else "]")
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self.end = self._position + 1
+            elif char == ",":
+                self._last_comma = self._position
+            
+            self._position += 1
+    
+    def _stack_at(self, index: int) -> List[str]:
+        """Bracket nesting of the value just before index"""
+        stack: List[str] = []
+        in_string = False
+        escaped = False
+        for char in self.buffer[self.start:index]:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "{[":
+                stack.append("}" if char == "{" else "]")
+            elif char in "}]" and stack:
+                stack.pop()
+        return stack
+
+
+def parse_json(text: str) -> Optional[Any]:
+    """
+    Parse the first JSON object or array in text, tolerating common LLM slips
+    
+    Handles surrounding prose or code fences, trailing commas, and output
+    truncated before the closing brackets.
+    
+    Args:
+        text: LLM output
+        
+    Returns:
+        Parsed value, or None if no JSON could be recovered
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    value = parser.value()
+    if value is not None or parser.start is None:
+        return value
+    
+    # Retry without trailing commas
+    parser = IncrementalJSONParser()
+    parser.feed(TRAILING_COMMA.sub(r"\1", text))
+    return parser.value()
+
+
+def _loads(text: str) -> Optional[Any]:
+    """json.loads that returns None instead of raising"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
@@ -4,21 +4,64 @@ Handles all LLM API interactions using OpenAI
 """
 
 import os
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import threading
+import time
+from functools import partial
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional
+from openai import AsyncOpenAI, BadRequestError
 import json
+from core.deadline import call_timeout
+from core.loop import iterate_sync, run_sync
+from core.tracing import span
+from .cache import CompletionCache, InMemoryCompletionCache
+from .json_parser import parse_json
+
+
+JSON_INSTRUCTION = "\n\nYou MUST respond with valid JSON only. No additional text or explanation."
+
+# How generate_json_completion asks for JSON:
+#   "function": forced function call whose parameters are the given schema
+#   "json_object": the API's JSON response format
+#   "prompt": instruction in the prompt only
+JSON_MODES = ("function", "json_object", "prompt")
 
 
 class LLMProvider:
     """OpenAI LLM Provider for agent reasoning"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[CompletionCache] = None,
+        use_cache: bool = True,
+        json_mode: str = "function",
+        timeout: float = 60
+    ):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=self.api_key)
+        # Sync methods run the async ones on the shared background loop, so one client serves both
+        self.async_client = AsyncOpenAI(api_key=self.api_key)
         self.model = "gpt-3.5-turbo"
+        
+        # Per-call timeout in seconds, capped by the task deadline when one is set
+        self.timeout = timeout
+        
+        if json_mode not in JSON_MODES:
+            raise ValueError(f"json_mode must be one of {', '.join(JSON_MODES)}")
+        self.json_mode = json_mode
+        
+        # Cache for low-temperature (planner/verifier) calls
+        self.cache = (cache or InMemoryCompletionCache()) if use_cache else None
+        
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "streams": 0,
+            "ttft_total": 0.0,
+            "last_ttft": None,
+            "json": {mode: {"requests": 0, "failures": 0, "repaired": 0} for mode in JSON_MODES}
+        }
     
     def generate_completion(
         self, 
@@ -26,6 +69,27 @@ class LLMProvider:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1500
+    ) -> str:
+        """
+        Blocking version of agenerate_completion
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            Generated text response
+        """
+        return run_sync(self.agenerate_completion(prompt, system_prompt, temperature, max_tokens))
+    
+    async def agenerate_completion(
+        self, 
+        prompt: str, 
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1500
     ) -> str:
         """
         Generate completion from LLM
@@ -39,31 +103,210 @@ class LLMProvider:
         Returns:
             Generated text response
         """
-        messages = []
+        messages = self._build_messages(prompt, system_prompt)
+        return await self._acomplete(messages, temperature, max_tokens)
+    
+    async def _acomplete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        request: Optional[Dict[str, Any]] = None,
+        parse: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        """
+        Run a chat completion through the cache
         
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+        Args:
+            messages: Chat messages
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            request: Extra API arguments (response_format, tools, ...)
+            parse: Converts the text; a reply it rejects is raised, not cached
+            
+        Returns:
+            Message text, or the arguments of a forced function call, as returned by parse
+        """
+        with span("llm_call", target=self.model, max_tokens=max_tokens) as trace:
+            cache_key = self._cache_key(messages, temperature, max_tokens, request)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    trace.set(cached=True)
+                    return parse(cached) if parse is not None else cached
+            
+            try:
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=call_timeout(self.timeout),
+                    **(request or {})
+                )
+                
+                content = self._message_text(response.choices[0].message)
+                trace.set(**self._usage(response))
+            
+            except Exception as e:
+                raise Exception(f"LLM API Error: {str(e)}") from e
+            
+            # Parse before caching so a malformed reply is not served again
+            result = parse(content) if parse is not None else content
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, content)
+            
+            return result
+    
+    def stream_completion(
+        self, 
+        prompt: str, 
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        validate: Optional[Callable[[str], bool]] = None
+    ) -> Iterator[str]:
+        """
+        Blocking version of astream_completion
         
-        messages.append({"role": "user", "content": prompt})
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            validate: Checks the full text; a reply it rejects is not cached
+            
+        Returns:
+            Iterator of text deltas as they are generated
+        """
+        return iterate_sync(self.astream_completion(prompt, system_prompt, temperature, max_tokens, validate))
+    
+    async def astream_completion(
+        self, 
+        prompt: str, 
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        validate: Optional[Callable[[str], bool]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from the LLM as text deltas
         
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            validate: Checks the full text; a reply it rejects is not cached
+            
+        Yields:
+            Text deltas as they are generated
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        # A generator cannot hold a span open across yields as the current span, so it is finished explicitly
+        trace = span("llm_call", target=self.model, max_tokens=max_tokens, stream=True)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            cache_key = self._cache_key(messages, temperature, max_tokens)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    trace.set(cached=True)
+                    yield cached
+                    return
+            
+            started = time.perf_counter()
+            first_token = True
+            parts = []
             
-            return response.choices[0].message.content.strip()
+            try:
+                stream = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=call_timeout(self.timeout),
+                    stream=True
+                )
+                
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    if first_token:
+                        self._record_ttft(time.perf_counter() - started)
+                        first_token = False
+                    parts.append(delta)
+                    yield delta
+            
+            except Exception as e:
+                trace.finish(e)
+                raise Exception(f"LLM API Error: {str(e)}") from e
+            
+            trace.set(chunks=len(parts))
+            
+            text = "".join(parts).strip()
+            if cache_key is not None and (validate is None or validate(text)):
+                self.cache.set(cache_key, text)
+        finally:
+            trace.finish()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get streaming and cache metrics
         
-        except Exception as e:
-            raise Exception(f"LLM API Error: {str(e)}")
+        Returns:
+            Dict with stream count, last and average time-to-first-token, JSON
+            parse failure rates per JSON mode, and cache stats
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats["json"] = {mode: dict(counters) for mode, counters in self.stats["json"].items()}
+        
+        ttft_total = stats.pop("ttft_total")
+        stats["avg_ttft"] = round(ttft_total / stats["streams"], 4) if stats["streams"] else None
+        for counters in stats["json"].values():
+            counters["failure_rate"] = round(counters["failures"] / counters["requests"], 3) if counters["requests"] else 0.0
+        stats["cache"] = self.cache.get_stats() if self.cache is not None else None
+        return stats
+    
+    def _record_ttft(self, seconds: float):
+        """Record time-to-first-token of a streamed completion"""
+        with self._stats_lock:
+            self.stats["streams"] += 1
+            self.stats["ttft_total"] += seconds
+            self.stats["last_ttft"] = round(seconds, 4)
     
     def generate_json_completion(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = "respond"
+    ) -> Dict[str, Any]:
+        """
+        Blocking version of agenerate_json_completion
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            temperature: Lower temperature for more consistent JSON
+            schema: JSON schema of the expected object (used in "function" mode)
+            schema_name: Function name the schema is offered under
+            
+        Returns:
+            Parsed JSON response
+        """
+        return run_sync(self.agenerate_json_completion(prompt, system_prompt, temperature, schema, schema_name))
+    
+    async def agenerate_json_completion(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = "respond"
     ) -> Dict[str, Any]:
         """
         Generate JSON-structured completion
@@ -72,20 +315,96 @@ class LLMProvider:
             prompt: User prompt
             system_prompt: System instructions
             temperature: Lower temperature for more consistent JSON
+            schema: JSON schema of the expected object (used in "function" mode)
+            schema_name: Function name the schema is offered under
             
         Returns:
             Parsed JSON response
         """
-        json_instruction = "\n\nYou MUST respond with valid JSON only. No additional text or explanation."
-        full_prompt = prompt + json_instruction
+        messages = self._build_messages(prompt + JSON_INSTRUCTION, system_prompt)
+        mode = self.json_mode
+        
+        try:
+            return await self._acomplete(
+                messages, temperature, 2000, self._json_request(mode, schema, schema_name),
+                parse=partial(self._parse_json_response, mode=mode)
+            )
+        
+        except Exception as e:
+            # Models or deployments without structured output still get the prompt path
+            if mode == "prompt" or not isinstance(e.__cause__, BadRequestError):
+                raise
+            parsed = await self._acomplete(messages, temperature, 2000, parse=partial(self._parse_json_response, mode="prompt"))
+            self.json_mode = "prompt"
+            return parsed
+    
+    @staticmethod
+    def _usage(response: Any) -> Dict[str, int]:
+        """Token counts reported with a completion, as span attributes"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return {}
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
+        }
+    
+    def _cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        request: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """Cache key for a request, or None if the request should not be cached"""
+        if self.cache is None or not self.cache.is_cacheable(temperature):
+            return None
+        
+        # Structured and plain requests for the same prompt return different text
+        model = self.model
+        if request:
+            model += ":" + json.dumps(request, sort_keys=True)
         
-        response_text = self.generate_completion(
-            prompt=full_prompt,
-            system_prompt=system_prompt,
-            temperature=temperature,
-            max_tokens=2000
-        )
+        return self.cache.make_key(model, messages, temperature, max_tokens)
+    
+    @staticmethod
+    def _json_request(mode: str, schema: Optional[Dict[str, Any]], schema_name: str) -> Optional[Dict[str, Any]]:
+        """Extra API arguments that make the model answer with JSON"""
+        if mode == "function" and schema is not None:
+            return {
+                "tools": [{
+                    "type": "function",
+                    "function": {"name": schema_name, "parameters": schema}
+                }],
+                "tool_choice": {"type": "function", "function": {"name": schema_name}}
+            }
+        
+        if mode in ("function", "json_object"):
+            return {"response_format": {"type": "json_object"}}
+        
+        return None
+    
+    @staticmethod
+    def _message_text(message: Any) -> str:
+        """Text of a completion message, or the arguments of its function call"""
+        if getattr(message, "tool_calls", None):
+            return message.tool_calls[0].function.arguments.strip()
+        return (message.content or "").strip()
+    
+    @staticmethod
+    def _build_messages(prompt: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build chat messages from system and user prompts"""
+        messages = []
         
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        messages.append({"role": "user", "content": prompt})
+        
+        return messages
+    
+    def _parse_json_response(self, response_text: str, mode: str = "prompt") -> Dict[str, Any]:
+        """Parse a JSON completion, handling markdown code blocks and truncated or sloppy JSON"""
         # Extract JSON from response (handle code blocks)
         response_text = response_text.strip()
         if "```json" in response_text:
@@ -94,6 +413,24 @@ class LLMProvider:
             response_text = response_text.split("```")[1].split("```")[0].strip()
         
         try:
-            return json.loads(response_text)
+            parsed = json.loads(response_text)
+            self._record_json(mode)
+            return parsed
         except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse JSON response: {str(e)}\nResponse: {response_text}")
+            error = e
+        
+        repaired = parse_json(response_text)
+        if isinstance(repaired, dict):
+            self._record_json(mode, repaired=True)
+            return repaired
+        
+        self._record_json(mode, failed=True)
+        raise Exception(f"Failed to parse JSON response: {str(error)}\nResponse: {response_text}")
+    
+    def _record_json(self, mode: str, repaired: bool = False, failed: bool = False):
+        """Count a JSON completion and whether it had to be repaired or failed to parse"""
+        with self._stats_lock:
+            counters = self.stats["json"][mode]
+            counters["requests"] += 1
+            counters["repaired"] += int(repaired)
+            counters["failures"] += int(failed)
@@ -3,13 +3,21 @@ AI Operations Assistant
 Main orchestrator that coordinates all agents
 """
 
+import argparse
 import os
-from typing import Dict, Any, Optional
+import queue
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Any, Callable, Optional
 from dotenv import load_dotenv
 
-from llm import LLMProvider
-from tools import GitHubTool, WeatherTool, NewsTool
-from agents import PlannerAgent, ExecutorAgent, VerifierAgent
+from batch import run_batch
+from server import serve
+from core import Cassette, Deadline, configure_tracer, current_task_id, deadline_scope, run_sync, span, submit, task_scope
+from llm import LLMProvider, SQLiteCompletionCache
+from tools import GitHubTool, WeatherTool, NewsTool, configure_tool_cache, configure_hedger
+from agents import PlannerAgent, ExecutorAgent, VerifierAgent, ExecutionHistory
 
 
 class AIOperationsAssistant:
@@ -19,8 +27,24 @@ class AIOperationsAssistant:
         # Load environment variables
         load_dotenv()
         
-        # Initialize LLM provider
-        self.llm = LLMProvider()
+        # Initialize LLM provider (completion cache persisted when LLM_CACHE_PATH is set,
+        # structured JSON output via function calling unless LLM_JSON_MODE says otherwise)
+        llm_cache = None
+        if os.getenv("LLM_CACHE_PATH"):
+            llm_cache = SQLiteCompletionCache(os.getenv("LLM_CACHE_PATH"))
+        self.llm = LLMProvider(cache=llm_cache, json_mode=os.getenv("LLM_JSON_MODE", "function"))
+        
+        # Persist tool results across restarts when a cache file is configured
+        if os.getenv("TOOL_CACHE_PATH"):
+            configure_tool_cache(disk_path=os.getenv("TOOL_CACHE_PATH"))
+        
+        # Record per-stage spans and latency histograms; TRACE_EXPORT_PATH also writes every span to a JSON lines file
+        if os.getenv("TRACING", "").lower() in ("1", "true", "yes") or os.getenv("TRACE_EXPORT_PATH"):
+            configure_tracer(enabled=True, export_path=os.getenv("TRACE_EXPORT_PATH") or None)
+        
+        # Send a second request when an idempotent tool call runs past its p95 latency
+        if os.getenv("HEDGE_REQUESTS", "").lower() in ("1", "true", "yes"):
+            configure_hedger(enabled=True)
         
         # Initialize tools
         self.tools = {
@@ -29,38 +53,139 @@ class AIOperationsAssistant:
             "news_fetch": NewsTool()
         }
         
+        # Record every LLM and tool HTTP exchange to a cassette, or answer them from one without network access
+        self.cassette = None
+        if os.getenv("CASSETTE_REPLAY"):
+            self.cassette = Cassette(
+                os.getenv("CASSETTE_REPLAY"),
+                mode="replay",
+                latency=float(os.getenv("CASSETTE_REPLAY_LATENCY", "0"))
+            )
+        elif os.getenv("CASSETTE_RECORD"):
+            self.cassette = Cassette(os.getenv("CASSETTE_RECORD"))
+        if self.cassette is not None:
+            self.cassette.install(self.llm, self.tools.values())
+        
         # Get tool information for planner
         available_tools = [tool.get_tool_info() for tool in self.tools.values()]
         
         # Initialize agents
         self.planner = PlannerAgent(self.llm, available_tools)
-        self.executor = ExecutorAgent(self.tools)
-        self.verifier = VerifierAgent(self.llm)
+        # Recent steps stay in memory; EXECUTION_LOG_PATH keeps a full audit trail on disk
+        self.executor = ExecutorAgent(
+            self.tools,
+            history=ExecutionHistory(
+                max_entries=int(os.getenv("EXECUTION_HISTORY_SIZE", "1000")),
+                log_path=os.getenv("EXECUTION_LOG_PATH") or None
+            )
+        )
+        self.verifier = VerifierAgent(
+            self.llm,
+            available_tools,
+            fused=os.getenv("FUSED_VERIFIER", "").lower() in ("1", "true", "yes")
+        )
+        
+        # Time budget for one task; every LLM and HTTP call gets its timeout from what is left
+        self.task_deadline = float(os.getenv("TASK_DEADLINE_SECONDS", "30"))
         
         print("✓ AI Operations Assistant initialized")
         print(f"✓ {len(self.tools)} tools available: {', '.join(self.tools.keys())}")
     
-    def process_task(self, user_task: str, verbose: bool = True) -> Dict[str, Any]:
+    def process_task(
+        self,
+        user_task: str,
+        verbose: bool = True,
+        on_token: Optional[Callable[[str], None]] = None,
+        deadline: Optional[float] = None,
+        task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Process a user task through the complete pipeline
         
         Args:
             user_task: Natural language task from user
             verbose: Print detailed execution logs
+            on_token: Called with each chunk of the final response as it is
+                generated; the full response is still returned
+            deadline: Time budget in seconds (defaults to TASK_DEADLINE_SECONDS)
+            task_id: Id reported with the task's execution history (generated if None)
             
         Returns:
-            Dict with final results and metadata
+            Dict with final results and metadata, including the task id and deadline report
         """
-        if verbose:
-            print(f"\n{'='*60}")
-            print(f"USER TASK: {user_task}")
-            print(f"{'='*60}\n")
+        if on_token is None:
+            return run_sync(self.process_task_async(user_task, verbose, None, deadline, task_id))
+        
+        # The pipeline runs on the background loop; chunks are handed back so on_token runs in this thread
+        chunks: queue.SimpleQueue = queue.SimpleQueue()
+        future = submit(self.process_task_async(user_task, verbose, chunks.put, deadline, task_id))
+        future.add_done_callback(lambda _: chunks.put(None))
+        try:
+            for delta in iter(chunks.get, None):
+                on_token(delta)
+            return future.result()
+        finally:
+            future.cancel()
+    
+    async def process_task_async(
+        self,
+        user_task: str,
+        verbose: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+        deadline: Optional[float] = None,
+        task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a user task through the complete pipeline
+        
+        Many tasks can be in flight on one event loop at the same time;
+        process_task runs this on a shared background loop.
+        
+        Args:
+            user_task: Natural language task from user
+            verbose: Print detailed execution logs
+            on_token: Called with each chunk of the final response as it is
+                generated; the full response is still returned
+            deadline: Time budget in seconds (defaults to TASK_DEADLINE_SECONDS)
+            task_id: Id reported with the task's execution history (generated if None)
+            
+        Returns:
+            Dict with final results and metadata, including the task id and deadline report
+        """
+        with task_scope(task_id) as task_id, deadline_scope(self.task_deadline if deadline is None else deadline) as budget:
+            if self.cassette is not None:
+                self.cassette.record_task(task_id, user_task)
+            with span("task") as trace:
+                result = await self._process_task_async(user_task, verbose, on_token)
+                trace.set(success=bool(result.get("success")), stage=result.get("stage"))
+        
+        result.setdefault("metadata", {})["task_id"] = task_id
+        return self._attach_deadline(result, budget, verbose)
+    
+    async def aclose(self):
+        """Close the async HTTP connections the tools opened on the running event loop"""
+        clients = {id(tool.http): tool.http for tool in self.tools.values()}
+        for client in clients.values():
+            aclose = getattr(client, "aclose", None)
+            if aclose is not None:
+                await aclose()
+    
+    async def _process_task_async(
+        self,
+        user_task: str,
+        verbose: bool,
+        on_token: Optional[Callable[[str], None]]
+    ) -> Dict[str, Any]:
+        """Run the pipeline (inside the task's deadline scope)"""
+        self._log_task(user_task, verbose)
         
         # Step 1: Planning
         if verbose:
             print("🧠 PLANNER AGENT: Creating execution plan...")
         
-        plan_result = self.planner.create_plan(user_task)
+        with span("planning") as trace:
+            plan_result = await self.planner.acreate_plan(user_task)
+            trace.set(source=plan_result.get("source"))
         
         if not plan_result["success"]:
             return {
@@ -70,8 +195,78 @@ class AIOperationsAssistant:
             }
         
         plan = plan_result["plan"]
+        self._log_plan(plan, plan_result.get("source"), verbose)
+        
+        # Step 2: Execution
+        if verbose:
+            print("⚙️  EXECUTOR AGENT: Executing plan...")
+        
+        with span("execution", steps=len(plan.get("steps", []))):
+            execution_result = await self.executor.aexecute_plan(plan)
+        self._log_execution(execution_result, verbose)
+        
+        # Step 3: Verification
+        if verbose:
+            print("🔍 VERIFIER AGENT: Validating results...")
+        
+        # In fused mode the same LLM call also starts the final response
+        started = time.perf_counter()
+        with span("verification", fused=self.verifier.fused) as trace:
+            if self.verifier.fused:
+                verification, response_stream = await self.verifier.averify_and_stream(plan, execution_result)
+            else:
+                verification, response_stream = await self.verifier.averify_results(plan, execution_result), None
+            trace.set(verified=bool(verification.get("verified")), verified_by=verification.get("verified_by"))
+        self._log_verification(verification, verbose)
         
+        # Step 4: Generate final response
+        if verification.get("verified"):
+            self.planner.remember_plan(user_task, plan_result)
+            
+            if verbose:
+                print("📝 Generating final response...\n")
+            
+            if on_token is None:
+                with span("response"):
+                    if response_stream is None:
+                        final_response = await self.verifier.agenerate_final_response(verification)
+                    else:
+                        final_response = "".join([delta async for delta in response_stream]).strip()
+                return self._build_success(final_response, plan, verification)
+            
+            if response_stream is None:
+                started = time.perf_counter()
+                response_stream = self.verifier.astream_final_response(verification)
+            
+            ttft = None
+            parts = []
+            with span("response", streamed=True):
+                async for delta in response_stream:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    parts.append(delta)
+                    on_token(delta)
+            
+            result = self._build_success("".join(parts).strip(), plan, verification)
+            result["metadata"]["time_to_first_token"] = round(ttft, 4) if ttft is not None else None
+            return result
+        else:
+            return self._build_failure(verification)
+    
+    def _log_task(self, user_task: str, verbose: bool):
+        """Print the task header"""
         if verbose:
+            print(f"\n{'='*60}")
+            print(f"USER TASK: {user_task}")
+            print(f"{'='*60}\n")
+    
+    def _log_plan(self, plan: Dict[str, Any], source: Optional[str], verbose: bool):
+        """Print the plan created by the planner"""
+        if verbose:
+            if source == "fast_path":
+                print("   (planned locally by intent matcher, no LLM call)")
+            elif source == "template":
+                print("   (reused a cached plan template, no LLM call)")
             print(f"   Task Understanding: {plan.get('task_understanding', 'N/A')}")
             print(f"   Steps: {len(plan.get('steps', []))}")
             for step in plan.get('steps', []):
@@ -79,13 +274,9 @@ class AIOperationsAssistant:
                 if step.get('tool'):
                     print(f"        Tool: {step.get('tool')}")
             print()
-        
-        # Step 2: Execution
-        if verbose:
-            print("⚙️  EXECUTOR AGENT: Executing plan...")
-        
-        execution_result = self.executor.execute_plan(plan)
-        
+    
+    def _log_execution(self, execution_result: Dict[str, Any], verbose: bool):
+        """Print per-step execution status"""
         if verbose:
             for result in execution_result.get("results", []):
                 status = "✓" if result.get("success") else "✗"
@@ -93,45 +284,58 @@ class AIOperationsAssistant:
                 if not result.get("success"):
                     print(f"      Error: {result.get('error')}")
             print()
-        
-        # Step 3: Verification
-        if verbose:
-            print("🔍 VERIFIER AGENT: Validating results...")
-        
-        verification = self.verifier.verify_results(plan, execution_result)
-        
+    
+    def _log_verification(self, verification: Dict[str, Any], verbose: bool):
+        """Print the verification verdict"""
         if verbose:
+            if verification.get("verified_by") == "rules":
+                print("   (checked against tool output schemas, no LLM call)")
+            if verification.get("partial"):
+                print(f"   (partial: unavailable services skipped for {', '.join(verification.get('missing_data', []))})")
             print(f"   Verified: {verification.get('verified', False)}")
             print(f"   Completeness: {verification.get('completeness_score', 'N/A')}%")
             if verification.get('issues'):
                 print(f"   Issues: {', '.join(verification['issues'])}")
             print()
+    
+    def _attach_deadline(self, result: Dict[str, Any], budget: Optional[Deadline], verbose: bool) -> Dict[str, Any]:
+        """Add the deadline report to a task result and print any stages that ran under pressure"""
+        if budget is None:
+            return result
         
-        # Step 4: Generate final response
-        if verification.get("verified"):
-            if verbose:
-                print("📝 Generating final response...\n")
-            
-            final_response = self.verifier.generate_final_response(verification)
-            
-            return {
-                "success": True,
-                "response": final_response,
-                "metadata": {
-                    "plan": plan,
-                    "verification": verification,
-                    "execution_summary": self.executor.get_execution_summary()
-                }
-            }
-        else:
-            # Handle failures gracefully
-            return {
-                "success": False,
-                "error": "Task verification failed",
-                "issues": verification.get("issues", []),
-                "partial_results": verification.get("output"),
-                "needs_retry": verification.get("needs_retry", False)
+        report = budget.report()
+        result.setdefault("metadata", {})["deadline"] = report
+        
+        if verbose and report["pressure"]:
+            print(f"⏱️  Deadline pressure ({report['budget']}s budget, {report['elapsed']}s used):")
+            for entry in report["pressure"]:
+                print(f"   {entry['stage']}: {entry['action']} ({entry['remaining']}s left)")
+            print()
+        
+        return result
+    
+    def _build_success(self, final_response: str, plan: Dict[str, Any], verification: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result of a verified task"""
+        return {
+            "success": True,
+            "response": final_response,
+            "metadata": {
+                "plan": plan,
+                "verification": verification,
+                "execution_summary": self.executor.get_execution_summary(current_task_id())
             }
+        }
+    
+    def _build_failure(self, verification: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result of a task that failed verification"""
+        # Handle failures gracefully
+        return {
+            "success": False,
+            "error": "Task verification failed",
+            "issues": verification.get("issues", []),
+            "partial_results": verification.get("output"),
+            "needs_retry": verification.get("needs_retry", False)
+        }
     
     def interactive_mode(self):
         """Run assistant in interactive CLI mode"""
@@ -151,13 +355,30 @@ class AIOperationsAssistant:
                 if not user_input:
                     continue
                 
-                result = self.process_task(user_input, verbose=True)
+                streamed = []
+                
+                def print_token(delta: str):
+                    # Print the header once, just before the first chunk arrives
+                    if not streamed:
+                        print(f"\n{'='*60}")
+                        print("FINAL RESPONSE:")
+                        print(f"{'='*60}")
+                    streamed.append(delta)
+                    print(delta, end="", flush=True)
+                
+                result = self.process_task(user_input, verbose=True, on_token=print_token)
                 
                 if result["success"]:
-                    print(f"\n{'='*60}")
-                    print("FINAL RESPONSE:")
-                    print(f"{'='*60}")
-                    print(result["response"])
+                    if not streamed:
+                        print(f"\n{'='*60}")
+                        print("FINAL RESPONSE:")
+                        print(f"{'='*60}")
+                        print(result["response"])
+                    else:
+                        print()
+                    ttft = result["metadata"].get("time_to_first_token")
+                    if ttft is not None:
+                        print(f"(first token after {ttft:.2f}s)")
                     print()
                 else:
                     print(f"\n❌ Error: {result.get('error')}")
@@ -175,10 +396,46 @@ class AIOperationsAssistant:
                 print(f"\n❌ Unexpected error: {str(e)}\n")
 
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="AI Operations Assistant")
+    parser.add_argument("--batch", metavar="TASKS", help="Process a JSONL file of tasks ('-' for stdin) instead of running interactively")
+    parser.add_argument("--output", default="-", help="JSONL file results are appended to (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")), help="Tasks in flight at once in batch or service mode (default: 8)")
+    parser.add_argument("--checkpoint", help="File recording finished task ids; rerunning with it skips them")
+    parser.add_argument("--retry-failed", action="store_true", help="With --checkpoint, rerun tasks that failed last time")
+    parser.add_argument("--deadline", type=float, help="Time budget per task in seconds (default: TASK_DEADLINE_SECONDS)")
+    parser.add_argument("--serve", action="store_true", help="Run as a local HTTP service instead of running interactively")
+    parser.add_argument("--host", default="127.0.0.1", help="Service interface (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8080")), help="Service port (default: 8080)")
+    parser.add_argument("--max-queued", type=int, default=32, help="Service requests waiting for a slot before 429s (default: 32)")
+    return parser.parse_args()
+
+
 def main():
     """Main entry point"""
+    args = parse_args()
     try:
+        if args.batch:
+            # Keep stdout for result lines; startup messages go to stderr
+            with redirect_stdout(sys.stderr):
+                assistant = AIOperationsAssistant()
+            run_batch(
+                assistant,
+                input_path=args.batch,
+                output_path=args.output,
+                concurrency=args.concurrency,
+                checkpoint_path=args.checkpoint,
+                retry_failed=args.retry_failed,
+                deadline=args.deadline
+            )
+            return
+        
         assistant = AIOperationsAssistant()
+        if args.serve:
+            serve(assistant, args.host, args.port, max_concurrent=args.concurrency, max_queued=args.max_queued)
+            return
+        
         assistant.interactive_mode()
     
     except ValueError as e:
@@ -0,0 +1,375 @@
+"""
+HTTP Service
+Serves the assistant over local HTTP with bounded admission and backpressure
+"""
+
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from core.tracing import get_tracer
+from tools.records import json_default
+
+
+class AdmissionQueue:
+    """
+    Bounded admission for task requests
+    
+    At most max_concurrent tasks run at once. Further requests wait in a
+    queue of at most max_queued for up to queue_timeout seconds. A request
+    arriving at a full queue is rejected at once with 429; one that waits
+    too long, or arrives while the server drains, gets 503. Both carry a
+    Retry-After estimated from recent task latency and the queue length.
+    """
+    
+    def __init__(self, max_concurrent: int = 8, max_queued: int = 32, queue_timeout: float = 10.0):
+        """
+        Args:
+            max_concurrent: Tasks running at once
+            max_queued: Requests waiting for a slot
+            queue_timeout: Longest a request waits for a slot, in seconds
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        
+        self.draining = False
+        self._running = 0
+        self._waiting = 0
+        # Smoothed task latency, used for Retry-After estimates
+        self._latency = 1.0
+        self._condition = threading.Condition()
+        self.stats = {
+            "admitted": 0,
+            "completed": 0,
+            "rejected_full": 0,
+            "timed_out": 0
+        }
+    
+    def acquire(self) -> Optional[Tuple[int, str]]:
+        """
+        Wait for a slot to run a task
+        
+        Returns:
+            None once admitted (the caller must release()), otherwise the
+            HTTP status and reason for rejecting the request
+        """
+        with self._condition:
+            if self.draining:
+                return 503, "Server is shutting down"
+            
+            if self._running < self.max_concurrent and self._waiting == 0:
+                self._admit()
+                return None
+            
+            if self._waiting >= self.max_queued:
+                self.stats["rejected_full"] += 1
+                return 429, "Too many requests queued"
+            
+            self._waiting += 1
+            expires_at = time.monotonic() + self.queue_timeout
+            try:
+                while self._running >= self.max_concurrent:
+                    remaining = expires_at - time.monotonic()
+                    if self.draining:
+                        return 503, "Server is shutting down"
+                    if remaining <= 0:
+                        self.stats["timed_out"] += 1
+                        return 503, "Timed out waiting for a free slot"
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+            
+            self._admit()
+            return None
+    
+    def release(self, latency: float):
+        """
+        Free the slot of a finished task
+        
+        Args:
+            latency: Task duration in seconds
+        """
+        with self._condition:
+            self._running -= 1
+            self._latency = 0.8 * self._latency + 0.2 * latency
+            self.stats["completed"] += 1
+            self._condition.notify()
+    
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, from the queue length and recent latency"""
+        with self._condition:
+            backlog = self._waiting + self._running
+            return max(1, math.ceil(self._latency * backlog / self.max_concurrent))
+    
+    @property
+    def ready(self) -> bool:
+        """Whether a new request would be accepted (admitted or queued)"""
+        with self._condition:
+            return not self.draining and self._waiting < self.max_queued
+    
+    def drain(self):
+        """Stop admitting requests and wake waiting ones so they fail fast"""
+        with self._condition:
+            self.draining = True
+            self._condition.notify_all()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission counters, current load and smoothed latency"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats["running"] = self._running
+            stats["waiting"] = self._waiting
+            stats["avg_latency"] = round(self._latency, 3)
+        stats["max_concurrent"] = self.max_concurrent
+        stats["max_queued"] = self.max_queued
+        return stats
+    
+    def _admit(self):
+        """Take a slot (caller holds the lock)"""
+        self._running += 1
+        self.stats["admitted"] += 1
+
+
+class AssistantRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes for the assistant service
+    
+    GET  /health        liveness, with admission stats
+    GET  /ready         200 while requests are accepted, 503 when saturated or draining
+    GET  /metrics       Prometheus text: span latency histograms and admission gauges
+    POST /tasks         {"task", optional "id", optional "deadline"} -> task result
+    POST /tasks/stream  same body; Server-Sent Events: "token" events, then one "result"
+    """
+    
+    server: "AssistantServer"
+    server_version = "AIOpsAssistant/1.0"
+    
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "uptime": round(time.monotonic() - self.server.started, 3),
+                "admission": self.server.admission.get_stats()
+            })
+        elif self.path == "/ready":
+            ready = self.server.admission.ready
+            self._send_json(200 if ready else 503, {"ready": ready, **self.server.admission.get_stats()})
+        elif self.path == "/metrics":
+            self._send_text(200, get_tracer().render_prometheus() + self._admission_metrics())
+        else:
+            self._send_json(404, {"success": False, "error": f"Unknown path {self.path}"})
+    
+    def do_POST(self):
+        if self.path not in ("/tasks", "/tasks/stream"):
+            self._send_json(404, {"success": False, "error": f"Unknown path {self.path}"})
+            return
+        
+        body, error = self._read_task()
+        if error is not None:
+            self._send_json(400, {"success": False, "error": error})
+            return
+        
+        admission = self.server.admission
+        rejection = admission.acquire()
+        if rejection is not None:
+            status, reason = rejection
+            self._send_json(status, {"success": False, "error": reason}, {"Retry-After": str(admission.retry_after())})
+            return
+        
+        started = time.perf_counter()
+        try:
+            if self.path == "/tasks/stream":
+                self._run_streaming(body)
+            else:
+                self._run(body)
+        finally:
+            admission.release(time.perf_counter() - started)
+    
+    def _run(self, body: Dict[str, Any]):
+        """Run a task and answer with its full result"""
+        try:
+            result = self.server.assistant.process_task(
+                body["task"],
+                verbose=False,
+                deadline=body.get("deadline"),
+                task_id=body.get("id")
+            )
+        except Exception as e:
+            self._send_json(500, {"success": False, "error": f"Unexpected error: {str(e)}"})
+            return
+        
+        self._send_json(200, result)
+    
+    def _run_streaming(self, body: Dict[str, Any]):
+        """Run a task, streaming response chunks as they are generated"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        
+        connected = [True]
+        
+        def send_event(event: str, data: Dict[str, Any]):
+            if not connected[0]:
+                return
+            try:
+                self.wfile.write(f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client went away; the task still finishes so its results are cached
+                connected[0] = False
+        
+        try:
+            result = self.server.assistant.process_task(
+                body["task"],
+                verbose=False,
+                on_token=lambda delta: send_event("token", {"delta": delta}),
+                deadline=body.get("deadline"),
+                task_id=body.get("id")
+            )
+        except Exception as e:
+            result = {"success": False, "error": f"Unexpected error: {str(e)}"}
+        
+        send_event("result", result)
+    
+    def _read_task(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Parse and validate the JSON request body"""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, UnicodeDecodeError):
+            return {}, "Request body must be JSON"
+        
+        if not isinstance(body, dict) or not isinstance(body.get("task"), str) or not body["task"].strip():
+            return {}, "Request body needs a non-empty \"task\" string"
+        
+        # bool is an int subclass, and JSON also allows NaN/Infinity
+        deadline = body.get("deadline")
+        if deadline is not None and (
+            isinstance(deadline, bool) or not isinstance(deadline, (int, float))
+            or not math.isfinite(deadline) or deadline <= 0
+        ):
+            return {}, "\"deadline\" must be a positive number of seconds"
+        
+        if body.get("id") is not None:
+            body["id"] = str(body["id"])
+        return body, None
+    
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        """Send a JSON response"""
+        data = json.dumps(payload, default=json_default).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def _admission_metrics(self) -> str:
+        """Admission queue state in the Prometheus text format"""
+        stats = self.server.admission.get_stats()
+        lines = []
+        for name, kind, help_text, value in (
+            ("ai_ops_server_running", "gauge", "Tasks running", stats["running"]),
+            ("ai_ops_server_waiting", "gauge", "Requests waiting for a slot", stats["waiting"]),
+            ("ai_ops_server_admitted_total", "counter", "Requests admitted", stats["admitted"]),
+            ("ai_ops_server_rejected_total", "counter", "Requests rejected with 429 (queue full)", stats["rejected_full"]),
+            ("ai_ops_server_timed_out_total", "counter", "Requests rejected with 503 (waited too long)", stats["timed_out"])
+        ):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+    
+    def _send_text(self, status: int, text: str):
+        """Send a plain text response in the Prometheus exposition format"""
+        data = text.encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format: str, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class AssistantServer(ThreadingHTTPServer):
+    """
+    HTTP server around one warm assistant
+    
+    Every request is handled on its own thread; the admission queue keeps
+    the number of tasks running (and threads waiting) bounded. The same
+    assistant, tool cache and single-flight group serve every request.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(
+        self,
+        assistant,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_concurrent: int = 8,
+        max_queued: int = 32,
+        queue_timeout: float = 10.0,
+        verbose: bool = False
+    ):
+        """
+        Args:
+            assistant: AIOperationsAssistant serving every request
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            max_concurrent: Tasks running at once
+            max_queued: Requests waiting for a slot
+            queue_timeout: Longest a request waits for a slot, in seconds
+            verbose: Log every request
+        """
+        super().__init__((host, port), AssistantRequestHandler)
+        self.assistant = assistant
+        self.admission = AdmissionQueue(max_concurrent, max_queued, queue_timeout)
+        self.verbose = verbose
+        self.started = time.monotonic()
+    
+    @property
+    def url(self) -> str:
+        """Base URL the server listens on"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def stop(self):
+        """Refuse new requests, then stop serving"""
+        self.admission.drain()
+        self.shutdown()
+        self.server_close()
+
+
+def serve(assistant, host: str = "127.0.0.1", port: int = 8080, **kwargs):
+    """
+    Run the service until interrupted
+    
+    Args:
+        assistant: AIOperationsAssistant serving every request
+        host: Interface to bind
+        port: Port to bind
+        **kwargs: AssistantServer options (max_concurrent, max_queued, queue_timeout, verbose)
+    """
+    server = AssistantServer(assistant, host, port, **kwargs)
+    print(f"✓ Serving on {server.url} (POST /tasks, POST /tasks/stream, GET /health, GET /ready, GET /metrics)")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\nShutting down. Goodbye! 👋\n")
+    finally:
+        server.admission.drain()
+        server.server_close()
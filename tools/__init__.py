@@ -2,5 +2,19 @@ from .base_tool import BaseTool
 from .github_tool import GitHubTool
 from .weather_tool import WeatherTool
 from .news_tool import NewsTool
+from .http_client import HTTPClient, get_http_client, configure_http_client
+from .cache import ToolCache, get_tool_cache, configure_tool_cache
+from .retry import RetryPolicy, RetryBudget, get_retry_budget, configure_retry_budget
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker, configure_circuit_breaker
+from .hedging import Hedger, get_hedger, configure_hedger
+from .single_flight import SingleFlight, get_single_flight, configure_single_flight
 
-__all__ = ['BaseTool', 'GitHubTool', 'WeatherTool', 'NewsTool']
+__all__ = [
+    'BaseTool', 'GitHubTool', 'WeatherTool', 'NewsTool',
+    'HTTPClient', 'get_http_client', 'configure_http_client',
+    'ToolCache', 'get_tool_cache', 'configure_tool_cache',
+    'RetryPolicy', 'RetryBudget', 'get_retry_budget', 'configure_retry_budget',
+    'CircuitBreaker', 'get_circuit_breaker', 'configure_circuit_breaker',
+    'Hedger', 'get_hedger', 'configure_hedger',
+    'SingleFlight', 'get_single_flight', 'configure_single_flight'
+]
@@ -3,13 +3,57 @@ Base Tool Class
 Abstract base for all API tools
 """
 
+import asyncio
+import inspect
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Any, Optional, Sequence, Tuple
+from core.deadline import current_deadline, short_of_time
+from core.loop import run_sync
+from .cache import ToolCache, get_tool_cache
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .hedging import Hedger, get_hedger
+from .http_client import HTTPClient, get_http_client
+from .records import project_record
+from .retry import TRANSIENT, RetryPolicy, classify
+from .single_flight import SingleFlight, get_single_flight
+
+
+# Upstream calls are not started with less than this much of the task deadline left
+MIN_CALL_SECONDS = 0.5
 
 
 class BaseTool(ABC):
     """Abstract base class for all tools"""
     
+    # Seconds a successful result stays fresh in the tool cache (0 disables caching)
+    cache_ttl: float = 0
+    
+    # Declared parameters: name -> {"type", "description", optional "default",
+    # optional "entity": True for free-text values taken from the task wording}
+    parameters: Dict[str, Dict[str, Any]] = {}
+    
+    # Regexes for tasks this tool fully answers; named groups are parameter names
+    intent_patterns: Tuple[str, ...] = ()
+    
+    # Shape of a successful result's data, checked by the structural verifier:
+    #   "fields": keys that must be present and not None
+    #   "items": key of the list of returned records
+    #   "item_fields": keys every record must have
+    #   "count_parameter": parameter giving the number of records requested
+    #   "total": key of the number of records available upstream
+    #   "record_fields": fields of each record (or of the data itself when
+    #       there are no items) that a plan step may project onto
+    output_schema: Dict[str, Any] = {}
+    
+    # Backoff and attempt limits applied by the executor to failed calls
+    retry_policy: RetryPolicy = RetryPolicy()
+    
+    # Whether repeating a call is harmless, so slow calls may be hedged and
+    # concurrent identical calls may share one request
+    idempotent: bool = False
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -32,9 +76,267 @@ class BaseTool(ABC):
         """
         pass
     
-    def get_tool_info(self) -> Dict[str, str]:
+    async def aexecute(self, **kwargs) -> Dict[str, Any]:
+        """
+        Async version of execute
+        
+        Tools override this with a native async implementation; the default
+        runs the blocking execute in a worker thread.
+        
+        Returns:
+            Dict with 'success', 'data', and optional 'error' keys
+        """
+        return await asyncio.to_thread(self.execute, **kwargs)
+    
+    def run(self, fields: Optional[Sequence[str]] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Blocking version of arun
+        
+        Args:
+            fields: Record fields the caller needs (all fields if None)
+            
+        Returns:
+            Dict with 'success', 'data', and optional 'error' keys
+        """
+        return run_sync(self.arun(fields=fields, **kwargs))
+    
+    async def arun(self, fields: Optional[Sequence[str]] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Execute the tool, serving fresh results from the tool cache
+        
+        Args:
+            fields: Record fields the caller needs (all fields if None)
+            
+        Returns:
+            Dict with 'success', 'data', and optional 'error' keys
+        """
+        key = self.cache_key(kwargs)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                cached["cached"] = True
+                return self.project(cached, fields)
+        
+        if short_of_time(MIN_CALL_SECONDS, "execution", f"skipped {self.name} call"):
+            return self._deadline_error()
+        
+        flight_key = self.call_key(kwargs) if self.idempotent else None
+        if flight_key is None:
+            return self.project(await self._acall(kwargs, key), fields)
+        
+        try:
+            result = await self.coalescer.ado(flight_key, lambda: self._acall(kwargs, key), timeout=self._wait_seconds())
+        except (FutureTimeout, asyncio.TimeoutError):
+            return self._shared_call_timeout()
+        
+        return self.project(result, fields)
+    
+    async def _acall(self, kwargs: Dict[str, Any], key: Optional[str]) -> Dict[str, Any]:
+        """
+        Make one upstream call through the circuit breaker and cache its result
+        
+        Args:
+            kwargs: Parameters passed to aexecute
+            key: Cache key (None if the result is not cached)
+            
+        Returns:
+            Tool result
+        """
+        breaker = self.breaker
+        if not breaker.allow():
+            return self._circuit_open_error(breaker)
+        
+        started = time.perf_counter()
+        recorded = False
+        try:
+            if self.idempotent:
+                result = await self.hedger.acall(self.name, self.aexecute, kwargs)
+            else:
+                result = await self.aexecute(**kwargs)
+        except Exception:
+            recorded = True
+            breaker.record(True, time.perf_counter() - started)
+            raise
+        else:
+            recorded = True
+            self._record_outcome(breaker, result, time.perf_counter() - started)
+        finally:
+            # Cancellation says nothing about the upstream, but a probe must give its slot back
+            if not recorded:
+                breaker.release()
+        
+        if key is not None and result.get("success"):
+            self.cache.set(key, result, self.cache_ttl)
+        
+        return result
+    
+    @staticmethod
+    def _wait_seconds() -> Optional[float]:
+        """Longest this task may wait on a call shared with other tasks"""
+        deadline = current_deadline()
+        return None if deadline is None else deadline.remaining()
+    
+    @staticmethod
+    def _record_outcome(breaker: CircuitBreaker, result: Dict[str, Any], latency: float):
+        """Report a call to the breaker; only transient errors count against the upstream"""
+        failed = not result.get("success") and classify(result) == TRANSIENT
+        breaker.record(failed, latency)
+    
+    def _circuit_open_error(self, breaker: CircuitBreaker) -> Dict[str, Any]:
+        """Result returned without calling the upstream while its circuit is open"""
+        retry_after = round(breaker.seconds_until_probe())
+        return {
+            "success": False,
+            "error": f"{self.name} is temporarily unavailable after repeated failures, retrying in {retry_after}s",
+            "data": None,
+            "retryable": False,
+            "retry_after": retry_after,
+            "circuit_open": True
+        }
+    
+    def _deadline_error(self) -> Dict[str, Any]:
+        """Result returned without calling the upstream once the task deadline is (nearly) spent"""
+        return {
+            "success": False,
+            "error": f"Task deadline reached before {self.name} could be called",
+            "data": None,
+            "retryable": False,
+            "deadline_exceeded": True
+        }
+    
+    def _shared_call_timeout(self) -> Dict[str, Any]:
+        """Result returned when the task deadline passes while waiting on a shared call"""
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.note("execution", f"stopped waiting for shared {self.name} call")
+        return self._deadline_error()
+    
+    def project(self, result: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+        """
+        Trim a successful result to the fields a plan step asked for
+        
+        The cache always holds the full result, so steps that need different
+        fields share one entry. Fields the structural verifier relies on
+        ("fields" and "item_fields" of the output schema) are always kept.
+        
+        Args:
+            result: Tool result
+            fields: Record fields to keep (no projection if empty or None)
+            
+        Returns:
+            Result with projected data
+        """
+        if not fields or not result.get("success") or result.get("data") is None:
+            return result
+        
+        if isinstance(fields, str):
+            fields = [fields]
+        
+        schema = self.output_schema
+        data = result["data"]
+        items_key = schema.get("items")
+        
+        if items_key:
+            records = data.get(items_key)
+            if not isinstance(records, list):
+                return result
+            
+            keep = set(fields) | set(schema.get("item_fields", []))
+            data = dict(data)
+            data[items_key] = [project_record(record, keep) for record in records]
+        else:
+            data = project_record(data, set(fields) | set(schema.get("fields", [])))
+        
+        return {**result, "data": data}
+    
+    def normalize_parameters(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize call parameters so equivalent calls compare equal
+        
+        Defaults from the execute signature are filled in and string values
+        are trimmed, whitespace-collapsed and lowercased.
+        
+        Args:
+            parameters: Parameters passed to execute
+            
+        Returns:
+            Normalized parameters
+            
+        Raises:
+            TypeError: If parameters do not match the execute signature
+        """
+        bound = inspect.signature(self.execute).bind(**parameters)
+        bound.apply_defaults()
+        
+        normalized = {}
+        for key, value in bound.arguments.items():
+            if isinstance(value, str):
+                value = " ".join(value.split()).lower()
+            normalized[key] = value
+        
+        return normalized
+    
+    def call_key(self, parameters: Dict[str, Any]) -> Optional[str]:
+        """
+        Build the key identifying a call: tool name and normalized parameters
+        
+        Args:
+            parameters: Parameters passed to execute
+            
+        Returns:
+            Call key, or None if parameters do not match the execute signature
+        """
+        try:
+            return ToolCache.make_key(self.name, self.normalize_parameters(parameters))
+        except TypeError:
+            return None
+    
+    def cache_key(self, parameters: Dict[str, Any]) -> Optional[str]:
+        """
+        Build the cache key for a call
+        
+        Args:
+            parameters: Parameters passed to execute
+            
+        Returns:
+            Cache key, or None if the call should not be cached
+        """
+        if self.cache_ttl <= 0:
+            return None
+        
+        return self.call_key(parameters)
+    
+    @property
+    def cache(self) -> ToolCache:
+        """Result cache for this tool (shared by all tools by default)"""
+        return getattr(self, "tool_cache", None) or get_tool_cache()
+    
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker guarding this tool's upstream (shared per tool name by default)"""
+        return getattr(self, "circuit_breaker", None) or get_circuit_breaker(self.name)
+    
+    @property
+    def hedger(self) -> Hedger:
+        """Hedger for slow idempotent calls (shared by all tools by default)"""
+        return getattr(self, "request_hedger", None) or get_hedger()
+    
+    @property
+    def coalescer(self) -> SingleFlight:
+        """Single-flight group for identical concurrent calls (shared by all tools and tasks by default)"""
+        return getattr(self, "single_flight", None) or get_single_flight()
+    
+    @property
+    def http(self) -> HTTPClient:
+        """Pooled HTTP client for upstream calls (shared by all tools by default)"""
+        return getattr(self, "http_client", None) or get_http_client()
+    
+    def get_tool_info(self) -> Dict[str, Any]:
         """Get tool information for planner"""
         return {
             "name": self.name,
-            "description": self.description
+            "description": self.description,
+            "parameters": self.parameters,
+            "intent_patterns": list(self.intent_patterns),
+            "output_schema": self.output_schema
         }
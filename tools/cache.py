@@ -0,0 +1,216 @@
+"""
+Tool Cache
+TTL + LRU cache for tool results with an optional on-disk tier
+"""
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from .records import json_default
+
+
+class ToolCache:
+    """
+    Bounded in-memory LRU cache with per-entry TTL
+    
+    When disk_path is given, entries are also written to a SQLite file so
+    they survive restarts; memory misses fall back to the disk tier.
+    """
+    
+    def __init__(self, max_entries: int = 256, disk_path: Optional[str] = None, max_disk_entries: int = 10000):
+        """
+        Args:
+            max_entries: Maximum entries kept in memory
+            disk_path: SQLite file for the persistent tier (disabled if None)
+            max_disk_entries: Maximum entries kept on disk
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk_path = disk_path
+        
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "sets": 0
+        }
+        
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache "
+                "(key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+            )
+            self._db.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(tool_name: str, parameters: Dict[str, Any]) -> str:
+        """
+        Build a cache key from a tool name and normalized parameters
+        
+        Args:
+            tool_name: Tool name
+            parameters: Normalized tool parameters
+            
+        Returns:
+            Stable string key
+        """
+        return f"{tool_name}:{json.dumps(parameters, sort_keys=True, default=str)}"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a fresh entry
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Copy of the cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return copy.deepcopy(value)
+                
+                del self._entries[key]
+                self.stats["expirations"] += 1
+            
+            value = self._disk_get(key, now)
+            if value is not None:
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return copy.deepcopy(value)
+            
+            self.stats["misses"] += 1
+            return None
+    
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        """
+        Store a value for ttl seconds
+        
+        Args:
+            key: Cache key
+            value: Value to cache (must be JSON serializable for the disk tier)
+            ttl: Time to live in seconds
+        """
+        if ttl <= 0:
+            return
+        
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store(key, expires_at, copy.deepcopy(value))
+            self.stats["sets"] += 1
+            self._disk_set(key, expires_at, value)
+    
+    def clear(self):
+        """Remove all entries from memory and disk"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_cache")
+                self._db.commit()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters and the current hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+    
+    def _store(self, key: str, expires_at: float, value: Dict[str, Any]):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Read a fresh entry from the disk tier and promote it to memory"""
+        if self._db is None:
+            return None
+        
+        row = self._db.execute(
+            "SELECT expires_at, value FROM tool_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        
+        value = json.loads(row[1])
+        self._store(key, row[0], value)
+        return value
+    
+    def _disk_set(self, key: str, expires_at: float, value: Dict[str, Any]):
+        """Write an entry to the disk tier, pruning it now and then"""
+        if self._db is None:
+            return
+        
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value, default=json_default))
+            )
+            self._disk_writes += 1
+            
+            if self._disk_writes % 100 == 0:
+                self._db.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (time.time(),))
+                self._db.execute(
+                    "DELETE FROM tool_cache WHERE key NOT IN "
+                    "(SELECT key FROM tool_cache ORDER BY expires_at DESC LIMIT ?)",
+                    (self.max_disk_entries,)
+                )
+            
+            self._db.commit()
+        
+        except sqlite3.Error:
+            # The disk tier is best effort; memory caching still works
+            pass
+
+
+_shared_cache: Optional[ToolCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolCache:
+    """Get the process-wide tool result cache"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ToolCache()
+        return _shared_cache
+
+
+def configure_tool_cache(**kwargs) -> ToolCache:
+    """
+    Replace the shared tool cache with one built from kwargs
+    
+    Args:
+        **kwargs: ToolCache constructor arguments
+        
+    Returns:
+        The new shared cache
+    """
+    global _shared_cache
+    with _shared_lock:
+        _shared_cache = ToolCache(**kwargs)
+        return _shared_cache
@@ -0,0 +1,216 @@
+"""
+Circuit Breaker
+Fails calls to a degraded upstream fast instead of waiting on timeouts
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any
+
+
+# Breaker states
+CLOSED = "closed"        # calls go through, outcomes are tracked
+OPEN = "open"            # calls fail immediately until open_seconds pass
+HALF_OPEN = "half_open"  # a few probe calls test whether the upstream recovered
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker over a rolling window of calls
+    
+    The window keeps the outcome and latency of the last window_size calls
+    made within window_seconds. Once it holds at least min_calls, the
+    circuit opens when the failure rate reaches failure_threshold or the
+    share of calls slower than slow_call_seconds reaches slow_threshold.
+    After open_seconds the next calls are let through as probes (at most
+    half_open_probes at a time); a healthy probe closes the circuit, a
+    failed or slow one opens it again.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        window_seconds: float = 60,
+        min_calls: int = 5,
+        failure_threshold: float = 0.5,
+        slow_call_seconds: float = 5,
+        slow_threshold: float = 0.8,
+        open_seconds: float = 30,
+        half_open_probes: int = 1
+    ):
+        """
+        Args:
+            name: Name of the guarded upstream (used in error messages)
+            window_size: Most recent calls considered
+            window_seconds: Age after which calls drop out of the window
+            min_calls: Calls needed in the window before the circuit can open
+            failure_threshold: Failure rate that opens the circuit
+            slow_call_seconds: Latency above which a call counts as slow
+            slow_threshold: Slow-call rate that opens the circuit
+            open_seconds: Time the circuit stays open before probing
+            half_open_probes: Probe calls allowed at once while half-open
+        """
+        self.name = name
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_threshold = slow_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (timestamp, failed, slow) per call
+        self._window: deque = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0
+        }
+    
+    @property
+    def state(self) -> str:
+        """Current state (an open circuit past open_seconds reads as half-open)"""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+    
+    def allow(self) -> bool:
+        """
+        Ask to make a call
+        
+        Returns:
+            True if the call may go ahead; the caller must then record() it
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    return False
+                self._state = HALF_OPEN
+                self._probes = 0
+            
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.stats["rejected"] += 1
+                    return False
+                self._probes += 1
+            
+            return True
+    
+    def record(self, failed: bool, latency: float):
+        """
+        Record the outcome of an allowed call
+        
+        Args:
+            failed: Whether the upstream failed (timeouts, 5xx, dropped connections)
+            latency: Call duration in seconds
+        """
+        slow = latency > self.slow_call_seconds
+        now = time.monotonic()
+        
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["failures"] += int(failed)
+            self.stats["slow_calls"] += int(slow)
+            
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._state = CLOSED
+                    self._window.clear()
+                return
+            
+            self._window.append((now, failed, slow))
+            while self._window and now - self._window[0][0] > self.window_seconds:
+                self._window.popleft()
+            
+            if self._state == CLOSED and len(self._window) >= self.min_calls:
+                calls = len(self._window)
+                failure_rate = sum(entry[1] for entry in self._window) / calls
+                slow_rate = sum(entry[2] for entry in self._window) / calls
+                if failure_rate >= self.failure_threshold or slow_rate >= self.slow_threshold:
+                    self._open(now)
+    
+    def release(self):
+        """Give back an allowed call that ended without an outcome (e.g. cancelled) without recording it"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+    
+    def seconds_until_probe(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 if not open)"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the state, rolling failure and slow-call rates, and counters"""
+        state = self.state
+        with self._lock:
+            stats = dict(self.stats)
+            calls = len(self._window)
+            stats["window_calls"] = calls
+            stats["failure_rate"] = round(sum(entry[1] for entry in self._window) / calls, 3) if calls else 0.0
+            stats["slow_rate"] = round(sum(entry[2] for entry in self._window) / calls, 3) if calls else 0.0
+        
+        stats["state"] = state
+        return stats
+    
+    def _open(self, now: float):
+        """Open the circuit (caller holds the lock)"""
+        self._state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._window.clear()
+        self.stats["opened"] += 1
+
+
+_shared_breakers: Dict[str, CircuitBreaker] = {}
+_shared_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the process-wide breaker for an upstream
+    
+    Args:
+        name: Upstream or tool name
+        
+    Returns:
+        Breaker shared by every caller using the same name
+    """
+    with _shared_lock:
+        breaker = _shared_breakers.get(name)
+        if breaker is None:
+            breaker = _shared_breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def configure_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    Replace the shared breaker for an upstream with one built from kwargs
+    
+    Args:
+        name: Upstream or tool name
+        **kwargs: CircuitBreaker constructor arguments
+        
+    Returns:
+        The new shared breaker
+    """
+    with _shared_lock:
+        breaker = _shared_breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
@@ -3,16 +3,73 @@ GitHub Tool
 Integrates with GitHub API to search repositories and fetch information
 """
 
+import asyncio
+import copy
+import threading
+import time
 import requests
+import httpx
 import os
+from collections import OrderedDict
 from typing import Dict, Any, Optional
+from core.deadline import current_deadline
 from .base_tool import BaseTool
+from .http_client import HTTPClient
+from .rate_limit import RateLimiter
+from .records import record_type
+from .retry import RetryPolicy, error_type
+
+
+Repository = record_type(
+    "Repository",
+    ("name", "full_name", "description", "stars", "forks", "language", "url", "owner")
+)
 
 
 class GitHubTool(BaseTool):
     """GitHub API integration tool"""
     
-    def __init__(self, token: Optional[str] = None):
+    # Search results change slowly
+    cache_ttl = 3600
+    
+    parameters = {
+        "query": {"type": "string", "description": "Search query, e.g. 'python machine learning'", "entity": True},
+        "max_results": {"type": "integer", "description": "Number of repositories to return", "default": 5}
+    }
+    
+    # Only imperative requests or "top N <language> repos" with a short query;
+    # questions ("how do I deploy python projects") and anything longer are
+    # left to the LLM planner
+    intent_patterns = (
+        r"(?:find|search(?: for)?|show|list)(?: me)? (?:the )?(?:top|best|most popular|popular|trending|most starred)? ?(?P<max_results>\d+)? ?(?!(?:how|what|why|when|where|which|who)\b)(?P<query>[\w.+#-]+(?: [\w.+#-]+){0,3}) (?:repos|repositories|projects)(?: on github| from github)?",
+        r"(?:find|search|show|list)(?: me)? github (?:repos |repositories |projects )?(?:for|about) (?!(?:how|what|why|when|where|which|who)\b)(?P<query>[\w.+#-]+(?: [\w.+#-]+){0,3})",
+        r"(?:the )?top (?P<max_results>\d+) (?P<query>[\w.+#-]+(?: [\w.+#-]+){0,2}) (?:repos|repositories)(?: on github| from github)?",
+    )
+    
+    output_schema = {
+        "fields": ["total_count", "repositories"],
+        "items": "repositories",
+        "item_fields": ["full_name", "url"],
+        "count_parameter": "max_results",
+        "total": "total_count",
+        "record_fields": list(Repository._fields)
+    }
+    
+    # Plain GET requests, safe to send twice
+    idempotent = True
+    
+    # Search is cheap to retry; quota exhaustion is handled by the rate limiter
+    retry_policy = RetryPolicy(max_attempts=3, base_delay=0.5)
+    
+    # Number of ETag-validated responses kept for conditional requests
+    max_etags = 256
+    
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        http_client: Optional[HTTPClient] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.base_url = "https://api.github.com"
         self.headers = {
@@ -20,6 +77,17 @@ class GitHubTool(BaseTool):
         }
         if self.token:
             self.headers["Authorization"] = f"token {self.token}"
+        self.http_client = http_client
+        self.rate_limiter = rate_limiter or RateLimiter()
+        
+        # Request key -> (ETag, tool result) for If-None-Match revalidation
+        self._etags: "OrderedDict[str, tuple]" = OrderedDict()
+        self._etag_lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "not_modified": 0,
+            "refetched": 0
+        }
     
     @property
     def name(self) -> str:
@@ -40,71 +108,251 @@ class GitHubTool(BaseTool):
         Returns:
             Dict with success status and repository data
         """
+        delay = self._reserve()
+        if delay is None:
+            return self._rate_limited_error()
+        if delay > 0:
+            time.sleep(delay)
+        
+        params = self._build_params(query, max_results)
+        
         try:
-            # Search repositories
-            search_url = f"{self.base_url}/search/repositories"
-            params = {
-                "q": query,
-                "sort": "stars",
-                "order": "desc",
-                "per_page": max_results
+            response = self.http.get(
+                f"{self.base_url}/search/repositories",
+                headers=self._conditional_headers(params),
+                params=params
+            )
+            
+            self.rate_limiter.update(response.headers)
+            if response.status_code == 304:
+                result = self._not_modified_result(params)
+                if result is not None:
+                    return result
+                
+                # The stored body was evicted meanwhile; a 304 costs no quota, so the reserved slot is reused
+                response = self.http.get(
+                    f"{self.base_url}/search/repositories",
+                    headers=self._refetch_headers(),
+                    params=params
+                )
+                self.rate_limiter.update(response.headers)
+            
+            return self._handle_response(response, params, max_results)
+        
+        except requests.exceptions.Timeout:
+            return {
+                "success": False,
+                "error": "GitHub API request timed out",
+                "data": None,
+                "error_type": "timeout"
             }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"GitHub tool error: {str(e)}",
+                "data": None,
+                "error_type": error_type(e)
+            }
+    
+    async def aexecute(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+        """
+        Search GitHub repositories without blocking the event loop
+        
+        Args:
+            query: Search query string
+            max_results: Maximum number of results to return
             
-            response = requests.get(
-                search_url, 
-                headers=self.headers, 
-                params=params,
-                timeout=10
+        Returns:
+            Dict with success status and repository data
+        """
+        delay = self._reserve()
+        if delay is None:
+            return self._rate_limited_error()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        params = self._build_params(query, max_results)
+        
+        try:
+            response = await self.http.aget(
+                f"{self.base_url}/search/repositories",
+                headers=self._conditional_headers(params),
+                params=params
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                repositories = []
-                
-                for repo in data.get("items", [])[:max_results]:
-                    repositories.append({
-                        "name": repo.get("name"),
-                        "full_name": repo.get("full_name"),
-                        "description": repo.get("description", "No description"),
-                        "stars": repo.get("stargazers_count", 0),
-                        "forks": repo.get("forks_count", 0),
-                        "language": repo.get("language", "Unknown"),
-                        "url": repo.get("html_url"),
-                        "owner": repo.get("owner", {}).get("login")
-                    })
+            self.rate_limiter.update(response.headers)
+            if response.status_code == 304:
+                result = self._not_modified_result(params)
+                if result is not None:
+                    return result
                 
-                return {
-                    "success": True,
-                    "data": {
-                        "total_count": data.get("total_count", 0),
-                        "repositories": repositories
-                    }
-                }
+                # The stored body was evicted meanwhile; a 304 costs no quota, so the reserved slot is reused
+                response = await self.http.aget(
+                    f"{self.base_url}/search/repositories",
+                    headers=self._refetch_headers(),
+                    params=params
+                )
+                self.rate_limiter.update(response.headers)
             
-            elif response.status_code == 403:
-                return {
-                    "success": False,
-                    "error": "GitHub API rate limit exceeded. Add GITHUB_TOKEN for higher limits.",
-                    "data": None
-                }
-            
-            else:
-                return {
-                    "success": False,
-                    "error": f"GitHub API error: {response.status_code}",
-                    "data": None
-                }
+            return self._handle_response(response, params, max_results)
         
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return {
                 "success": False,
                 "error": "GitHub API request timed out",
-                "data": None
+                "data": None,
+                "error_type": "timeout"
             }
         
         except Exception as e:
             return {
                 "success": False,
                 "error": f"GitHub tool error: {str(e)}",
-                "data": None
+                "data": None,
+                "error_type": error_type(e)
+            }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get conditional request and rate limit counters"""
+        with self._etag_lock:
+            stats = dict(self.stats)
+            stats["etags"] = len(self._etags)
+        
+        stats["rate_limit"] = self.rate_limiter.get_stats()
+        return stats
+    
+    def _build_params(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Build repository search query parameters"""
+        return {
+            "q": query,
+            "sort": "stars",
+            "order": "desc",
+            "per_page": max_results
+        }
+    
+    def _conditional_headers(self, params: Dict[str, Any]) -> Dict[str, str]:
+        """Request headers, with If-None-Match when an ETag is known for params"""
+        headers = dict(self.headers)
+        
+        with self._etag_lock:
+            self.stats["requests"] += 1
+            entry = self._etags.get(self._request_key(params))
+        
+        if entry is not None:
+            headers["If-None-Match"] = entry[0]
+        
+        return headers
+    
+    def _refetch_headers(self) -> Dict[str, str]:
+        """Request headers without If-None-Match, for a 304 whose stored body is gone"""
+        with self._etag_lock:
+            self.stats["refetched"] += 1
+        return dict(self.headers)
+    
+    def _not_modified_result(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Stored result for a 304 response, or None if it has been evicted"""
+        # Unchanged since the ETag was stored; GitHub does not charge quota for this
+        with self._etag_lock:
+            entry = self._etags.get(self._request_key(params))
+            if entry is None:
+                return None
+            self.stats["not_modified"] += 1
+        
+        result = copy.deepcopy(entry[1])
+        result["not_modified"] = True
+        return result
+    
+    def _remember_etag(self, params: Dict[str, Any], etag: Optional[str], result: Dict[str, Any]):
+        """Store the ETag and result of a 200 response for later revalidation"""
+        if not etag:
+            return
+        
+        with self._etag_lock:
+            key = self._request_key(params)
+            self._etags[key] = (etag, copy.deepcopy(result))
+            self._etags.move_to_end(key)
+            while len(self._etags) > self.max_etags:
+                self._etags.popitem(last=False)
+    
+    @staticmethod
+    def _request_key(params: Dict[str, Any]) -> str:
+        """Key identifying a search request"""
+        return "&".join(f"{k}={params[k]}" for k in sorted(params))
+    
+    def _reserve(self) -> Optional[float]:
+        """Reserve a rate limit slot, or None if the wait would outlast the limiter's max wait or the task deadline"""
+        deadline = current_deadline()
+        return self.rate_limiter.reserve(max_wait=deadline.remaining() if deadline is not None else None)
+    
+    def _rate_limited_error(self) -> Dict[str, Any]:
+        """Result returned when the rate limit will not reset soon enough"""
+        retry_after = round(self.rate_limiter.seconds_until_available())
+        if retry_after <= self.rate_limiter.max_wait:
+            error = f"GitHub API rate limit: the next request slot is past the task deadline (quota resets in {retry_after}s)"
+        else:
+            error = f"GitHub API rate limit exhausted, resets in {retry_after}s. Add GITHUB_TOKEN for higher limits."
+        return {
+            "success": False,
+            "error": error,
+            "data": None,
+            "retryable": False,
+            "retry_after": retry_after
+        }
+    
+    def _handle_response(self, response: Any, params: Dict[str, Any], max_results: int) -> Dict[str, Any]:
+        """
+        Convert a search response into a tool result
+        
+        Args:
+            response: requests or httpx response object
+            params: Query parameters that were sent
+            max_results: Maximum number of results to return
+            
+        Returns:
+            Dict with success status and repository data
+        """
+        if response.status_code == 200:
+            data = response.json()
+            repositories = []
+            
+            for repo in data.get("items", [])[:max_results]:
+                repositories.append(Repository(
+                    name=repo.get("name"),
+                    full_name=repo.get("full_name"),
+                    description=repo.get("description", "No description"),
+                    stars=repo.get("stargazers_count", 0),
+                    forks=repo.get("forks_count", 0),
+                    language=repo.get("language", "Unknown"),
+                    url=repo.get("html_url"),
+                    owner=repo.get("owner", {}).get("login")
+                ))
+            
+            result = {
+                "success": True,
+                "data": {
+                    "total_count": data.get("total_count", 0),
+                    "repositories": repositories
+                }
+            }
+            self._remember_etag(params, response.headers.get("ETag"), result)
+            
+            return result
+        
+        elif response.status_code in (403, 429):
+            return {
+                "success": False,
+                "error": "GitHub API rate limit exceeded. Add GITHUB_TOKEN for higher limits.",
+                "data": None,
+                "retryable": False,
+                "retry_after": round(self.rate_limiter.seconds_until_available()),
+                "status_code": response.status_code
+            }
+        
+        else:
+            return {
+                "success": False,
+                "error": f"GitHub API error: {response.status_code}",
+                "data": None,
+                "status_code": response.status_code
             }
@@ -0,0 +1,347 @@
+"""
+Request Hedging
+Sends a second copy of a slow idempotent call and keeps the first answer
+"""
+
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+
+# Upper bounds (seconds) of the latency histogram buckets: 1 ms to ~2 min, 20% apart
+BUCKET_BOUNDS = [0.001 * 1.2 ** i for i in range(65)]
+
+
+class LatencyHistogram:
+    """
+    Bucketed latency histogram over the most recent calls
+    
+    Samples older than the last window calls are subtracted again, so
+    quantiles follow the upstream's current behaviour. Quantiles are
+    reported as bucket upper bounds (within 20% of the true value).
+    """
+    
+    def __init__(self, window: int = 500):
+        """
+        Args:
+            window: Number of recent calls kept
+        """
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._samples: deque = deque(maxlen=window)
+    
+    def add(self, seconds: float):
+        """Record one call's latency"""
+        if len(self._samples) == self._samples.maxlen:
+            self.counts[self._samples[0]] -= 1
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self._samples.append(bucket)
+        self.counts[bucket] += 1
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Latency below which a fraction q of recent calls finished
+        
+        Args:
+            q: Quantile between 0 and 1
+            
+        Returns:
+            Bucket upper bound in seconds, or None without samples
+        """
+        if not self._samples:
+            return None
+        
+        rank = q * len(self._samples)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKET_BOUNDS[min(bucket, len(BUCKET_BOUNDS) - 1)]
+        return BUCKET_BOUNDS[-1]
+
+
+class Hedger:
+    """
+    Hedged execution of idempotent tool calls
+    
+    Every call's latency feeds a per-tool histogram. Once a tool has
+    min_samples calls, a call still running after the tool's observed
+    quantile (p95 by default) gets a second identical request; the first
+    successful answer wins and the other request is cancelled (async) or
+    its answer discarded (sync calls cannot interrupt a blocking request).
+    Sync calls only go through the thread pool once their tool is hedged.
+    Extra load is capped by a token bucket: each call earns max_extra of
+    a hedge, so at most that fraction of calls is ever duplicated.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = False,
+        quantile: float = 0.95,
+        max_extra: float = 0.1,
+        burst: float = 2,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        window: int = 500,
+        max_workers: int = 16
+    ):
+        """
+        Args:
+            enabled: Whether calls are hedged at all (latencies are tracked either way)
+            quantile: Latency quantile after which a hedge is sent
+            max_extra: Largest fraction of calls that may be hedged
+            burst: Hedges that may be sent back to back when the budget is full
+            min_samples: Calls observed before a tool is hedged
+            min_delay: Shortest hedge delay in seconds
+            window: Calls kept per latency histogram
+            max_workers: Threads for hedged sync calls
+        """
+        self.enabled = enabled
+        self.quantile = quantile
+        self.max_extra = max_extra
+        self.burst = burst
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.window = window
+        self.max_workers = max_workers
+        
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._tokens = float(burst)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call to a tool
+        
+        Args:
+            name: Tool name
+            
+        Returns:
+            Delay, or None if the tool is not hedged (disabled or too few samples)
+        """
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None or len(histogram) < self.min_samples:
+                return None
+            return max(self.min_delay, histogram.quantile(self.quantile))
+    
+    def call(self, name: str, fn: Callable[..., Dict[str, Any]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a blocking tool call, hedging it if it is slow
+        
+        Args:
+            name: Tool name
+            fn: Tool function (execute)
+            kwargs: Call parameters
+            
+        Returns:
+            Tool result of the winning request
+        """
+        delay = self.hedge_delay(name)
+        self._count(name, "calls")
+        started = time.perf_counter()
+        
+        if delay is None:
+            result = fn(**kwargs)
+            self._observe(name, time.perf_counter() - started)
+            return result
+        
+        pool = self._executor()
+        primary = pool.submit(contextvars.copy_context().run, fn, **kwargs)
+        futures = [primary]
+        try:
+            done, _ = wait(futures, timeout=delay)
+            if done or not self._take_token(name):
+                result = primary.result()
+                self._observe(name, time.perf_counter() - started)
+                return result
+            
+            hedge = pool.submit(contextvars.copy_context().run, fn, **kwargs)
+            futures.append(hedge)
+            hedge_started = time.perf_counter()
+            pending = set(futures)
+            failure: Optional[Dict[str, Any]] = None
+            error: Optional[BaseException] = None
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    
+                    if result.get("success"):
+                        self._finish(name, future is hedge, time.perf_counter() - (hedge_started if future is hedge else started))
+                        return result
+                    failure = failure or result
+            
+            if failure is not None:
+                return failure
+            raise error
+        finally:
+            # A request still queued is dropped; one already running finishes in the background, unused
+            for future in futures:
+                future.cancel()
+    
+    async def acall(self, name: str, fn: Callable[..., Awaitable[Dict[str, Any]]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of call; the losing request is cancelled
+        
+        Args:
+            name: Tool name
+            fn: Async tool function (aexecute)
+            kwargs: Call parameters
+            
+        Returns:
+            Tool result of the winning request
+        """
+        delay = self.hedge_delay(name)
+        self._count(name, "calls")
+        started = time.perf_counter()
+        
+        if delay is None:
+            result = await fn(**kwargs)
+            self._observe(name, time.perf_counter() - started)
+            return result
+        
+        primary = asyncio.ensure_future(fn(**kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._take_token(name):
+                result = await primary
+                self._observe(name, time.perf_counter() - started)
+                return result
+            
+            hedge = asyncio.ensure_future(fn(**kwargs))
+            tasks.append(hedge)
+            hedge_started = time.perf_counter()
+            pending = {primary, hedge}
+            failure: Optional[Dict[str, Any]] = None
+            error: Optional[BaseException] = None
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    
+                    result = task.result()
+                    if result.get("success"):
+                        self._finish(name, task is hedge, time.perf_counter() - (hedge_started if task is hedge else started))
+                        return result
+                    failure = failure or result
+            
+            if failure is not None:
+                return failure
+            raise error
+        finally:
+            # Also reached when the caller is cancelled; no request may outlive the call
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tool call, hedge and win counts with the current hedge delay"""
+        with self._lock:
+            tools = {name: dict(counters) for name, counters in self.stats.items()}
+            names = list(self._histograms)
+        
+        for name in names:
+            tools.setdefault(name, {})["hedge_delay"] = self.hedge_delay(name)
+        
+        fired = sum(counters.get("hedged", 0) for counters in tools.values())
+        calls = sum(counters.get("calls", 0) for counters in tools.values())
+        return {
+            "enabled": self.enabled,
+            "hedges_fired": fired,
+            "hedges_won": sum(counters.get("won", 0) for counters in tools.values()),
+            "extra_load": round(fired / calls, 3) if calls else 0.0,
+            "tools": tools
+        }
+    
+    def _take_token(self, name: str) -> bool:
+        """Spend one hedge from the load budget"""
+        with self._lock:
+            if self._tokens < 1:
+                self._count_locked(name, "budget_denied")
+                return False
+            self._tokens -= 1
+            self._count_locked(name, "hedged")
+            return True
+    
+    def _finish(self, name: str, hedge_won: bool, latency: float):
+        """Record the winner of a hedged call"""
+        self._observe(name, latency)
+        if hedge_won:
+            self._count(name, "won")
+    
+    def _observe(self, name: str, latency: float):
+        """Add a latency sample and earn hedge budget for the call"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(self.window)
+            histogram.add(latency)
+            self._tokens = min(self.burst, self._tokens + self.max_extra)
+    
+    def _count(self, name: str, counter: str):
+        """Increment a per-tool counter"""
+        with self._lock:
+            self._count_locked(name, counter)
+    
+    def _count_locked(self, name: str, counter: str):
+        """Increment a per-tool counter (caller holds the lock)"""
+        counters = self.stats.setdefault(name, {"calls": 0, "hedged": 0, "won": 0, "budget_denied": 0})
+        counters[counter] += 1
+    
+    def _executor(self) -> ThreadPoolExecutor:
+        """Thread pool for hedged sync calls, created on first use"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+            return self._pool
+
+
+_shared_hedger: Optional[Hedger] = None
+_shared_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Get the process-wide hedger (disabled until configured)"""
+    global _shared_hedger
+    with _shared_lock:
+        if _shared_hedger is None:
+            _shared_hedger = Hedger()
+        return _shared_hedger
+
+
+def configure_hedger(**kwargs) -> Hedger:
+    """
+    Replace the shared hedger with one built from kwargs
+    
+    Args:
+        **kwargs: Hedger constructor arguments
+        
+    Returns:
+        The new shared hedger
+    """
+    global _shared_hedger
+    with _shared_lock:
+        _shared_hedger = Hedger(**kwargs)
+        return _shared_hedger
@@ -0,0 +1,267 @@
+"""
+HTTP Client
+Shared pooled HTTP layer used by all tools for upstream API calls
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Dict, Any, Callable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from core.deadline import call_timeout
+from core.tracing import span
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive"
+}
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that reports every new connection it opens"""
+    
+    def __init__(self, on_new_connection, **kwargs):
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        on_new_connection = self._on_new_connection
+        
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                on_new_connection(self.host)
+                return super()._new_conn()
+        
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                on_new_connection(self.host)
+                return super()._new_conn()
+        
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
+
+class HTTPClient:
+    """
+    Keep-alive HTTP client with per-host connection pools
+    
+    Sync calls go through a requests Session, async calls through one
+    httpx.AsyncClient per event loop and host. Both count how many requests
+    were served and how many new connections had to be opened. Code that
+    runs an event loop calls aclose() before the loop ends, so its clients'
+    connections are closed with it.
+    """
+    
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        host_pool_sizes: Optional[Dict[str, int]] = None,
+        timeout: float = 10,
+        host_timeouts: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            pool_maxsize: Keep-alive connections kept per host
+            host_pool_sizes: Per-host overrides for pool_maxsize
+            timeout: Default request timeout in seconds
+            host_timeouts: Per-host overrides for timeout
+        """
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.timeout = timeout
+        self.host_timeouts = dict(host_timeouts or {})
+        
+        self._lock = threading.Lock()
+        self._host_stats: Dict[str, Dict[str, int]] = {}
+        
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        default_adapter = _PooledAdapter(
+            self._record_connection,
+            pool_connections=max(10, len(self.host_pool_sizes) + 1),
+            pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", default_adapter)
+        self.session.mount("http://", default_adapter)
+        for host, size in self.host_pool_sizes.items():
+            self.session.mount(
+                f"https://{host}",
+                _PooledAdapter(self._record_connection, pool_connections=1, pool_maxsize=size)
+            )
+        
+        # One AsyncClient per (event loop, host); clients cannot be shared across loops
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> requests.Response:
+        """
+        Send a GET request over a pooled keep-alive connection
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            headers: Extra request headers
+            timeout: Timeout in seconds (defaults to the host timeout; capped by the task deadline)
+            
+        Returns:
+            requests Response
+        """
+        host = urlsplit(url).hostname or ""
+        self._record_request(host)
+        with span("http", target=host) as trace:
+            response = self.session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=call_timeout(timeout if timeout is not None else self.timeout_for(host))
+            )
+            trace.set(status_code=response.status_code)
+        return response
+    
+    async def aget(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        Send a GET request over a pooled keep-alive connection without blocking
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            headers: Extra request headers
+            timeout: Timeout in seconds (defaults to the host timeout; capped by the task deadline)
+            
+        Returns:
+            httpx Response
+        """
+        host = urlsplit(url).hostname or ""
+        self._record_request(host)
+        client, trace = self._async_client(host)
+        with span("http", target=host) as call:
+            response = await client.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=call_timeout(timeout if timeout is not None else self.timeout_for(host)),
+                extensions={"trace": trace}
+            )
+            call.set(status_code=response.status_code)
+        return response
+    
+    def timeout_for(self, host: str) -> float:
+        """Get the configured timeout for a host"""
+        return self.host_timeouts.get(host, self.timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get request and connection counters
+        
+        Returns:
+            Dict with totals and per-host counts of requests, opened and reused connections
+        """
+        with self._lock:
+            hosts = {}
+            for host, counts in self._host_stats.items():
+                hosts[host] = {
+                    "requests": counts["requests"],
+                    "connections_opened": counts["opened"],
+                    "connections_reused": max(0, counts["requests"] - counts["opened"])
+                }
+        
+        return {
+            "requests": sum(h["requests"] for h in hosts.values()),
+            "connections_opened": sum(h["connections_opened"] for h in hosts.values()),
+            "connections_reused": sum(h["connections_reused"] for h in hosts.values()),
+            "hosts": hosts
+        }
+    
+    def close(self):
+        """Close the sync session and drop its pooled connections"""
+        self.session.close()
+    
+    async def aclose(self):
+        """Close the async clients belonging to the running event loop"""
+        clients = self._async_clients.pop(asyncio.get_running_loop(), {})
+        for client, _ in clients.values():
+            await client.aclose()
+    
+    def _async_client(self, host: str) -> Tuple[httpx.AsyncClient, Callable]:
+        """Get or create the AsyncClient and trace hook for host on the running event loop"""
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.setdefault(loop, {})
+        
+        if host not in clients:
+            size = self.host_pool_sizes.get(host, self.pool_maxsize)
+            client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size)
+            )
+            
+            async def trace(event_name: str, info: Dict[str, Any]):
+                # httpcore emits this once per newly opened connection
+                if event_name == "connection.connect_tcp.complete":
+                    self._record_connection(host)
+            
+            clients[host] = (client, trace)
+        
+        return clients[host]
+    
+    def _record_request(self, host: str):
+        """Count a request sent to host"""
+        with self._lock:
+            counts = self._host_stats.setdefault(host, {"requests": 0, "opened": 0})
+            counts["requests"] += 1
+    
+    def _record_connection(self, host: str):
+        """Count a new connection opened to host"""
+        with self._lock:
+            counts = self._host_stats.setdefault(host, {"requests": 0, "opened": 0})
+            counts["opened"] += 1
+
+
+_shared_client: Optional[HTTPClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Get the process-wide HTTP client shared by all tools"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HTTPClient()
+        return _shared_client
+
+
+def configure_http_client(**kwargs) -> HTTPClient:
+    """
+    Replace the shared HTTP client with one built from kwargs
+    
+    Args:
+        **kwargs: HTTPClient constructor arguments
+        
+    Returns:
+        The new shared client
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = HTTPClient(**kwargs)
+        return _shared_client
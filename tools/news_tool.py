@@ -4,17 +4,59 @@ Integrates with NewsAPI to fetch latest news articles
 """
 
 import requests
+import httpx
 import os
 from typing import Dict, Any, Optional
 from .base_tool import BaseTool
+from .http_client import HTTPClient
+from .records import record_type
+from .retry import RetryPolicy, error_type
+
+
+Article = record_type(
+    "Article",
+    ("title", "description", "source", "author", "url", "published_at")
+)
 
 
 class NewsTool(BaseTool):
     """NewsAPI integration tool"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Headlines refresh every few minutes
+    cache_ttl = 300
+    
+    parameters = {
+        "query": {"type": "string", "description": "Topic to search for (omit for top headlines)", "default": None, "entity": True},
+        "country": {"type": "string", "description": "Two-letter country code (us, gb, in, ...)", "default": "us"},
+        "max_results": {"type": "integer", "description": "Number of articles to return", "default": 5}
+    }
+    
+    # Anchored on "news about <topic>" or "<topic> news"; topics are a few words at most
+    intent_patterns = (
+        r"(?:(?:show|get|fetch|find|list)(?: me)? )?(?:the )?(?:latest|top|today's|recent|current)? ?(?P<max_results>\d+)? ?(?:news|(?:news )?headlines)(?: (?:in|from|for) (?P<country>[a-z]{2}))?",
+        r"(?:(?:show|get|fetch|find|list)(?: me)? )?(?:the )?(?:latest|top|today's|recent)? ?(?P<max_results>\d+)? ?news (?:about|on|regarding) (?P<query>[\w.+#-]+(?: [\w.+#-]+){0,3})",
+        r"(?:(?:show|get|fetch|find|list)(?: me)? )?(?:the )?(?:latest|top|today's|recent)? ?(?P<max_results>\d+)? ?(?P<query>[\w.+#-]+(?: [\w.+#-]+){0,2}?) (?:news|headlines)",
+    )
+    
+    output_schema = {
+        "fields": ["total_results", "articles"],
+        "items": "articles",
+        "item_fields": ["title", "url"],
+        "count_parameter": "max_results",
+        "total": "total_results",
+        "record_fields": list(Article._fields)
+    }
+    
+    # Plain GET requests, safe to send twice
+    idempotent = True
+    
+    # The free tier allows 100 requests a day, so retry only once
+    retry_policy = RetryPolicy(max_attempts=2)
+    
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[HTTPClient] = None):
         self.api_key = api_key or os.getenv("NEWS_API_KEY")
         self.base_url = "https://newsapi.org/v2/top-headlines"
+        self.http_client = http_client
     
     @property
     def name(self) -> str:
@@ -37,82 +79,146 @@ class NewsTool(BaseTool):
             Dict with success status and news data
         """
         if not self.api_key:
+            return self._missing_key_error()
+        
+        try:
+            response = self.http.get(
+                self.base_url,
+                params=self._build_params(query, country, max_results)
+            )
+            
+            return self._handle_response(response, max_results)
+        
+        except requests.exceptions.Timeout:
             return {
                 "success": False,
-                "error": "NEWS_API_KEY not configured. Get free API key from https://newsapi.org",
-                "data": None
+                "error": "News API request timed out",
+                "data": None,
+                "error_type": "timeout"
             }
         
-        try:
-            params = {
-                "apiKey": self.api_key,
-                "pageSize": max_results
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"News tool error: {str(e)}",
+                "data": None,
+                "error_type": error_type(e)
             }
+    
+    async def aexecute(self, query: Optional[str] = None, country: str = "us", max_results: int = 5) -> Dict[str, Any]:
+        """
+        Fetch latest news articles without blocking the event loop
+        
+        Args:
+            query: Search query (optional)
+            country: Country code (us, gb, in, etc.)
+            max_results: Maximum number of articles
             
-            if query:
-                params["q"] = query
-            else:
-                params["country"] = country
-            
-            response = requests.get(
+        Returns:
+            Dict with success status and news data
+        """
+        if not self.api_key:
+            return self._missing_key_error()
+        
+        try:
+            response = await self.http.aget(
                 self.base_url,
-                params=params,
-                timeout=10
+                params=self._build_params(query, country, max_results)
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                articles = []
-                
-                for article in data.get("articles", [])[:max_results]:
-                    articles.append({
-                        "title": article.get("title"),
-                        "description": article.get("description", "No description"),
-                        "source": article.get("source", {}).get("name", "Unknown"),
-                        "author": article.get("author", "Unknown"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt")
-                    })
-                
-                return {
-                    "success": True,
-                    "data": {
-                        "total_results": data.get("totalResults", 0),
-                        "articles": articles
-                    }
-                }
+            return self._handle_response(response, max_results)
+        
+        except httpx.TimeoutException:
+            return {
+                "success": False,
+                "error": "News API request timed out",
+                "data": None,
+                "error_type": "timeout"
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"News tool error: {str(e)}",
+                "data": None,
+                "error_type": error_type(e)
+            }
+    
+    def _missing_key_error(self) -> Dict[str, Any]:
+        """Result returned when no API key is configured"""
+        return {
+            "success": False,
+            "error": "NEWS_API_KEY not configured. Get free API key from https://newsapi.org",
+            "data": None
+        }
+    
+    def _build_params(self, query: Optional[str], country: str, max_results: int) -> Dict[str, Any]:
+        """Build top-headlines query parameters"""
+        params = {
+            "apiKey": self.api_key,
+            "pageSize": max_results
+        }
+        
+        if query:
+            params["q"] = query
+        else:
+            params["country"] = country.lower()
+        
+        return params
+    
+    def _handle_response(self, response: Any, max_results: int) -> Dict[str, Any]:
+        """
+        Convert a top-headlines response into a tool result
+        
+        Args:
+            response: requests or httpx response object
+            max_results: Maximum number of articles
             
-            elif response.status_code == 401:
-                return {
-                    "success": False,
-                    "error": "Invalid NewsAPI key",
-                    "data": None
-                }
+        Returns:
+            Dict with success status and news data
+        """
+        if response.status_code == 200:
+            data = response.json()
+            articles = []
             
-            elif response.status_code == 426:
-                return {
-                    "success": False,
-                    "error": "NewsAPI upgrade required (free tier limitations)",
-                    "data": None
-                }
+            for article in data.get("articles", [])[:max_results]:
+                articles.append(Article(
+                    title=article.get("title"),
+                    description=article.get("description", "No description"),
+                    source=article.get("source", {}).get("name", "Unknown"),
+                    author=article.get("author", "Unknown"),
+                    url=article.get("url"),
+                    published_at=article.get("publishedAt")
+                ))
             
-            else:
-                return {
-                    "success": False,
-                    "error": f"News API error: {response.status_code}",
-                    "data": None
+            return {
+                "success": True,
+                "data": {
+                    "total_results": data.get("totalResults", 0),
+                    "articles": articles
                 }
+            }
         
-        except requests.exceptions.Timeout:
+        elif response.status_code == 401:
             return {
                 "success": False,
-                "error": "News API request timed out",
-                "data": None
+                "error": "Invalid NewsAPI key",
+                "data": None,
+                "status_code": response.status_code
             }
         
-        except Exception as e:
+        elif response.status_code == 426:
             return {
                 "success": False,
-                "error": f"News tool error: {str(e)}",
-                "data": None
+                "error": "NewsAPI upgrade required (free tier limitations)",
+                "data": None,
+                "status_code": response.status_code
+            }
+        
+        else:
+            return {
+                "success": False,
+                "error": f"News API error: {response.status_code}",
+                "data": None,
+                "status_code": response.status_code
             }
@@ -0,0 +1,128 @@
+"""
+Rate Limiter
+Paces calls against an upstream quota reported in response headers
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional, Mapping
+
+
+class RateLimiter:
+    """
+    Tracks X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After headers
+    
+    Calls reserve a start time before being sent. While plenty of quota is
+    left they go out immediately; once the remaining budget drops to
+    pace_below, calls are spaced evenly over the rest of the window, and when
+    it is exhausted they wait for the reset. Calls that would wait longer
+    than max_wait are rejected instead of queued.
+    """
+    
+    def __init__(self, pace_below: int = 10, max_wait: float = 30):
+        """
+        Args:
+            pace_below: Remaining quota at which calls start being spaced out
+            max_wait: Longest delay (seconds) a call may be queued for
+        """
+        self.pace_below = pace_below
+        self.max_wait = max_wait
+        
+        self.remaining: Optional[int] = None
+        self.limit: Optional[int] = None
+        self.reset_at = 0.0
+        self.retry_at = 0.0
+        
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            "reserved": 0,
+            "delayed": 0,
+            "rejected": 0,
+            "waited_seconds": 0.0
+        }
+    
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve a slot for the next call
+        
+        Args:
+            max_wait: Longest delay this call can afford (e.g. its deadline), within the limiter's own max_wait
+            
+        Returns:
+            Seconds to wait before sending, or None if the call should not be sent
+        """
+        with self._lock:
+            now = time.time()
+            
+            # The quota window has rolled over since the last response
+            if self.remaining is not None and self.reset_at <= now:
+                self.remaining = None
+            
+            start = max(now, self._next_slot, self.retry_at)
+            interval = 0.0
+            
+            if self.remaining is not None:
+                if self.remaining <= 0:
+                    start = max(start, self.reset_at)
+                elif self.remaining <= self.pace_below:
+                    interval = (self.reset_at - now) / self.remaining
+            
+            delay = start - now
+            if delay > self.max_wait or (max_wait is not None and delay > max_wait):
+                self.stats["rejected"] += 1
+                return None
+            
+            if self.remaining is not None and self.remaining > 0:
+                self.remaining -= 1
+            
+            self._next_slot = start + interval
+            self.stats["reserved"] += 1
+            if delay > 0:
+                self.stats["delayed"] += 1
+                self.stats["waited_seconds"] += delay
+            
+            return max(0.0, delay)
+    
+    def update(self, headers: Mapping[str, str]):
+        """
+        Update quota state from response headers
+        
+        Args:
+            headers: Case-insensitive response headers
+        """
+        with self._lock:
+            now = time.time()
+            
+            if headers.get("X-RateLimit-Remaining") is not None:
+                try:
+                    self.remaining = int(headers["X-RateLimit-Remaining"])
+                    self.reset_at = float(headers.get("X-RateLimit-Reset", now))
+                    if headers.get("X-RateLimit-Limit") is not None:
+                        self.limit = int(headers["X-RateLimit-Limit"])
+                except ValueError:
+                    pass
+            
+            if headers.get("Retry-After") is not None:
+                try:
+                    self.retry_at = max(self.retry_at, now + float(headers["Retry-After"]))
+                except ValueError:
+                    pass
+    
+    def seconds_until_available(self) -> float:
+        """Seconds until quota is available again (0 if it is available now)"""
+        with self._lock:
+            now = time.time()
+            blocked_until = self.retry_at
+            if self.remaining is not None and self.remaining <= 0:
+                blocked_until = max(blocked_until, self.reset_at)
+            return max(0.0, blocked_until - now)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get quota state and pacing counters"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["remaining"] = self.remaining
+            stats["limit"] = self.limit
+            stats["reset_at"] = self.reset_at or None
+            return stats
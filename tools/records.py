@@ -0,0 +1,145 @@
+"""
+Result Records
+Compact, read-only records for the items tools return
+"""
+
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Tuple, Type
+
+
+class Record(Mapping):
+    """
+    Immutable record backed by __slots__
+    
+    Subclasses are created with record_type(). A record stores its values in
+    slots rather than a per-instance dict, which takes a fraction of the
+    memory of the equivalent dict, but still reads like one (record["stars"],
+    record.get("url"), iteration over field names), so code that consumes
+    tool results does not need to know the difference. Values are scalars,
+    so copies share the record itself.
+    """
+    
+    __slots__ = ()
+    
+    # Field names in declaration order
+    _fields: Tuple[str, ...] = ()
+    
+    def __init__(self, *values: Any, **named: Any):
+        if len(values) > len(self._fields):
+            raise TypeError(f"{type(self).__name__} takes {len(self._fields)} values, got {len(values)}")
+        
+        setter = object.__setattr__
+        for field, value in zip(self._fields, values):
+            setter(self, field, value)
+        for field in self._fields[len(values):]:
+            setter(self, field, named.pop(field, None))
+        
+        if named:
+            raise TypeError(f"{type(self).__name__} has no field {', '.join(named)}")
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+    
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+    
+    def __copy__(self) -> "Record":
+        return self
+    
+    def __deepcopy__(self, memo: dict) -> "Record":
+        return self
+    
+    def __reduce__(self):
+        return _rebuild, (type(self).__name__, self._fields, self.values_tuple())
+    
+    def values_tuple(self) -> Tuple[Any, ...]:
+        """Field values in declaration order"""
+        return tuple(getattr(self, field) for field in self._fields)
+    
+    def to_dict(self) -> dict:
+        """Plain dict copy, e.g. for JSON serialization"""
+        return {field: getattr(self, field) for field in self._fields}
+    
+    def project(self, fields: Iterable[str]) -> "Record":
+        """
+        Keep only some fields
+        
+        Args:
+            fields: Field names to keep (unknown names are ignored)
+            
+        Returns:
+            Record with the kept fields in declaration order (self if nothing is dropped)
+        """
+        wanted = set(fields)
+        kept = tuple(field for field in self._fields if field in wanted)
+        if len(kept) == len(self._fields):
+            return self
+        
+        projected = record_type(type(self).__name__, kept)
+        return projected(*(getattr(self, field) for field in kept))
+
+
+@lru_cache(maxsize=256)
+def record_type(name: str, fields: Tuple[str, ...]) -> Type[Record]:
+    """
+    Create (or reuse) a record class
+    
+    Args:
+        name: Class name, e.g. "Repository"
+        fields: Field names in order
+        
+    Returns:
+        Record subclass with one slot per field
+        
+    Raises:
+        ValueError: If a field name is not an identifier or shadows a Record method
+    """
+    fields = tuple(fields)
+    for field in fields:
+        if not field.isidentifier() or hasattr(Record, field):
+            raise ValueError(f"Invalid record field name: {field!r}")
+    
+    return type(name, (Record,), {"__slots__": fields, "_fields": fields})
+
+
+def project_record(record: Any, fields: Iterable[str]) -> Any:
+    """
+    Project a record or plain dict (e.g. one loaded from the disk cache) onto fields
+    
+    Args:
+        record: Record, dict, or other value (returned unchanged)
+        fields: Field names to keep
+        
+    Returns:
+        Projected value
+    """
+    if isinstance(record, Record):
+        return record.project(fields)
+    if isinstance(record, dict):
+        wanted = set(fields)
+        return {key: value for key, value in record.items() if key in wanted}
+    return record
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps default that serializes records as objects and anything else as a string"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    return str(value)
+
+
+def _rebuild(name: str, fields: Tuple[str, ...], values: Tuple[Any, ...]) -> Record:
+    """Unpickle a record"""
+    return record_type(name, fields)(*values)
@@ -0,0 +1,231 @@
+"""
+Retry Policy
+Error classification, backoff with jitter, and a shared retry budget
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+import requests
+
+
+# Classes of failed tool calls
+TRANSIENT = "transient"      # timeouts, dropped connections, 5xx: retry with backoff
+THROTTLED = "throttled"      # 429: retry after the server's Retry-After
+PERMANENT = "permanent"      # bad key, not found, bad request, missing config: never retry
+
+# Status codes worth retrying; any other status is permanent
+TRANSIENT_STATUS = frozenset({408, 425, 500, 502, 503, 504})
+THROTTLED_STATUS = frozenset({429})
+
+# Values of a tool result's "error_type" that are worth retrying
+TRANSIENT_ERROR_TYPES = frozenset({"timeout", "connection"})
+
+
+def error_type(exception: BaseException) -> str:
+    """
+    Structural type of an exception raised by an upstream call
+    
+    Args:
+        exception: Exception raised by requests, httpx or the tool itself
+        
+    Returns:
+        "timeout", "connection" or "error"
+    """
+    if isinstance(exception, (requests.exceptions.Timeout, httpx.TimeoutException, TimeoutError)):
+        return "timeout"
+    if isinstance(exception, (requests.exceptions.ConnectionError, httpx.TransportError, ConnectionError)):
+        return "connection"
+    return "error"
+
+
+def classify(tool_result: Dict[str, Any]) -> str:
+    """
+    Classify a failed tool result
+    
+    Uses the result's "status_code" and "error_type" keys; failures with
+    neither (missing API keys, bad responses) are permanent, as is anything
+    the tool marked "retryable": False.
+    
+    Args:
+        tool_result: Failed tool result
+        
+    Returns:
+        TRANSIENT, THROTTLED or PERMANENT
+    """
+    if tool_result.get("retryable") is False:
+        return PERMANENT
+    
+    status = tool_result.get("status_code")
+    if status is not None:
+        if status in THROTTLED_STATUS:
+            return THROTTLED
+        if status in TRANSIENT_STATUS:
+            return TRANSIENT
+        return PERMANENT
+    
+    if tool_result.get("error_type") in TRANSIENT_ERROR_TYPES:
+        return TRANSIENT
+    return PERMANENT
+
+
+class RetryPolicy:
+    """
+    Per-tool retry settings
+    
+    Delays grow exponentially from base_delay and use "full jitter" (a
+    uniform draw between 0 and the capped exponential delay) so that
+    clients failing together do not retry together. Throttled calls wait
+    for the server's Retry-After instead, unless that is longer than
+    max_delay, in which case they are not retried at all.
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        multiplier: float = 2.0,
+        retry_throttled: bool = True
+    ):
+        """
+        Args:
+            max_attempts: Total attempts per call, including the first
+            base_delay: Delay cap (seconds) before the first retry
+            max_delay: Largest delay ever waited between attempts
+            multiplier: Growth of the delay cap per attempt
+            retry_throttled: Whether 429 responses are retried at all
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.retry_throttled = retry_throttled
+    
+    def delay(self, outcome: str, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt
+        
+        Args:
+            outcome: Classification of the failed attempt
+            attempt: Number of attempts made so far (1 after the first failure)
+            retry_after: Server-requested wait, if any
+            
+        Returns:
+            Delay in seconds, or None if the call should not be retried
+        """
+        if attempt >= self.max_attempts or outcome == PERMANENT:
+            return None
+        
+        if outcome == THROTTLED:
+            if not self.retry_throttled:
+                return None
+            if retry_after is not None:
+                return float(retry_after) if retry_after <= self.max_delay else None
+        
+        cap = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, cap)
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries across all tools
+    
+    Every first attempt deposits ratio tokens and every retry spends one,
+    so retries stay at roughly ratio of normal traffic. A small time-based
+    refill (min_per_second) keeps retries possible at low traffic. When an
+    upstream is failing everywhere the bucket drains and further failures
+    are returned immediately instead of multiplying the load.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 0.5, max_tokens: float = 10.0):
+        """
+        Args:
+            ratio: Retries allowed per first attempt
+            min_per_second: Tokens added per second regardless of traffic
+            max_tokens: Bucket size (largest burst of retries)
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "denied": 0
+        }
+    
+    def record_request(self):
+        """Count a first attempt and deposit its share of retry tokens"""
+        with self._lock:
+            self._refill()
+            self.stats["requests"] += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+    
+    def try_spend(self) -> bool:
+        """
+        Take a token for one retry
+        
+        Returns:
+            True if the retry may go ahead
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.stats["denied"] += 1
+                return False
+            
+            self._tokens -= 1
+            self.stats["retries"] += 1
+            return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retry counters and the current token balance"""
+        with self._lock:
+            self._refill()
+            stats = dict(self.stats)
+            stats["tokens"] = round(self._tokens, 2)
+        
+        stats["retry_rate"] = stats["retries"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+    
+    def _refill(self):
+        """Add time-based tokens (caller holds the lock)"""
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+
+_shared_budget: Optional[RetryBudget] = None
+_shared_lock = threading.Lock()
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get the process-wide retry budget"""
+    global _shared_budget
+    with _shared_lock:
+        if _shared_budget is None:
+            _shared_budget = RetryBudget()
+        return _shared_budget
+
+
+def configure_retry_budget(**kwargs) -> RetryBudget:
+    """
+    Replace the shared retry budget with one built from kwargs
+    
+    Args:
+        **kwargs: RetryBudget constructor arguments
+        
+    Returns:
+        The new shared budget
+    """
+    global _shared_budget
+    with _shared_lock:
+        _shared_budget = RetryBudget(**kwargs)
+        return _shared_budget
@@ -0,0 +1,185 @@
+"""
+Single Flight
+Coalesces concurrent identical tool calls into one upstream request
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+
+
+# Outcome of a call whose leader was cancelled or interrupted; followers retry it
+_ABANDONED = object()
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call among concurrent callers with the same key
+    
+    The first caller for a key (the leader) makes the call; callers that
+    arrive while it is running (followers) wait for it and get a copy of
+    its result, or its exception. A leader that is cancelled or interrupted
+    shares nothing: the key is released and a waiting follower takes over
+    as the new leader. Calls are tracked with thread-safe
+    futures, so sync callers in worker threads and async callers on any
+    event loop share the same flight. Once the leader finishes the key is
+    released, so later callers start a fresh call (or hit the tool cache).
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "executed": 0,
+            "coalesced": 0
+        }
+    
+    def do(self, key: str, fn: Callable[[], Dict[str, Any]], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run a blocking call, or wait for the identical call already in flight
+        
+        Args:
+            key: Call key (tool name and normalized parameters)
+            fn: Call to make when leading
+            timeout: Longest a follower waits, in seconds (no limit if None)
+            
+        Returns:
+            Tool result; followers get a copy marked "coalesced"
+            
+        Raises:
+            TimeoutError: If a follower's timeout passes first
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            outcome = future.result(timeout=self._remaining(expires))
+            if outcome is not _ABANDONED:
+                return self._shared(outcome)
+        
+        try:
+            result = fn()
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            # Interrupted: a follower retries the call instead of failing with it
+            self._settle(key, future, result=_ABANDONED)
+            raise
+        
+        self._settle(key, future, result=result)
+        return result
+    
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Dict[str, Any]]], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Async version of do
+        
+        Args:
+            key: Call key (tool name and normalized parameters)
+            fn: Coroutine function to await when leading
+            timeout: Longest a follower waits, in seconds (no limit if None)
+            
+        Returns:
+            Tool result; followers get a copy marked "coalesced"
+            
+        Raises:
+            TimeoutError: If a follower's timeout passes first
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            # Shielded: a follower giving up must not cancel the shared call
+            waiter = asyncio.shield(asyncio.wrap_future(future))
+            outcome = await asyncio.wait_for(waiter, self._remaining(expires))
+            if outcome is not _ABANDONED:
+                return self._shared(outcome)
+        
+        try:
+            result = await fn()
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            # Cancelled: a follower retries the call instead of failing with it
+            self._settle(key, future, result=_ABANDONED)
+            raise
+        
+        self._settle(key, future, result=result)
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executed and coalesced call counts and the calls in flight"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls)
+        
+        total = stats["executed"] + stats["coalesced"]
+        stats["coalesced_rate"] = round(stats["coalesced"] / total, 3) if total else 0.0
+        return stats
+    
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Find the call in flight for key, or register a new one"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            
+            future = self._calls[key] = Future()
+            self.stats["executed"] += 1
+            return future, True
+    
+    @staticmethod
+    def _remaining(expires: Optional[float]) -> Optional[float]:
+        """Seconds a follower may still wait (None for no limit)"""
+        return None if expires is None else max(0.0, expires - time.monotonic())
+    
+    def _settle(self, key: str, future: Future, result: Any = None, error: Optional[Exception] = None):
+        """Release the key and hand the outcome to the followers"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    @staticmethod
+    def _shared(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Follower's own copy of the leader's result"""
+        shared = copy.deepcopy(result)
+        shared["coalesced"] = True
+        return shared
+
+
+_shared_flight: Optional[SingleFlight] = None
+_shared_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group shared by all tools and tasks"""
+    global _shared_flight
+    with _shared_lock:
+        if _shared_flight is None:
+            _shared_flight = SingleFlight()
+        return _shared_flight
+
+
+def configure_single_flight() -> SingleFlight:
+    """
+    Replace the shared single-flight group with an empty one
+    
+    Returns:
+        The new shared group
+    """
+    global _shared_flight
+    with _shared_lock:
+        _shared_flight = SingleFlight()
+        return _shared_flight
@@ -4,17 +4,50 @@ Integrates with OpenWeatherMap API to fetch current weather data
 """
 
 import requests
+import httpx
 import os
 from typing import Dict, Any, Optional
 from .base_tool import BaseTool
+from .http_client import HTTPClient
+from .records import record_type
+from .retry import error_type
+
+
+WeatherReport = record_type(
+    "WeatherReport",
+    ("city", "country", "temperature", "feels_like", "humidity", "description", "wind_speed", "units")
+)
 
 
 class WeatherTool(BaseTool):
     """OpenWeatherMap API integration tool"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Current conditions are updated about every 10 minutes
+    cache_ttl = 600
+    
+    parameters = {
+        "city": {"type": "string", "description": "City name, e.g. 'Mumbai'", "entity": True},
+        "units": {"type": "string", "description": "'metric' (Celsius) or 'imperial' (Fahrenheit)", "default": "metric"}
+    }
+    
+    # Anchored on "weather in <city>" or "<city> weather"; cities are at most three words
+    intent_patterns = (
+        r"(?:(?:show|get|fetch|find)(?: me)? )?(?:the )?(?:current )?(?:weather|temperature|weather conditions)(?: like)? (?:in|for|at) (?P<city>[a-z][\w.'-]*(?: [\w.'-]+){0,2}?)(?: right now| now| today)?",
+        r"(?:(?:show|get|fetch|find)(?: me)? )?(?:the )?(?:current )?(?P<city>[a-z][\w.'-]*(?: [\w.'-]+){0,2}?) (?:weather|temperature)(?: right now| now| today)?",
+    )
+    
+    output_schema = {
+        "fields": ["city", "temperature", "humidity", "description", "units"],
+        "record_fields": list(WeatherReport._fields)
+    }
+    
+    # Plain GET requests, safe to send twice
+    idempotent = True
+    
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[HTTPClient] = None):
         self.api_key = api_key or os.getenv("OPENWEATHER_API_KEY")
         self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+        self.http_client = http_client
     
     @property
     def name(self) -> str:
@@ -36,75 +69,137 @@ class WeatherTool(BaseTool):
             Dict with success status and weather data
         """
         if not self.api_key:
+            return self._missing_key_error()
+        
+        try:
+            response = self.http.get(
+                self.base_url,
+                params=self._build_params(city, units)
+            )
+            
+            return self._handle_response(response, city, units)
+        
+        except requests.exceptions.Timeout:
             return {
                 "success": False,
-                "error": "OPENWEATHER_API_KEY not configured. Get free API key from https://openweathermap.org/api",
-                "data": None
+                "error": "Weather API request timed out",
+                "data": None,
+                "error_type": "timeout"
             }
         
-        try:
-            params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": units
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Weather tool error: {str(e)}",
+                "data": None,
+                "error_type": error_type(e)
             }
+    
+    async def aexecute(self, city: str, units: str = "metric") -> Dict[str, Any]:
+        """
+        Fetch current weather for a city without blocking the event loop
+        
+        Args:
+            city: City name
+            units: Temperature units ('metric' for Celsius, 'imperial' for Fahrenheit)
             
-            response = requests.get(
+        Returns:
+            Dict with success status and weather data
+        """
+        if not self.api_key:
+            return self._missing_key_error()
+        
+        try:
+            response = await self.http.aget(
                 self.base_url,
-                params=params,
-                timeout=10
+                params=self._build_params(city, units)
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                weather_data = {
-                    "city": data.get("name"),
-                    "country": data.get("sys", {}).get("country"),
-                    "temperature": data.get("main", {}).get("temp"),
-                    "feels_like": data.get("main", {}).get("feels_like"),
-                    "humidity": data.get("main", {}).get("humidity"),
-                    "description": data.get("weather", [{}])[0].get("description", ""),
-                    "wind_speed": data.get("wind", {}).get("speed"),
-                    "units": "°C" if units == "metric" else "°F"
-                }
-                
-                return {
-                    "success": True,
-                    "data": weather_data
-                }
-            
-            elif response.status_code == 401:
-                return {
-                    "success": False,
-                    "error": "Invalid OpenWeatherMap API key",
-                    "data": None
-                }
-            
-            elif response.status_code == 404:
-                return {
-                    "success": False,
-                    "error": f"City '{city}' not found",
-                    "data": None
-                }
-            
-            else:
-                return {
-                    "success": False,
-                    "error": f"Weather API error: {response.status_code}",
-                    "data": None
-                }
+            return self._handle_response(response, city, units)
         
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return {
                 "success": False,
                 "error": "Weather API request timed out",
-                "data": None
+                "data": None,
+                "error_type": "timeout"
             }
         
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Weather tool error: {str(e)}",
-                "data": None
+                "data": None,
+                "error_type": error_type(e)
+            }
+    
+    def _missing_key_error(self) -> Dict[str, Any]:
+        """Result returned when no API key is configured"""
+        return {
+            "success": False,
+            "error": "OPENWEATHER_API_KEY not configured. Get free API key from https://openweathermap.org/api",
+            "data": None
+        }
+    
+    def _build_params(self, city: str, units: str) -> Dict[str, Any]:
+        """Build current-weather query parameters"""
+        return {
+            "q": city,
+            "appid": self.api_key,
+            "units": units
+        }
+    
+    def _handle_response(self, response: Any, city: str, units: str) -> Dict[str, Any]:
+        """
+        Convert a current-weather response into a tool result
+        
+        Args:
+            response: requests or httpx response object
+            city: City name that was requested
+            units: Temperature units that were requested
+            
+        Returns:
+            Dict with success status and weather data
+        """
+        if response.status_code == 200:
+            data = response.json()
+            
+            weather_data = WeatherReport(
+                city=data.get("name"),
+                country=data.get("sys", {}).get("country"),
+                temperature=data.get("main", {}).get("temp"),
+                feels_like=data.get("main", {}).get("feels_like"),
+                humidity=data.get("main", {}).get("humidity"),
+                description=data.get("weather", [{}])[0].get("description", ""),
+                wind_speed=data.get("wind", {}).get("speed"),
+                units="°C" if units == "metric" else "°F"
+            )
+            
+            return {
+                "success": True,
+                "data": weather_data
+            }
+        
+        elif response.status_code == 401:
+            return {
+                "success": False,
+                "error": "Invalid OpenWeatherMap API key",
+                "data": None,
+                "status_code": response.status_code
+            }
+        
+        elif response.status_code == 404:
+            return {
+                "success": False,
+                "error": f"City '{city}' not found",
+                "data": None,
+                "status_code": response.status_code
+            }
+        
+        else:
+            return {
+                "success": False,
+                "error": f"Weather API error: {response.status_code}",
+                "data": None,
+                "status_code": response.status_code
             }
@@ -83,7 +83,7 @@ def check_dependencies():
     """Check if required packages are installed"""
     print("\n🔍 Checking dependencies...")
     
-    dependencies = ["openai", "requests", "dotenv", "pydantic"]
+    dependencies = ["openai", "requests", "httpx", "dotenv", "pydantic"]
     all_installed = True
     
     for dep in dependencies: